@@ -0,0 +1,255 @@
+// Nodemcu_code.ino
+// NodeMCU (ESP8266) firmware for the football bot.
+//
+// Protocol (one line per message, '\n' terminated):
+//   CMD:ms                      legacy single command, runs CMD for ms then stops
+//   B<seq>|CMD:ms|CMD:ms|...    batched sequence, steps run back to back
+//     replies: R<seq>           packet received (host measures round-trip time)
+//              A<seq>:<step>    step <step> finished
+//              D<seq>           whole sequence finished
+//   STOP                        stop immediately and drop any running sequence
+//   VEL:<speed>:<turn>:<ms>     closed-loop setpoint, -100..100 % PWM (turn > 0 is right);
+//                               held until the next one, motors stop if none arrives within <ms>
+//
+// Commands: FORWARD, BACKWARD, LEFT, RIGHT, TRAP, FTRAP, RELEASE, KICK, FKICK, WAIT.
+// Steps are timed with millis() so the loop keeps reading the socket while the bot moves.
+
+#include <ESP8266WiFi.h>
+
+const char* WIFI_SSID = "YOUR_SSID";
+const char* WIFI_PASSWORD = "YOUR_PASSWORD";
+IPAddress LOCAL_IP(192, 168, 0, 100);  // Must match Config.NODEMCU_IP
+IPAddress GATEWAY(192, 168, 0, 1);
+IPAddress SUBNET(255, 255, 255, 0);
+const uint16_t SERVER_PORT = 8080;
+
+// Motor driver (L298N style) and trap/kick actuator pins; adjust to the wiring
+const uint8_t LEFT_IN1 = D1;
+const uint8_t LEFT_IN2 = D2;
+const uint8_t RIGHT_IN1 = D3;
+const uint8_t RIGHT_IN2 = D4;
+const uint8_t TRAP_PIN = D5;
+const uint8_t KICK_PIN = D6;
+
+const uint8_t MAX_STEPS = 8;
+const unsigned long DEFAULT_WATCHDOG_MS = 300;
+const uint16_t MAX_LINE = 128;
+
+struct Step {
+  char command[10];
+  unsigned long duration;
+};
+
+WiFiServer server(SERVER_PORT);
+WiFiClient client;
+
+Step steps[MAX_STEPS];
+uint8_t stepCount = 0;
+uint8_t stepIndex = 0;
+long sequenceId = -1;      // -1 for legacy single commands, which are not acked
+bool running = false;
+unsigned long stepStartedAt = 0;
+
+bool velocityMode = false;
+unsigned long velocityAt = 0;
+unsigned long velocityWatchdog = DEFAULT_WATCHDOG_MS;
+
+char lineBuffer[MAX_LINE];
+uint16_t lineLength = 0;
+
+// Wheel speeds in -100..100 % PWM
+void drive(int left, int right) {
+  left = constrain(left, -100, 100);
+  right = constrain(right, -100, 100);
+  analogWrite(LEFT_IN1, left > 0 ? left : 0);
+  analogWrite(LEFT_IN2, left < 0 ? -left : 0);
+  analogWrite(RIGHT_IN1, right > 0 ? right : 0);
+  analogWrite(RIGHT_IN2, right < 0 ? -right : 0);
+}
+
+void stopMotors() {
+  drive(0, 0);
+  digitalWrite(KICK_PIN, LOW);
+}
+
+void startCommand(const char* command) {
+  if (strcmp(command, "FORWARD") == 0) drive(100, 100);
+  else if (strcmp(command, "BACKWARD") == 0) drive(-100, -100);
+  else if (strcmp(command, "LEFT") == 0) drive(-100, 100);
+  else if (strcmp(command, "RIGHT") == 0) drive(100, -100);
+  else if (strcmp(command, "TRAP") == 0) digitalWrite(TRAP_PIN, HIGH);
+  else if (strcmp(command, "FTRAP") == 0) { digitalWrite(TRAP_PIN, HIGH); drive(100, 100); }
+  else if (strcmp(command, "RELEASE") == 0) digitalWrite(TRAP_PIN, LOW);
+  else if (strcmp(command, "KICK") == 0) digitalWrite(KICK_PIN, HIGH);
+  else if (strcmp(command, "FKICK") == 0) { digitalWrite(KICK_PIN, HIGH); drive(100, 100); }
+  else stopMotors();  // WAIT, STOP and unknown commands
+}
+
+void reply(const String& message) {
+  if (client && client.connected()) {
+    client.print(message);
+    client.print('\n');
+  }
+}
+
+void startStep(uint8_t index) {
+  stepIndex = index;
+  stepStartedAt = millis();
+  startCommand(steps[index].command);
+}
+
+void finishSequence() {
+  stopMotors();
+  running = false;
+  if (sequenceId >= 0) reply("D" + String(sequenceId));
+}
+
+// Parse "CMD:ms" into a step; returns false on a malformed token
+bool parseStep(char* token, Step& step) {
+  char* colon = strchr(token, ':');
+  if (colon) {
+    *colon = '\0';
+    step.duration = strtoul(colon + 1, NULL, 10);
+  } else {
+    step.duration = 0;
+  }
+  if (strlen(token) == 0 || strlen(token) >= sizeof(step.command)) return false;
+  strcpy(step.command, token);
+  return true;
+}
+
+// "VEL:<speed>:<turn>:<watchdog_ms>", not acked to keep per-frame traffic small
+void handleVelocity(char* args) {
+  char* save;
+  char* speed = strtok_r(args, ":", &save);
+  char* turn = strtok_r(NULL, ":", &save);
+  char* watchdog = strtok_r(NULL, ":", &save);
+  if (!speed || !turn) return;
+  stepCount = 0;
+  running = false;  // A setpoint overrides any running sequence
+  sequenceId = -1;
+  velocityWatchdog = watchdog ? strtoul(watchdog, NULL, 10) : DEFAULT_WATCHDOG_MS;
+  int v = atoi(speed);
+  int w = atoi(turn);
+  drive(v + w, v - w);
+  velocityMode = v != 0 || w != 0;
+  velocityAt = millis();
+}
+
+void handleLine(char* line) {
+  if (strcmp(line, "STOP") == 0 || strncmp(line, "STOP:", 5) == 0) {
+    stepCount = 0;
+    running = false;
+    sequenceId = -1;
+    velocityMode = false;
+    stopMotors();
+    return;
+  }
+
+  if (strncmp(line, "VEL:", 4) == 0) {
+    handleVelocity(line + 4);
+    return;
+  }
+  velocityMode = false;
+
+  if (line[0] == 'B') {
+    // Batched sequence replaces whatever is running
+    char* save;
+    char* token = strtok_r(line + 1, "|", &save);
+    if (!token) return;
+    sequenceId = atol(token);
+    reply("R" + String(sequenceId));
+    stepCount = 0;
+    while ((token = strtok_r(NULL, "|", &save)) != NULL && stepCount < MAX_STEPS) {
+      if (parseStep(token, steps[stepCount])) stepCount++;
+    }
+  } else {
+    sequenceId = -1;
+    if (parseStep(line, steps[0])) {
+      stepCount = 1;
+      reply(String("OK:") + steps[0].command);
+    } else {
+      stepCount = 0;  // Stops the motors below
+      reply(String("ERR:") + line);
+    }
+  }
+
+  if (stepCount == 0) {
+    finishSequence();
+    return;
+  }
+  running = true;
+  startStep(0);
+}
+
+void readClient() {
+  while (client.available()) {
+    char c = client.read();
+    if (c == '\r') continue;
+    if (c == '\n') {
+      lineBuffer[lineLength] = '\0';
+      if (lineLength > 0) handleLine(lineBuffer);
+      lineLength = 0;
+    } else if (lineLength < MAX_LINE - 1) {
+      lineBuffer[lineLength++] = c;
+    }
+  }
+}
+
+void runSteps() {
+  if (!running || millis() - stepStartedAt < steps[stepIndex].duration) return;
+  if (sequenceId >= 0) reply("A" + String(sequenceId) + ":" + String(stepIndex));
+  if (stepIndex + 1 < stepCount) startStep(stepIndex + 1);
+  else finishSequence();
+}
+
+void checkVelocityWatchdog() {
+  if (velocityMode && millis() - velocityAt > velocityWatchdog) {
+    velocityMode = false;
+    stopMotors();
+  }
+}
+
+void setup() {
+  Serial.begin(115200);
+  pinMode(LEFT_IN1, OUTPUT);
+  pinMode(LEFT_IN2, OUTPUT);
+  pinMode(RIGHT_IN1, OUTPUT);
+  pinMode(RIGHT_IN2, OUTPUT);
+  pinMode(TRAP_PIN, OUTPUT);
+  pinMode(KICK_PIN, OUTPUT);
+  analogWriteRange(100);  // drive() speeds are percentages
+  stopMotors();
+
+  WiFi.mode(WIFI_STA);
+  WiFi.config(LOCAL_IP, GATEWAY, SUBNET);
+  WiFi.begin(WIFI_SSID, WIFI_PASSWORD);
+  while (WiFi.status() != WL_CONNECTED) {
+    delay(250);
+    Serial.print('.');
+  }
+  Serial.println();
+  Serial.println(WiFi.localIP());
+  server.begin();
+  server.setNoDelay(true);
+}
+
+void loop() {
+  if (!client || !client.connected()) {
+    WiFiClient incoming = server.available();
+    if (incoming) {
+      client = incoming;
+      client.setNoDelay(true);  // Acks are tiny, don't let Nagle hold them back
+      lineLength = 0;
+    } else if (running && !client.connected()) {
+      // Host went away mid-move
+      stepCount = 0;
+      sequenceId = -1;
+      running = false;
+      stopMotors();
+    }
+  }
+  if (client && client.connected()) readClient();
+  runSteps();
+  checkVelocityWatchdog();
+}
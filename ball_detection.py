@@ -1,19 +1,169 @@
-from ultralytics import YOLO
+import time
+import cv2
 import numpy as np
+from config import Config
+from box_utils import box_iou
+from keyframe_tracking import KeyframePropagator
+from ball_tracker import BallTracker, TargetLock
+from detector_backends import create_backend
+
+
+class CourtModel:
+    """Court bounds that lock after a run of consistent detections.
+
+    The court never moves on a fixed-camera rig, so once ``lock_frames``
+    consecutive detections agree (IoU >= ``iou_threshold``) the smoothed bounds
+    and restricted zone are cached. While locked, a full-frame detection is only
+    requested every ``revalidate_interval`` frames to check the lock still holds.
+    """
+
+    def __init__(self, lock_frames=15, iou_threshold=0.9, smoothing=0.2,
+                 revalidate_interval=300, buffer_percentage=0.2):
+        self.lock_frames = lock_frames
+        self.iou_threshold = iou_threshold
+        self.smoothing = smoothing
+        self.revalidate_interval = revalidate_interval
+        self.buffer_percentage = buffer_percentage
+        self.bounds = None  # Court bounds used for the current frame
+        self.restricted_zone = None
+        self.locked = False
+        self.consistent_count = 0
+        self.frames_since_validation = 0
+        self._smoothed = None
+
+    @staticmethod
+    def _best_court_box(boxes):
+        courts = boxes[boxes[:, 5] == 0]
+        if len(courts) == 0:
+            return None
+        return courts[np.argmax(courts[:, 4]), :4].astype(np.float64)
+
+    def needs_full_frame(self):
+        """True when the next detection should see the whole frame"""
+        if not self.locked:
+            return True
+        return bool(self.revalidate_interval) and self.frames_since_validation >= self.revalidate_interval
+
+    def _set_bounds(self, bounds):
+        self.bounds = tuple(float(v) for v in bounds)
+        self.restricted_zone = BallDetector._get_restricted_zone(self.bounds, self.buffer_percentage)
+
+    def update(self, boxes, full_frame=True):
+        """Feed one frame's boxes; returns the court bounds to use for that frame"""
+        if self.locked and not full_frame:
+            self.frames_since_validation += 1
+            return self.bounds
+
+        court = self._best_court_box(boxes)
+        if self.locked:
+            self.frames_since_validation = 0
+            if court is not None and box_iou(court, self._smoothed) >= self.iou_threshold:
+                self._smoothed += self.smoothing * (court - self._smoothed)
+                self._set_bounds(self._smoothed)
+                return self.bounds
+            print("🏟️ Court lock lost, re-acquiring court bounds...")
+            self.locked = False
+            self.consistent_count = 0
+
+        if court is None:
+            self.consistent_count = 0
+            self.bounds = self.restricted_zone = None
+            return None
+
+        if self._smoothed is not None and self.consistent_count and \
+                box_iou(court, self._smoothed) >= self.iou_threshold:
+            self._smoothed += self.smoothing * (court - self._smoothed)
+            self.consistent_count += 1
+        else:
+            self._smoothed = court.copy()
+            self.consistent_count = 1
+
+        if self.consistent_count >= self.lock_frames:
+            self.locked = True
+            self.frames_since_validation = 0
+            self._set_bounds(self._smoothed)
+            print(f"🏟️ Court locked at {tuple(int(v) for v in self.bounds)}")
+        else:
+            self._set_bounds(court)
+        return self.bounds
+
+    def crop_region(self, frame_shape, padding):
+        """Integer (x1, y1, x2, y2) crop around the locked court, or None"""
+        if not self.locked:
+            return None
+        height, width = frame_shape[:2]
+        x1, y1, x2, y2 = self.bounds
+        return (max(0, int(x1 - padding)), max(0, int(y1 - padding)),
+                min(width, int(np.ceil(x2 + padding))), min(height, int(np.ceil(y2 + padding))))
+
+    def filter_boxes(self, boxes):
+        """Drop ball boxes whose centers lie outside the court"""
+        if self.bounds is None or len(boxes) == 0:
+            return boxes
+        x1, y1, x2, y2 = self.bounds
+        cx = (boxes[:, 0] + boxes[:, 2]) / 2
+        cy = (boxes[:, 1] + boxes[:, 3]) / 2
+        on_court = (x1 <= cx) & (cx <= x2) & (y1 <= cy) & (cy <= y2)
+        return boxes[(boxes[:, 5] != 1) | on_court]
+
 
 class BallDetector:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, backend=None):
+        # Inference runtime: "ultralytics" (PyTorch), "onnxruntime" or "openvino" on an exported model
+        self.backend_name = backend or Config.DETECTOR_BACKEND
+        # No model_path: selection and tracking only, detection runs elsewhere (multi-camera workers)
+        self.backend = create_backend(self.backend_name, model_path, Config.DETECTOR_IMGSZ,
+                                      Config.DETECTOR_THREADS, Config.DETECTOR_WARMUP_RUNS) if model_path else None
+        self.court_model = CourtModel(Config.COURT_LOCK_FRAMES, Config.COURT_LOCK_IOU,
+                                      Config.COURT_SMOOTHING, Config.COURT_REVALIDATE_INTERVAL)
+        self.keyframes = KeyframePropagator(Config.KEYFRAME_INTERVAL, Config.KEYFRAME_MIN_TRACK_RATIO) \
+            if Config.KEYFRAME_INTERVAL > 1 else None
+        self.tracker = BallTracker(max_distance=Config.TRACK_MAX_DISTANCE, max_age=Config.TRACK_MAX_AGE) \
+            if Config.BALL_TRACKING else None
+        self.target_lock = TargetLock(Config.TARGET_SWITCH_MARGIN, Config.TARGET_SWITCH_FRAMES)
+        self.assigned_tracks = {}  # Bot marker ID -> track ID of its ball in multi-bot mode
 
     def detect(self, frame):
-        return self.model(frame)
+        """(N, 6) boxes x1, y1, x2, y2, conf, class_id from the configured backend"""
+        return self.backend.infer(frame)
 
-    @staticmethod
-    def _is_point_in_rectangle(point, rect_corners):
-        """Helper method to check if a point lies within a rectangle"""
-        x, y = point
-        x1, y1, x2, y2 = rect_corners
-        return x1 <= x <= x2 and y1 <= y <= y2
+    def detect_boxes(self, frame):
+        """
+        Full-frame boxes: (N, 6) x1, y1, x2, y2, conf, class_id, plus a track ID
+        column when ball tracking is on. YOLO only runs on keyframes when
+        keyframe mode is on.
+        """
+        if self.keyframes is None:
+            boxes = self._detect_court_boxes(frame)
+        else:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if self.keyframes.needs_keyframe():
+                start = time.perf_counter()
+                boxes = self._detect_court_boxes(frame)
+                boxes = self.keyframes.keyframe(gray, boxes, (time.perf_counter() - start) * 1000)
+            else:
+                boxes = self.keyframes.propagate(gray)
+
+        if self.tracker is not None:
+            boxes = self.tracker.update(boxes)
+        return boxes
+
+    def _detect_court_boxes(self, frame):
+        """Detect on the court region once it is locked and return full-frame boxes"""
+        region = None
+        if Config.COURT_CROP and not self.court_model.needs_full_frame():
+            region = self.court_model.crop_region(frame.shape, Config.COURT_CROP_PADDING)
+
+        if region is None:
+            boxes = self.detect(frame)
+        else:
+            x1, y1, x2, y2 = region
+            boxes = self.detect(frame[y1:y2, x1:x2]).copy()
+            boxes[:, [0, 2]] += x1
+            boxes[:, [1, 3]] += y1
+
+        self.court_model.update(boxes, full_frame=region is None)
+        return self.court_model.filter_boxes(boxes)
 
     @staticmethod
     def _get_restricted_zone(court_bounds, buffer_percentage=0.2):
@@ -25,74 +175,152 @@ class BallDetector:
         return (x1, y1 + buffer, x2, y2 - buffer)
 
     @staticmethod
-    def find_closest_ball(reference_point, yolo_results, min_balls_in_restricted=1, buffer_percentage=0.2):
+    def _find_court_bounds(boxes):
+        """First class-0 box, matching the original per-box scan"""
+        courts = np.flatnonzero(boxes[:, 5] == 0)
+        if len(courts) == 0:
+            return None
+        return tuple(boxes[courts[0], :4])
+
+    @staticmethod
+    def rank_balls(reference_points, boxes, court_bounds=None, restricted_zone=None,
+                   min_balls_in_restricted=1, buffer_percentage=0.2):
         """
-        Find closest ball to reference point, prioritizing restricted zone.
-        Maintains original input/output structure while adding restricted zone logic.
+        Vectorized candidate search for several reference points at once.
+        Returns (ball_indices, distances): the rows of ``boxes`` that are eligible
+        targets (inside the restricted zone when it holds enough balls, otherwise
+        inside the court) and an (R, M) array of distances from each reference.
+        Returns None when there is no court.
         """
-        # Early return if no valid data
-        if yolo_results[0].boxes.data is None or len(yolo_results[0].boxes.data) == 0:
+        if boxes is None or len(boxes) == 0:
             return None
 
-        # Find court boundaries
-        court_bounds = None
-        boxes = yolo_results[0].boxes.data.cpu().numpy()
-        for box in boxes:
-            x1, y1, x2, y2, conf, class_id = box
-            if class_id == 0:  # Court detection
-                court_bounds = (x1, y1, x2, y2)
-                break
-
+        if court_bounds is None:
+            court_bounds = BallDetector._find_court_bounds(boxes)
         if court_bounds is None:
             return None  # No court detected, maintain original behavior
+        if restricted_zone is None:
+            restricted_zone = BallDetector._get_restricted_zone(court_bounds, buffer_percentage)
 
-        # Get restricted zone (only y values change, x remains same as court)
-        restricted_zone = BallDetector._get_restricted_zone(court_bounds, buffer_percentage)
+        ball_indices = np.flatnonzero(boxes[:, 5] == 1)
+        balls = boxes[ball_indices]
+        cx = (balls[:, 0] + balls[:, 2]) / 2
+        cy = (balls[:, 1] + balls[:, 3]) / 2
 
-        # Track balls in restricted zone and court separately
-        closest_restricted = None
-        min_distance_restricted = float('inf')
-        closest_court = None
-        min_distance_court = float('inf')
-        restricted_ball_count = 0
+        x1, y1, x2, y2 = court_bounds
+        in_court = (x1 <= cx) & (cx <= x2) & (y1 <= cy) & (cy <= y2)
+        rx1, ry1, rx2, ry2 = restricted_zone
+        in_restricted = in_court & (rx1 <= cx) & (cx <= rx2) & (ry1 <= cy) & (cy <= ry2)
 
-        # Process all balls
-        for box in boxes:
-            x1, y1, x2, y2, conf, class_id = box
-            if class_id != 1:  # Not a ball
-                continue
+        # Restricted-zone balls take priority when there are enough of them
+        eligible = in_restricted if np.count_nonzero(in_restricted) >= min_balls_in_restricted else in_court
+        ball_indices = ball_indices[eligible]
 
-            ball_center = ((x1 + x2) / 2, (y1 + y2) / 2)
-            
-            # Skip if ball is outside court
-            if not BallDetector._is_point_in_rectangle(ball_center, court_bounds):
-                continue
+        references = np.asarray(reference_points, dtype=np.float64).reshape(-1, 2)
+        distances = np.hypot(references[:, 0:1] - cx[eligible], references[:, 1:2] - cy[eligible])
+        return ball_indices, distances
+
+    @staticmethod
+    def select_closest_balls(reference_points, boxes, court_bounds=None, restricted_zone=None,
+                             min_balls_in_restricted=1, buffer_percentage=0.2):
+        """Closest eligible ball box (int tuple or None) for each reference point, from one pass"""
+        count = len(reference_points)
+        ranking = BallDetector.rank_balls(reference_points, boxes, court_bounds, restricted_zone,
+                                          min_balls_in_restricted, buffer_percentage)
+        if ranking is None or len(ranking[0]) == 0:
+            return [None] * count
+
+        ball_indices, distances = ranking
+        closest = ball_indices[np.argmin(distances, axis=1)]
+        return [tuple(int(v) for v in boxes[i, :4]) for i in closest]
+
+    @staticmethod
+    def find_closest_ball(reference_point, boxes, court_bounds=None, restricted_zone=None,
+                          min_balls_in_restricted=1, buffer_percentage=0.2):
+        """
+        Find closest ball to reference point, prioritizing restricted zone.
+        Takes the (N, 6) box array from detect_boxes; cached court bounds and
+        restricted zone can be passed in to skip the per-frame court search.
+        """
+        return BallDetector.select_closest_balls([reference_point], boxes, court_bounds, restricted_zone,
+                                                 min_balls_in_restricted, buffer_percentage)[0]
+
+    def select_target(self, reference_point, detections):
+        """
+        Pick the target ball for the reference point from a FrameDetections
+        record and store it there as target_ball / target_ball_id. Uses
+        hysteresis so two nearly equidistant balls do not make the bot flip
+        between them; falls back to find_closest_ball (ID None) when tracking is off.
+        """
+        boxes = detections.boxes
+        detections.target_ball, detections.target_ball_id = None, None
+        if self.tracker is None:
+            detections.target_ball = self.find_closest_ball(reference_point, boxes, detections.court_bounds,
+                                                            detections.restricted_zone)
+            return detections.target_ball
+
+        ranking = self.rank_balls([reference_point], boxes, detections.court_bounds,
+                                  detections.restricted_zone)
+        if ranking is None or len(ranking[0]) == 0:
+            if not self.tracker.is_alive(self.target_lock.target_id):
+                self.target_lock.reset()  # Gone for good, not just missed for a frame
+            return None
+
+        ball_indices, distances = ranking
+        chosen = self.target_lock.select(boxes[ball_indices, 6], distances[0], self.tracker.is_alive)
+        if chosen is None:
+            return None
+        row = boxes[ball_indices[chosen]]
+        detections.target_ball, detections.target_ball_id = tuple(int(v) for v in row[:4]), int(row[6])
+        return detections.target_ball
 
-            # Calculate distance
-            distance = np.sqrt((reference_point[0] - ball_center[0])**2 +
-                             (reference_point[1] - ball_center[1])**2)
+    def assign_targets(self, reference_points, detections):
+        """
+        Give each bot ({marker ID: reference point}) a different ball from one
+        rank_balls pass and store {marker ID: (box, track ID)} in
+        detections.assignments. Closest pairs are matched first, and a bot's
+        current ball counts as TARGET_SWITCH_MARGIN closer so pairs do not flip.
+        """
+        detections.assignments = {}
+        marker_ids = list(reference_points)
+        ranking = self.rank_balls([reference_points[m] for m in marker_ids], detections.boxes,
+                                  detections.court_bounds, detections.restricted_zone) if marker_ids else None
+        if ranking is None or len(ranking[0]) == 0:
+            return detections.assignments
 
-            # Update closest ball in court
-            if distance < min_distance_court:
-                min_distance_court = distance
-                closest_court = (int(x1), int(y1), int(x2), int(y2))
+        ball_indices, costs = ranking
+        boxes = detections.boxes
+        track_ids = boxes[ball_indices, 6].astype(int) if boxes.shape[1] > 6 else None
+        if track_ids is not None:
+            for row, marker_id in enumerate(marker_ids):
+                current = self.assigned_tracks.get(marker_id)
+                if current is not None:
+                    costs[row, track_ids == current] *= 1 - self.target_lock.switch_margin
 
-            # Check and update for restricted zone
-            if BallDetector._is_point_in_rectangle(ball_center, restricted_zone):
-                restricted_ball_count += 1
-                if distance < min_distance_restricted:
-                    min_distance_restricted = distance
-                    closest_restricted = (int(x1), int(y1), int(x2), int(y2))
+        # Greedy matching on the cheapest remaining pair; bots outnumbering balls get none
+        taken_bots, taken_balls = set(), set()
+        for flat in np.argsort(costs, axis=None):
+            row, col = divmod(int(flat), costs.shape[1])
+            if row in taken_bots or col in taken_balls:
+                continue
+            taken_bots.add(row)
+            taken_balls.add(col)
+            track_id = int(track_ids[col]) if track_ids is not None else None
+            detections.assignments[marker_ids[row]] = (tuple(int(v) for v in boxes[ball_indices[col], :4]), track_id)
+            self.assigned_tracks[marker_ids[row]] = track_id
+            if len(taken_bots) == len(marker_ids) or len(taken_balls) == costs.shape[1]:
+                break
+        return detections.assignments
 
-        # Return appropriate result based on restricted zone conditions
-        if restricted_ball_count >= min_balls_in_restricted and closest_restricted is not None:
-            return closest_restricted
-        return closest_court
+    def find_closest_balls(self, reference_points, boxes):
+        """Closest ball for each of several reference points (bot, goal post, other bots)"""
+        return self.select_closest_balls(reference_points, boxes, self.court_model.bounds,
+                                         self.court_model.restricted_zone)
 
-    @staticmethod
-    def find_closest_ball_from_bot(bot_center, yolo_results):
-        return BallDetector.find_closest_ball(bot_center, yolo_results)
+    def find_closest_ball_from_bot(self, bot_center, boxes):
+        return self.find_closest_ball(bot_center, boxes, self.court_model.bounds,
+                                      self.court_model.restricted_zone)
 
-    @staticmethod
-    def find_closest_ball_from_goal_post(goal_post_center, yolo_results):
-        return BallDetector.find_closest_ball(goal_post_center, yolo_results)
\ No newline at end of file
+    def find_closest_ball_from_goal_post(self, goal_post_center, boxes):
+        return self.find_closest_ball(goal_post_center, boxes, self.court_model.bounds,
+                                      self.court_model.restricted_zone)
\ No newline at end of file
@@ -0,0 +1,163 @@
+# ball_tracker.py
+import numpy as np
+from box_utils import iou_matrix, box_centers
+
+
+class BallTracker:
+    """SORT-style multi-ball tracker with persistent IDs.
+
+    Tracks are predicted with a smoothed constant-velocity model, then matched
+    to the new ball boxes greedily on a vectorized cost that combines IoU and
+    centroid distance. A track survives ``max_age`` frames without a match
+    (coasting on its predicted position) but is only reported in frames where
+    it was matched, once it has ``min_hits`` matches; coasting tracks serve
+    association and the target lock, so a ball that was picked up or left the
+    court is never drawn or chased. ``update`` returns the frame's boxes with a
+    seventh column holding the track ID (-1 for non-ball rows such as the court).
+    """
+
+    def __init__(self, iou_threshold=0.1, max_distance=60, max_age=5, min_hits=1, velocity_smoothing=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.velocity_smoothing = velocity_smoothing
+        self.next_id = 0
+        self.reset()
+
+    def reset(self):
+        """Drop all tracks (IDs keep counting up)"""
+        self.boxes = np.empty((0, 4))
+        self.velocity = np.empty((0, 2))
+        self.conf = np.empty(0)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.hits = np.empty(0, dtype=np.int64)
+        self.misses = np.empty(0, dtype=np.int64)
+
+    def _associate(self, predicted, detections):
+        """Greedy matching on 1 - IoU + normalized centroid distance"""
+        if len(predicted) == 0 or len(detections) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        iou = iou_matrix(predicted, detections)
+        offsets = box_centers(predicted)[:, None, :] - box_centers(detections)[None, :, :]
+        distance = np.hypot(offsets[..., 0], offsets[..., 1])
+        gate = (iou >= self.iou_threshold) | (distance <= self.max_distance)
+        cost = np.where(gate, 1.0 - iou + distance / self.max_distance, np.inf)
+
+        track_rows, det_rows = [], []
+        used_tracks, used_dets = set(), set()
+        flat = np.argsort(cost, axis=None)
+        for t, d in zip(*np.unravel_index(flat[np.isfinite(cost.ravel()[flat])], cost.shape)):
+            if t in used_tracks or d in used_dets:
+                continue
+            used_tracks.add(t)
+            used_dets.add(d)
+            track_rows.append(t)
+            det_rows.append(d)
+        return np.array(track_rows, dtype=np.int64), np.array(det_rows, dtype=np.int64)
+
+    def update(self, boxes):
+        """Advance the tracks with one frame's (N, 6) boxes; returns (M, 7) boxes with track IDs"""
+        ball_mask = boxes[:, 5] == 1
+        detections = boxes[ball_mask, :4].astype(np.float64)
+
+        predicted = self.boxes + np.tile(self.velocity, 2)
+        track_rows, det_rows = self._associate(predicted, detections)
+
+        # Matched tracks take the detection and update their velocity
+        motion = box_centers(detections[det_rows]) - box_centers(self.boxes[track_rows]) \
+            if len(track_rows) else np.empty((0, 2))
+        a = self.velocity_smoothing
+        self.velocity[track_rows] = a * motion + (1 - a) * self.velocity[track_rows]
+        predicted[track_rows] = detections[det_rows]
+        self.boxes = predicted
+        self.conf[track_rows] = boxes[ball_mask, 4][det_rows]
+        self.hits[track_rows] += 1
+        self.misses += 1
+        self.misses[track_rows] = 0
+
+        # Unmatched detections start new tracks
+        new_rows = np.setdiff1d(np.arange(len(detections)), det_rows)
+        count = len(new_rows)
+        self.boxes = np.vstack((self.boxes, detections[new_rows]))
+        self.velocity = np.vstack((self.velocity, np.zeros((count, 2))))
+        self.conf = np.concatenate((self.conf, boxes[ball_mask, 4][new_rows]))
+        self.ids = np.concatenate((self.ids, np.arange(self.next_id, self.next_id + count)))
+        self.hits = np.concatenate((self.hits, np.ones(count, dtype=np.int64)))
+        self.misses = np.concatenate((self.misses, np.zeros(count, dtype=np.int64)))
+        self.next_id += count
+
+        alive = self.misses <= self.max_age
+        self.boxes, self.velocity, self.conf = self.boxes[alive], self.velocity[alive], self.conf[alive]
+        self.ids, self.hits, self.misses = self.ids[alive], self.hits[alive], self.misses[alive]
+
+        reported = (self.hits >= self.min_hits) & (self.misses == 0)
+        tracks = np.column_stack((self.boxes[reported], self.conf[reported],
+                                  np.ones(np.count_nonzero(reported)), self.ids[reported]))
+        others = boxes[~ball_mask, :6]
+        others = np.column_stack((others, -np.ones(len(others))))
+        return np.vstack((others, tracks)).astype(np.float32)
+
+
+    def is_alive(self, track_id):
+        """True while the track exists, matched this frame or still coasting"""
+        return track_id is not None and bool(np.any(self.ids == track_id))
+
+
+class TargetLock:
+    """Hysteresis on the chosen target ball.
+
+    The locked ball is kept while it is still a candidate, unless another ball
+    is closer by more than ``switch_margin`` (as a fraction of the locked ball's
+    distance) for ``switch_frames`` consecutive frames. While ``is_alive`` says
+    the locked ball is only coasting (missed by the detector) the lock is held
+    and no ball is chosen, instead of jumping to another one.
+    """
+
+    def __init__(self, switch_margin=0.2, switch_frames=3):
+        self.switch_margin = switch_margin
+        self.switch_frames = switch_frames
+        self.target_id = None
+        self.challenger_id = None
+        self.challenger_count = 0
+
+    def select(self, track_ids, distances, is_alive=None):
+        """Index into track_ids/distances of the ball to chase, or None"""
+        coasting = is_alive is not None and is_alive(self.target_id)
+        if len(track_ids) == 0:
+            if not coasting:
+                self.reset()
+            return None
+
+        best = int(np.argmin(distances))
+        current = np.flatnonzero(track_ids == self.target_id)
+        if len(current) == 0:
+            if coasting:
+                return None  # Locked ball missed this frame, wait for it rather than switch
+            self._lock(track_ids[best])
+            return best
+
+        current = int(current[0])
+        if best != current and distances[best] < distances[current] * (1 - self.switch_margin):
+            if self.challenger_id == track_ids[best]:
+                self.challenger_count += 1
+            else:
+                self.challenger_id = track_ids[best]
+                self.challenger_count = 1
+            if self.challenger_count >= self.switch_frames:
+                self._lock(track_ids[best])
+                return best
+        else:
+            self.challenger_id = None
+            self.challenger_count = 0
+        return current
+
+    def _lock(self, track_id):
+        self.target_id = int(track_id)
+        self.challenger_id = None
+        self.challenger_count = 0
+
+    def reset(self):
+        self.target_id = None
+        self.challenger_id = None
+        self.challenger_count = 0
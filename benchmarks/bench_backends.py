@@ -0,0 +1,99 @@
+# benchmarks/bench_backends.py
+"""
+Compare BallDetector backends on recorded (or synthetic) frames.
+
+    python benchmarks/bench_backends.py --recording replay:recordings/match1 \\
+        --backend ultralytics=yolo_models/v1/best.pt \\
+        --backend onnxruntime=yolo_models/v1/best.onnx \\
+        --backend onnxruntime=yolo_models/v1/best_int8.onnx \\
+        --backend openvino=yolo_models/v1/best.onnx --threads 4
+
+Reports per-backend latency percentiles and, against the first backend,
+how well the detections agree (mean best IoU and recall at IoU 0.5).
+"""
+import sys
+import argparse
+import numpy as np
+
+from common import StageTimer, print_table, write_results, compare_results
+from config import Config
+from box_utils import iou_matrix
+from detector_backends import create_backend
+
+
+def load_frames(recording, count, seed):
+    if recording:
+        from recorder import open_video_source
+        cap = open_video_source(recording, replay_realtime=False)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+    from synthetic import SyntheticScene
+    print("⚠️ No --recording given, using synthetic frames (agreement numbers are not meaningful for real models)")
+    return [scene[0] for scene in SyntheticScene(seed=seed).frames(count)]
+
+
+def agreement(reference, candidate):
+    """Mean best IoU of reference boxes against candidate boxes of the same class, and recall@0.5"""
+    ious = []
+    for class_id in np.unique(reference[:, 5]):
+        ref = reference[reference[:, 5] == class_id]
+        cand = candidate[candidate[:, 5] == class_id]
+        best = iou_matrix(ref, cand).max(axis=1) if len(cand) else np.zeros(len(ref))
+        ious.extend(best.tolist())
+    if not ious:
+        return None
+    ious = np.array(ious)
+    return float(ious.mean()), float(np.mean(ious >= 0.5))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", action="append", required=True, help="name=model_path, repeatable")
+    parser.add_argument("--recording", default=None, help="'replay:<prefix>' recording or video file")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--imgsz", type=int, default=Config.DETECTOR_IMGSZ)
+    parser.add_argument("--threads", type=int, default=Config.DETECTOR_THREADS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    frames = load_frames(args.recording, args.frames, args.seed)
+    print(f"🧪 {len(frames)} frames")
+    timer = StageTimer()
+    outputs = {}
+    for spec in args.backend:
+        name, _, model_path = spec.partition("=")
+        label = f"{name}:{model_path}"
+        backend = create_backend(name, model_path, args.imgsz, args.threads, Config.DETECTOR_WARMUP_RUNS)
+        outputs[label] = [timer.time(label, backend.infer, frame) for frame in frames]
+
+    stages = timer.summary()
+    print_table(stages)
+
+    reference_label = next(iter(outputs))
+    print(f"\n🔍 Agreement with {reference_label}")
+    for label, boxes in outputs.items():
+        scores = [agreement(ref, cand) for ref, cand in zip(outputs[reference_label], boxes)]
+        scores = [s for s in scores if s is not None]
+        if scores:
+            mean_iou, recall = np.mean(scores, axis=0)
+            stages[label].update({"agreement_iou": float(mean_iou), "agreement_recall": float(recall)})
+            print(f"  {label:<50} IoU {mean_iou:.3f} | recall@0.5 {recall:.3f}")
+
+    params = {"frames": len(frames), "recording": args.recording, "imgsz": args.imgsz, "threads": args.threads}
+    if args.output:
+        write_results(args.output, "backends", stages, params)
+    if args.compare and compare_results(args.compare, stages, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end latency benchmark on synthetic frames.
+
+    python benchmarks/bench_pipeline.py --frames 300 --output benchmarks/results/latest.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/baseline.json
+
+Times frame acquisition (replayed recording), YOLO, ArUco, ball selection,
+the control_movement2 decision (socket stubbed) and visualization, then
+reports p50/p95/p99 latency and FPS per stage.
+"""
+import os
+import sys
+import argparse
+import tempfile
+import cv2
+
+from common import StageTimer, summarize, print_table, write_results, compare_results
+from synthetic import SyntheticScene
+from config import Config
+from marker_detection import MarkerDetector
+from visualization import Visualizer
+from bot_controller import BotController
+from camera import CameraManager
+from recorder import FrameRecorder, REPLAY_PREFIX
+
+
+class StubBotController(BotController):
+    """BotController that records commands instead of writing to a socket or sleeping"""
+
+    def __init__(self):
+        super().__init__("127.0.0.1")
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        if self.calibrator is not None:
+            self.calibrator.path = None  # Synthetic poses must not touch the saved calibration
+        self.sent = []
+
+    def connect(self):
+        self.connected = True
+        return True
+
+    def _write_line(self, line, log=True):
+        self.sent.append(line.strip())
+        return True
+
+    def send_command(self, command, duration=1000, preempt=False):
+        self.sent.append((command, duration))
+        return True
+
+    def send_sequence(self, steps, preempt=False):
+        self.sent.append(tuple(steps))
+        return True
+
+    def pause(self, seconds):
+        pass
+
+
+def bench_acquisition(timer, scenes, workdir):
+    prefix = os.path.join(workdir, "synthetic")
+    recorder = FrameRecorder(prefix)
+    for frame, *_ in scenes:
+        recorder.write(frame)
+    recorder.close()
+
+    camera = CameraManager(REPLAY_PREFIX + prefix, replay_realtime=False)
+    camera.start_capture()
+    try:
+        for _ in scenes:
+            timer.time("frame_acquisition", camera.get_frame)
+    finally:
+        camera.stop()
+
+
+def load_ball_detector(model_path, skip_yolo):
+    try:
+        from ball_detection import BallDetector
+    except ImportError as e:
+        print(f"⚠️ Skipping YOLO and ball selection stages: {e}")
+        return None, None
+    if skip_yolo or not os.path.exists(model_path):
+        if not skip_yolo:
+            print(f"⚠️ Model {model_path} not found, skipping YOLO stage")
+        return BallDetector, None
+    return BallDetector, BallDetector(model_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--balls", type=int, default=8, help="Balls per synthetic frame")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=Config.YOLO_MODEL_PATH)
+    parser.add_argument("--skip-yolo", action="store_true")
+    parser.add_argument("--output", default=None, help="Write machine-readable JSON results here")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p95 slowdown before failing")
+    args = parser.parse_args()
+
+    print(f"🧪 Rendering {args.frames} synthetic frames with {args.balls} balls...")
+    scenes = SyntheticScene(Config.BOT_MARKER_ID, Config.GOAL_POST_MARKER_ID,
+                            n_balls=args.balls, seed=args.seed).frames(args.frames)
+    timer = StageTimer()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bench_acquisition(timer, scenes, workdir)
+
+    ball_detector_cls, ball_detector = load_ball_detector(args.model, args.skip_yolo)
+    marker_detector = MarkerDetector(Config.ARUCO_TRACKED_IDS)
+    controller = StubBotController()
+    control = controller.control_velocity if Config.CONTROL_MODE == "velocity" else controller.control_movement2
+    visualizer = Visualizer()
+    marker_hits = 0
+
+    for frame, boxes, bot_center, bot_angle in scenes:
+        frame = frame.copy()
+        if ball_detector is not None:
+            timer.time("yolo_detect", ball_detector.detect, frame)
+        corners, ids, _ = timer.time("aruco_detect_markers", marker_detector.detect_markers, frame)
+        if ids is not None and Config.BOT_MARKER_ID in ids:
+            marker_hits += 1
+
+        target = bot_center[0] + 40, bot_center[1] - 10, bot_center[0] + 64, bot_center[1] + 14
+        if ball_detector_cls is not None:
+            target = timer.time("find_closest_ball", ball_detector_cls.find_closest_ball, bot_center, boxes) or target
+
+        timer.time("control_decision", control, target, bot_center,
+                   (1080, 360), bot_angle, Config.BALL_PROXIMITY_THRESHOLD, 60)
+
+        def draw():
+            visualizer.highlight_aruco(frame, ids, corners, Config.BOT_MARKER_ID)
+            visualizer.draw_ball_boxes(frame, boxes, target)
+            cv2.circle(frame, (640, 360), 200, (128, 255, 128), 4)
+            cv2.circle(frame, (640, 360), 300, (255, 128, 128), 4)
+        timer.time("visualization", draw)
+
+    stages = timer.summary()
+    per_frame = [sum(values) for values in zip(*(timer.samples[s] for s in stages))]
+    stages["end_to_end"] = summarize(per_frame)
+    print_table(stages)
+    print(f"\n🎯 Bot marker found in {marker_hits}/{len(scenes)} frames, {len(controller.sent)} commands decided")
+
+    params = {"frames": args.frames, "balls": args.balls, "seed": args.seed,
+              "yolo": ball_detector is not None, "model": args.model if ball_detector else None}
+    if args.output:
+        write_results(args.output, "pipeline", stages, params)
+    if args.compare and compare_results(args.compare, stages, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/common.py
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+
+# Benchmarks run as scripts from the repo root or this folder; make the project modules importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+class StageTimer:
+    """Collects per-call latencies (ms) for named stages"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+        return result
+
+    def summary(self):
+        return {stage: summarize(values) for stage, values in self.samples.items()}
+
+
+def summarize(latencies_ms):
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    mean = float(values.mean())
+    return {
+        "count": int(len(values)),
+        "mean_ms": mean,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "fps": 1000.0 / mean if mean > 0 else float("inf"),
+    }
+
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                  capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ""
+    try:
+        import cv2
+        cv2_version = cv2.__version__
+    except ImportError:
+        cv2_version = None
+    return {
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2_version,
+        "timestamp": time.time(),
+    }
+
+
+def print_table(stages):
+    print(f"\n{'stage':<28}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'fps':>10}")
+    for stage, s in stages.items():
+        print(f"{stage:<28}{s['count']:>7}{s['mean_ms']:>10.3f}{s['p50_ms']:>10.3f}"
+              f"{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}{s['fps']:>10.1f}")
+
+
+def write_results(path, name, stages, params):
+    result = {"benchmark": name, "environment": environment(), "params": params, "stages": stages}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results written to {path}")
+    return result
+
+
+def compare_results(baseline_path, stages, tolerance=0.10, metric="p95_ms"):
+    """Print stages slower than the baseline by more than tolerance; returns the regressed stage names"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["stages"]
+    regressions = []
+    print(f"\n📊 Comparison against {baseline_path} ({metric}, tolerance {tolerance:.0%})")
+    for stage, s in stages.items():
+        if stage not in baseline:
+            continue
+        before, after = baseline[stage][metric], s[metric]
+        change = (after - before) / before if before > 0 else 0.0
+        flag = "❌ REGRESSION" if change > tolerance else "✅"
+        print(f"  {stage:<28}{before:>10.3f} -> {after:>10.3f} ms ({change:+.1%}) {flag}")
+        if change > tolerance:
+            regressions.append(stage)
+    return regressions
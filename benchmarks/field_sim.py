@@ -0,0 +1,269 @@
+# benchmarks/field_sim.py
+"""
+Headless 2D field simulator for tuning the duration-based controller offline.
+
+    python benchmarks/field_sim.py --episodes 2000
+    python benchmarks/field_sim.py --sweep BALL_ANGLE_THRESHOLD=6,10,14 --sweep TRAP_DURATION=5,7
+    python benchmarks/field_sim.py --sweep FORWARD_RATE=5.0,5.8,6.5 --output benchmarks/results/sim.json
+
+Thousands of episodes run in lockstep: bot pose, differential-drive response
+to the timed commands, trap/kick and ball physics are NumPy arrays over all
+episodes. Whenever a bot has finished its sequence (plus settle time and
+vision latency) the real BotController.plan_movement2 decides its next steps
+from a noisy observation, with the socket stubbed and the trap timers on
+simulated time. Reports success rate and time-to-goal percentiles per
+parameter set.
+
+Sweepable names are Config attributes (BALL_ANGLE_THRESHOLD, GOAL_ANGLE_THRESHOLD,
+TRAP_DURATION, BALL_PROXIMITY_THRESHOLD, ...) plus LEFT_RATE / RIGHT_RATE
+(ms per degree), FORWARD_RATE (ms per pixel) for the controller's duration
+model and T_FORWARD (extra FTRAP ms).
+"""
+import sys
+import time
+import argparse
+import itertools
+import numpy as np
+
+from common import write_results
+from config import Config
+from bot_controller import BotController
+from motion_calibration import MotionCalibrator, DEFAULT_RATES
+
+DT = 0.01  # Simulation step (s)
+COURT = (140, 90, 1140, 630)  # Same court as the synthetic benchmark frames
+GOAL_CENTER = (1140, 360)
+GOAL_HALF_WIDTH = 90
+ACTIONS = ("WAIT", "LEFT", "RIGHT", "FORWARD", "FTRAP", "FKICK", "RELEASE", "TRAP")
+CODE = {name: i for i, name in enumerate(ACTIONS)}
+DRIVES = np.array([name in ("FORWARD", "FTRAP", "FKICK") for name in ACTIONS])
+TURNS = np.array([{"LEFT": -1, "RIGHT": 1}.get(name, 0) for name in ACTIONS], dtype=np.float64)
+
+# Controller knobs that are not Config attributes
+SIM_PARAMS = {"LEFT_RATE": DEFAULT_RATES["LEFT"], "RIGHT_RATE": DEFAULT_RATES["RIGHT"],
+              "FORWARD_RATE": DEFAULT_RATES["FORWARD"], "T_FORWARD": 60}
+
+
+class SimController(BotController):
+    """BotController decision logic without socket, scheduler or calibration file"""
+
+    def __init__(self, clock, calibrator):
+        self.trap_start_time = None
+        self.calibrator = calibrator
+        self.metric = False  # Simulated field is in pixels
+        self.forward_ms_per_unit = DEFAULT_RATES["FORWARD"]
+        self.batch_commands = True
+        self.scheduler = None
+        self.receive_thread = None
+        self.socket = None
+        self.clock = clock
+
+
+class FieldSimulator:
+    """Vectorized physics for ``episodes`` independent bot + ball + goal setups"""
+
+    def __init__(self, episodes, rates, seed=0, motor_noise=0.08, pose_noise=2.0, angle_noise=1.5,
+                 latency=0.1, max_time=60.0, ball_threshold=None, t_forward=60):
+        self.n = episodes
+        self.rng = np.random.default_rng(seed)
+        self.pose_noise = pose_noise
+        self.angle_noise = angle_noise
+        self.latency = latency
+        self.max_time = max_time
+        self.ball_threshold = Config.BALL_PROXIMITY_THRESHOLD if ball_threshold is None else ball_threshold
+        self.t_forward = t_forward
+        self.t = 0.0
+
+        x1, y1, x2, y2 = COURT
+        n, rng = episodes, self.rng
+        self.bot = np.column_stack((rng.uniform(x1 + 60, x2 - 200, n), rng.uniform(y1 + 60, y2 - 60, n)))
+        self.heading = rng.uniform(-180, 180, n)
+        self.ball = np.column_stack((rng.uniform(x1 + 60, x2 - 150, n), rng.uniform(y1 + 40, y2 - 40, n)))
+        self.ball_velocity = np.zeros((n, 2))
+        # True drive rates differ from the hand-tuned constants by a per-bot factor
+        self.left_rate = 180 / 965 * 1000 * rng.normal(1, motor_noise, n)  # deg/s
+        self.right_rate = 180 / 1110 * 1000 * rng.normal(1, motor_noise, n)
+        self.speed = 1000 / 5.8 * rng.normal(1, motor_noise, n)  # px/s
+        self.captured = np.zeros(n, dtype=bool)
+        self.trap_on = np.zeros(n, dtype=bool)
+        self.command = np.zeros(n, dtype=np.int64)
+        self.remaining = np.zeros(n)
+        self.next_decision = np.zeros(n)
+        self.done = np.zeros(n, dtype=bool)
+        self.goal_time = np.full(n, np.nan)
+        self.queues = [[] for _ in range(n)]
+        self.decisions = np.zeros(n, dtype=np.int64)
+        self.controllers = [SimController(self.now, MotionCalibrator(rates=rates)) for _ in range(n)]
+
+    def now(self):
+        return self.t
+
+    def _observe(self, i):
+        """Rounded, noisy vision output for episode i: ball box, bot front center, bot angle"""
+        noise = self.rng.normal(0, self.pose_noise, 4)
+        bx, by = self.ball[i] + noise[:2]
+        cx, cy = self.bot[i] + noise[2:]
+        angle = (self.heading[i] + self.rng.normal(0, self.angle_noise) + 180) % 360 - 180
+        return (int(bx - 12), int(by - 12), int(bx + 12), int(by + 12)), (round(cx), round(cy)), angle
+
+    def _decide(self, idle):
+        for i in idle:
+            target_ball, bot_center, angle = self._observe(i)
+            steps = self.controllers[i].plan_movement2(target_ball, bot_center, GOAL_CENTER, angle,
+                                                       self.ball_threshold, self.t_forward)
+            self.decisions[i] += 1
+            self.queues[i] = [(CODE[command], duration / 1000) for command, duration in steps]
+            self._start_next(i)
+
+    def _start_next(self, i):
+        if not self.queues[i]:
+            self.command[i] = CODE["WAIT"]
+            # Settle after the done ack, then wait for a fresh frame
+            self.next_decision[i] = self.t + Config.BATCH_SETTLE_TIME + self.latency
+            return
+        code, seconds = self.queues[i].pop(0)
+        self.command[i], self.remaining[i] = code, seconds
+        name = ACTIONS[code]
+        if name in ("TRAP", "FTRAP"):
+            self.trap_on[i] = True
+        elif name == "RELEASE":
+            self.trap_on[i] = self.captured[i] = False
+        elif name == "FKICK":
+            self._kick(i)
+
+    def _kick(self, i):
+        heading = np.radians(self.heading[i])
+        direction = np.array([np.cos(heading), np.sin(heading)])
+        offset = self.ball[i] - self.bot[i]
+        lateral = abs(direction[0] * offset[1] - direction[1] * offset[0])
+        if self.captured[i] or (0 < offset @ direction < 40 and lateral < 25):
+            self.ball_velocity[i] = direction * 900  # px/s off the kicker
+            self.captured[i] = self.trap_on[i] = False
+
+    def step(self):
+        active = ~self.done
+        running = active & (self.remaining > 0)
+        code = self.command
+
+        # Differential drive: rotate in place or drive along the heading
+        turn = TURNS[code] * np.where(TURNS[code] < 0, self.left_rate, self.right_rate)
+        self.heading = np.where(running, (self.heading + turn * DT + 180) % 360 - 180, self.heading)
+        heading = np.radians(self.heading)
+        direction = np.column_stack((np.cos(heading), np.sin(heading)))
+        driving = running & DRIVES[code]
+        self.bot += direction * (self.speed * DT * driving)[:, None]
+        x1, y1, x2, y2 = COURT
+        np.clip(self.bot[:, 0], x1, x2, out=self.bot[:, 0])
+        np.clip(self.bot[:, 1], y1, y2, out=self.bot[:, 1])
+
+        # Ball: carried when captured, pushed when driven into, otherwise rolling with friction
+        offset = self.ball - self.bot
+        ahead = np.einsum("ij,ij->i", offset, direction)
+        lateral = np.abs(offset[:, 0] * direction[:, 1] - offset[:, 1] * direction[:, 0])
+        in_front = (ahead > -5) & (ahead < 30) & (lateral < 20)
+        self.captured |= active & self.trap_on & in_front
+        pushed = driving & ~self.captured & in_front
+        self.ball_velocity[pushed] = direction[pushed] * (self.speed[pushed] * 1.2)[:, None]
+        self.ball += self.ball_velocity * DT
+        self.ball_velocity *= np.exp(-1.5 * DT)
+        self.ball[self.captured] = self.bot[self.captured] + direction[self.captured] * 14
+        self.ball_velocity[self.captured] = 0
+
+        scored = active & (self.ball[:, 0] >= x2) & (np.abs(self.ball[:, 1] - GOAL_CENTER[1]) < GOAL_HALF_WIDTH)
+        self.goal_time[scored] = self.t
+        self.done |= scored
+        for axis, low, high in ((0, x1, x2), (1, y1, y2)):
+            out = (self.ball[:, axis] < low) | (self.ball[:, axis] > high)
+            self.ball_velocity[out, axis] *= -0.6
+            np.clip(self.ball[:, axis], low, high, out=self.ball[:, axis])
+
+        self.remaining -= DT
+        self.t += DT
+        finished = np.flatnonzero(running & (self.remaining <= 0))
+        for i in finished:
+            self._start_next(i)
+        idle = np.flatnonzero(active & ~scored & (self.remaining <= 0) & (self.command == CODE["WAIT"])
+                              & (self.next_decision <= self.t))
+        if len(idle):
+            self._decide(idle)
+
+    def run(self):
+        self._decide(np.arange(self.n))
+        while self.t < self.max_time and not self.done.all():
+            self.step()
+        return self.goal_time
+
+
+def summarize_episodes(goal_time, decisions, max_time):
+    scored = goal_time[~np.isnan(goal_time)]
+    result = {"episodes": int(len(goal_time)), "success_rate": float(len(scored) / len(goal_time)),
+              "decisions_mean": float(decisions.mean())}
+    for p in (10, 50, 90):
+        result[f"p{p}_s"] = float(np.percentile(scored, p)) if len(scored) else max_time
+    result["mean_s"] = float(scored.mean()) if len(scored) else max_time
+    return result
+
+
+def run_parameter_set(params, args):
+    """Apply one parameter set, simulate args.episodes episodes and restore Config"""
+    sim_params = {**SIM_PARAMS, **{k: v for k, v in params.items() if k in SIM_PARAMS}}
+    saved = {k: getattr(Config, k) for k in params if k not in SIM_PARAMS}
+    for k in saved:
+        setattr(Config, k, params[k])
+    try:
+        rates = {"LEFT": sim_params["LEFT_RATE"], "RIGHT": sim_params["RIGHT_RATE"],
+                 "FORWARD": sim_params["FORWARD_RATE"]}
+        sim = FieldSimulator(args.episodes, rates, args.seed, args.motor_noise, args.pose_noise,
+                             args.angle_noise, args.latency, args.max_time, t_forward=sim_params["T_FORWARD"])
+        start = time.perf_counter()
+        goal_time = sim.run()
+        result = summarize_episodes(goal_time, sim.decisions, args.max_time)
+        result["wall_s"] = time.perf_counter() - start
+        return result
+    finally:
+        for k, v in saved.items():
+            setattr(Config, k, v)
+
+
+def parse_sweeps(sweeps):
+    """['NAME=a,b', ...] -> list of {NAME: value} parameter sets (cartesian product)"""
+    axes = []
+    for sweep in sweeps:
+        name, _, values = sweep.partition("=")
+        if name not in SIM_PARAMS and not hasattr(Config, name):
+            raise SystemExit(f"❌ Unknown parameter '{name}'")
+        axes.append([(name, float(v) if "." in v else int(v)) for v in values.split(",")])
+    return [dict(combo) for combo in itertools.product(*axes)] or [{}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--sweep", action="append", default=[], help="NAME=v1,v2,... (repeat for a grid)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-time", type=float, default=60.0, help="Simulated seconds before an episode fails")
+    parser.add_argument("--motor-noise", type=float, default=0.08, help="Spread of the true drive rates")
+    parser.add_argument("--pose-noise", type=float, default=2.0, help="Marker/ball position noise (px)")
+    parser.add_argument("--angle-noise", type=float, default=1.5, help="Marker heading noise (deg)")
+    parser.add_argument("--latency", type=float, default=0.1, help="Vision latency before each decision (s)")
+    parser.add_argument("--output", default=None, help="Write machine-readable JSON results here")
+    args = parser.parse_args()
+
+    parameter_sets = parse_sweeps(args.sweep)
+    print(f"🧪 Simulating {args.episodes} episodes for {len(parameter_sets)} parameter set(s)...")
+    print(f"\n{'parameters':<44}{'success':>9}{'p10':>8}{'p50':>8}{'p90':>8}{'mean':>8}{'moves':>8}{'wall':>8}")
+    results = {}
+    for params in parameter_sets:
+        label = " ".join(f"{k}={v}" for k, v in params.items()) or "defaults"
+        r = run_parameter_set(params, args)
+        results[label] = {**r, "params": params}
+        print(f"{label:<44}{r['success_rate']:>9.1%}{r['p10_s']:>8.1f}{r['p50_s']:>8.1f}{r['p90_s']:>8.1f}"
+              f"{r['mean_s']:>8.1f}{r['decisions_mean']:>8.1f}{r['wall_s']:>7.1f}s")
+        sys.stdout.flush()
+
+    if args.output:
+        write_results(args.output, "field_sim", results, vars(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/synthetic.py
+import cv2
+import numpy as np
+
+WIDTH, HEIGHT = 1280, 720
+
+
+def _marker_image(marker_id, size):
+    aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_5X5_1000)
+    if hasattr(cv2.aruco, "generateImageMarker"):
+        return cv2.aruco.generateImageMarker(aruco_dict, marker_id, size)
+    return cv2.aruco.drawMarker(aruco_dict, marker_id, size)
+
+
+class SyntheticScene:
+    """Renders frames with a court, balls and rotated ArUco markers, plus the matching ground-truth boxes.
+
+    Boxes use the BallDetector layout (x1, y1, x2, y2, conf, class_id) with
+    class 0 for the court and class 1 for balls, so they can feed
+    find_closest_ball and draw_ball_boxes directly.
+    """
+
+    def __init__(self, bot_marker_id=600, goal_marker_id=360, n_balls=8, marker_size=70, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.n_balls = n_balls
+        self.marker_size = marker_size
+        self.court = (140, 90, 1140, 630)
+        self.markers = {bot_marker_id: self._bordered(_marker_image(bot_marker_id, marker_size)),
+                        goal_marker_id: self._bordered(_marker_image(goal_marker_id, marker_size))}
+        self.bot_marker_id = bot_marker_id
+        self.goal_marker_id = goal_marker_id
+        self.goal_center = (1080, 360)
+        self.background = np.full((HEIGHT, WIDTH, 3), (60, 60, 60), dtype=np.uint8)
+        x1, y1, x2, y2 = self.court
+        cv2.rectangle(self.background, (x1, y1), (x2, y2), (40, 140, 40), -1)
+        cv2.rectangle(self.background, (x1, y1), (x2, y2), (255, 255, 255), 3)
+
+    @staticmethod
+    def _bordered(marker):
+        border = marker.shape[0] // 5
+        return cv2.copyMakeBorder(marker, border, border, border, border, cv2.BORDER_CONSTANT, value=255)
+
+    def _paste_marker(self, frame, marker_id, center, angle):
+        patch = self.markers[marker_id]
+        size = patch.shape[0]
+        rotation = cv2.getRotationMatrix2D((size / 2, size / 2), angle, 1.0)
+        side = int(np.ceil(size * 1.5))
+        rotation[:, 2] += (side - size) / 2
+        rotated = cv2.warpAffine(patch, rotation, (side, side), borderValue=0)
+        mask = cv2.warpAffine(np.full_like(patch, 255), rotation, (side, side), borderValue=0) > 0
+        x0, y0 = int(center[0] - side / 2), int(center[1] - side / 2)
+        region = frame[y0:y0 + side, x0:x0 + side]
+        region[mask] = rotated[mask][:, None]
+
+    def render(self):
+        """(frame, boxes, bot_center, bot_angle) for a fresh random scene"""
+        frame = self.background.copy()
+        x1, y1, x2, y2 = self.court
+        boxes = [(x1, y1, x2, y2, 0.95, 0)]
+
+        centers = self.rng.uniform((x1 + 30, y1 + 30), (x2 - 30, y2 - 30), size=(self.n_balls, 2))
+        radius = 12
+        for cx, cy in centers:
+            cv2.circle(frame, (int(cx), int(cy)), radius, (0, 140, 255), -1)
+            boxes.append((cx - radius, cy - radius, cx + radius, cy + radius,
+                          float(self.rng.uniform(0.5, 0.95)), 1))
+
+        bot_center = self.rng.uniform((x1 + 120, y1 + 120), (x2 - 200, y2 - 120))
+        bot_angle = float(self.rng.uniform(-180, 180))
+        self._paste_marker(frame, self.bot_marker_id, bot_center, bot_angle)
+        self._paste_marker(frame, self.goal_marker_id, self.goal_center, 0)
+        return frame, np.array(boxes, dtype=np.float32), (int(bot_center[0]), int(bot_center[1])), bot_angle
+
+    def frames(self, count):
+        return [self.render() for _ in range(count)]
@@ -1,28 +1,37 @@
+import os
 import time
-import requests
 import numpy as np
 import socket
 import threading
 from queue import Queue
+from collections import deque
 from config import Config
 from marker_detection import MarkerDetector
+from command_scheduler import CommandScheduler
+from pid_controller import PID
+from motion_calibration import MotionCalibrator
+from telemetry import telemetry
 
 # def calculate_duration_for_rotation(angle_to_rotate):
 #     return abs(int((2000/180)*angle_to_rotate))  # value is in milliseconds
 
-def calculate_duration_for_rotation_left(angle_to_rotate):
+def calculate_duration_for_rotation_left(angle_to_rotate, calibrator=None):
+    if calibrator is not None:
+        return calibrator.duration_for("LEFT", angle_to_rotate)
     return abs(int((965/180)*angle_to_rotate))  # value is in milliseconds
 
-def calculate_duration_for_rotation_right(angle_to_rotate):
+def calculate_duration_for_rotation_right(angle_to_rotate, calibrator=None):
+    if calibrator is not None:
+        return calibrator.duration_for("RIGHT", angle_to_rotate)
     return abs(int((1110/180)*angle_to_rotate))  # value is in milliseconds
 
-def calculate_duration_for_forward(distance):
-    duration = int(5.8*distance)
+def calculate_duration_for_forward(distance, calibrator=None, ms_per_unit=5.8):
+    duration = calibrator.duration_for("FORWARD", distance) if calibrator is not None else int(ms_per_unit*distance)
     return   duration if duration < 3000 else 3000# value is in milliseconds
 
 
 class BotController:
-    def __init__(self, nodemcu_ip, port=8080):
+    def __init__(self, nodemcu_ip, port=8080, calibration_file=Config.CALIBRATION_FILE, metric=False):
         self.nodemcu_ip = nodemcu_ip
         self.port = port
         self.socket = None
@@ -37,6 +46,41 @@ class BotController:
         self.response_queue = Queue()
         self.receive_thread = None
         self.running = False
+
+        # Batched sequences: one 'B<seq>|CMD:ms|CMD:ms' packet per decision, acked by the firmware
+        self.batch_commands = Config.BATCH_COMMANDS
+        self.sequence_id = 0
+        self.pending_sequences = {}
+        self.rtt_samples = deque(maxlen=100)  # Seconds from packet write to the firmware's receipt ack
+        self.receive_buffer = ""
+
+        # Timed commands go through a sender thread instead of sleeping in the caller
+        self.scheduler = CommandScheduler(self._dispatch, Config.COMMAND_SETTLE_TIME, Config.ACK_TIMEOUT) \
+            if Config.ASYNC_COMMANDS else None
+        self.preempt_next = False
+
+        # Closed-loop mode: PID setpoints streamed as 'VEL:<speed>:<turn>:<watchdog_ms>'
+        self.turn_pid = PID(*Config.TURN_PID, output_limit=Config.MAX_TURN_RATE,
+                            min_output=Config.MIN_MOTOR_OUTPUT, tolerance=Config.VELOCITY_ANGLE_TOLERANCE)
+        self.distance_pid = PID(*Config.DISTANCE_PID, output_limit=Config.MAX_SPEED,
+                                min_output=Config.MIN_MOTOR_OUTPUT)
+        self.last_velocity = (0, 0)
+        self.last_velocity_sent = 0.0
+
+        # Distances arrive in field cm instead of pixels when a field calibration is loaded
+        self.metric = metric
+        self.forward_ms_per_unit = Config.FORWARD_MS_PER_CM if metric else 5.8
+        if metric:
+            root, ext = os.path.splitext(calibration_file)
+            calibration_file = f"{root}_cm{ext}"  # Pixel and cm fits are not interchangeable
+
+        # Duration models refitted from the pose change each single timed move produces
+        self.calibrator = MotionCalibrator(calibration_file, Config.CALIBRATION_PRIOR_WEIGHT,
+                                           Config.CALIBRATION_FORGETTING, Config.CALIBRATION_MAX_DELAY,
+                                           rates={"FORWARD": self.forward_ms_per_unit}) \
+            if Config.AUTO_CALIBRATION else None
+        self.first_command_at = None  # time.perf_counter() of the first command written to the socket
+        self.clock = time.time  # Wall clock for the trap timers; the field simulator swaps in simulated time
         
         # Initial connection
         self.connect()
@@ -49,10 +93,16 @@ class BotController:
                 continue
                 
             try:
-                data = self.socket.recv(1024).decode().strip()
-                if data:
-                    print(f"Received response: {data}")
-                    self.response_queue.put(data)
+                self._expire_sequences()
+                data = self.socket.recv(1024).decode()
+                if not data:
+                    continue
+                self.receive_buffer += data
+                while "\n" in self.receive_buffer:
+                    line, self.receive_buffer = self.receive_buffer.split("\n", 1)
+                    line = line.strip()
+                    if line:
+                        self._handle_response(line)
             except socket.timeout:
                 continue
             except Exception as e:
@@ -60,6 +110,34 @@ class BotController:
                 self.connected = False
                 break
 
+    def _handle_response(self, line):
+        """Sequence acks: 'R<seq>' received, 'A<seq>:<step>' step done, 'D<seq>' sequence done"""
+        kind, body = line[0], line[1:]
+        seq, _, step = body.partition(":")
+        if kind in "RAD" and seq.isdigit():
+            pending = self.pending_sequences.get(int(seq))
+            if pending is None:
+                return  # Late ack of a sequence that was replaced or timed out
+            if kind == "R":
+                rtt = time.perf_counter() - pending["sent"]
+                self.rtt_samples.append(rtt)
+                telemetry.event("rtt", seq=int(seq), rtt_ms=rtt * 1000)
+            elif kind == "A" and step.isdigit():
+                pending["acked"] = int(step) + 1
+            elif kind == "D":
+                self.pending_sequences.pop(int(seq), None)
+                pending["done"].set()
+            return
+        telemetry.event("response", "Received response: {line}", line=line)
+        self.response_queue.put(line)
+
+    def round_trip_stats(self):
+        """(last, mean, max) round-trip time in milliseconds over the recent packets, or None"""
+        if not self.rtt_samples:
+            return None
+        samples = list(self.rtt_samples)
+        return samples[-1] * 1000, sum(samples) / len(samples) * 1000, max(samples) * 1000
+
     def connect(self):
         """Establish socket connection with reconnection logic"""
         attempt = 0
@@ -73,6 +151,7 @@ class BotController:
                 
                 self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 self.socket.settimeout(1)  # 1 second timeout
+                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Small per-frame setpoints go out at once
                 self.socket.connect((self.nodemcu_ip, self.port))
                 self.connected = True
                 print(f"Successfully connected to NodeMCU at {self.nodemcu_ip}:{self.port}")
@@ -97,28 +176,192 @@ class BotController:
         self.connected = False
         return False
 
-    def send_command(self, command, duration=1000):
-        """Send command to NodeMCU with rate limiting"""
+    def _write_line(self, line, log=True):
+        """Write one protocol line to the socket, reconnecting first if needed"""
         if not self.connected:
             if self.receive_thread and self.receive_thread.is_alive():
                 self.receive_thread.join(timeout=1)
             self.connect()
 
         try:
-            full_command = f"{command}:{duration}\n" if duration else f"{command}\n"
-            print(f"\n#### --{full_command} #####\n")
-            self.socket.send(full_command.encode())
-            time.sleep(duration/1000)
-            time.sleep(0.4)
-            return True                
+            if log:
+                telemetry.event("command", "#### --{line} #####", line=line.rstrip())
+            self.socket.send(line.encode())
+            telemetry.count("commands")
+            if self.first_command_at is None:
+                self.first_command_at = time.perf_counter()
+            return True
         except Exception as e:
             print(f"Send error: {e}")
             self.connected = False
             return False
 
+    def _drop_sequences(self, expired_only=False):
+        """Forget sequences the firmware will never finish: it replaces the running one on every line it
+        receives, and one that stays unacked past its expected duration plus ACK_TIMEOUT is lost"""
+        now = time.perf_counter()
+        for seq, pending in list(self.pending_sequences.items()):
+            if not expired_only or now > pending["deadline"]:
+                self.pending_sequences.pop(seq, None)
+                pending["done"].set()  # Nothing more will come for it
+
+    def _expire_sequences(self):
+        if self.pending_sequences:
+            self._drop_sequences(expired_only=True)
+
+    def _write_command(self, command, duration):
+        """Write a single command line to the socket without waiting for it to finish"""
+        self._drop_sequences()
+        return self._write_line(f"{command}:{duration}\n" if duration else f"{command}\n")
+
+    def _write_sequence(self, steps):
+        """Write a batched sequence packet; returns the Event set by the firmware's done ack, or None"""
+        self.sequence_id += 1
+        seq = self.sequence_id
+        done = threading.Event()
+        self._drop_sequences()
+        sent = time.perf_counter()
+        deadline = sent + self.sequence_duration(steps) / 1000 + Config.ACK_TIMEOUT
+        self.pending_sequences[seq] = {"sent": sent, "deadline": deadline, "done": done, "acked": 0}
+        packet = f"B{seq}|" + "|".join(f"{command}:{int(duration)}" for command, duration in steps) + "\n"
+        if not self._write_line(packet):
+            self.pending_sequences.pop(seq, None)
+            return None
+        return done
+
+    def _dispatch(self, command, duration):
+        """Scheduler send function: tuples of steps go out as one acked packet"""
+        if isinstance(command, tuple):
+            return self._write_sequence(command)
+        return self._write_command(command, duration)
+
+    def send_command(self, command, duration=1000, preempt=False):
+        """Send command to NodeMCU; queued on the scheduler when async commands are enabled"""
+        if self.scheduler is not None:
+            if self.preempt_next:
+                # First command of a decision made while the bot was still moving
+                self.preempt_next = False
+                if command == self.scheduler.current_command:
+                    return True  # Already executing it, let it run
+                preempt = True
+            self.scheduler.submit(command, duration, preempt=preempt)
+            return True
+
+        if not self._write_command(command, duration):
+            return False
+        time.sleep(duration/1000)
+        time.sleep(Config.COMMAND_SETTLE_TIME)
+        return True
+
+    @staticmethod
+    def sequence_duration(steps):
+        """Expected run time of a step list in milliseconds"""
+        return sum(duration for _, duration in steps)
+
+    def send_sequence(self, steps, preempt=False):
+        """Send a list of (command, duration_ms) steps as one packet and wait for the done ack"""
+        steps = tuple((command, int(duration)) for command, duration in steps)
+        duration = self.sequence_duration(steps)
+        if self.scheduler is not None:
+            if self.preempt_next:
+                self.preempt_next = False
+                if steps[0][0] == self.scheduler.current_command:
+                    return True  # Already executing it, let it run
+                preempt = True
+            self.scheduler.submit(steps, duration, Config.BATCH_SETTLE_TIME, preempt=preempt)
+            return True
+
+        done = self._write_sequence(steps)
+        if done is None:
+            return False
+        done.wait(duration / 1000 + Config.ACK_TIMEOUT)
+        time.sleep(Config.BATCH_SETTLE_TIME)
+        return True
+
+    def execute_steps(self, steps):
+        """Run a planned step list, batched into one packet when the firmware supports it"""
+        if not steps:
+            return
+        if self.batch_commands:
+            self.send_sequence(steps)
+            return
+        for command, duration in steps:
+            if command == "WAIT":
+                self.pause(duration / 1000)
+            else:
+                self.send_command(command, duration)
+
+    def estimate_steps_time(self, steps):
+        """Seconds a step list will take to run, including settle times"""
+        if self.batch_commands:
+            return self.sequence_duration(steps) / 1000 + Config.BATCH_SETTLE_TIME
+        commands = sum(1 for command, _ in steps if command != "WAIT")
+        return self.sequence_duration(steps) / 1000 + commands * Config.COMMAND_SETTLE_TIME
+
+    def send_velocity(self, speed, turn):
+        """Stream a speed/turn-rate setpoint (% PWM, turn > 0 is right); unchanged ones only as keepalive"""
+        setpoint = (int(round(speed)), int(round(turn)))
+        now = time.monotonic()
+        if setpoint == self.last_velocity and now - self.last_velocity_sent < Config.VELOCITY_KEEPALIVE:
+            return True
+        self.last_velocity = setpoint
+        self.last_velocity_sent = now
+        telemetry.event("velocity", speed=setpoint[0], turn=setpoint[1])
+        self._drop_sequences()
+        return self._write_line(f"VEL:{setpoint[0]}:{setpoint[1]}:{Config.VELOCITY_WATCHDOG_MS}\n", log=False)
+
+    def stop_velocity(self):
+        """Zero the streamed setpoint and forget the PID state"""
+        self.turn_pid.reset()
+        self.distance_pid.reset()
+        if self.last_velocity != (0, 0):
+            self.send_velocity(0, 0)
+
+    def pause(self, seconds):
+        """Idle gap between two commands (queued in async mode)"""
+        if self.scheduler is not None:
+            self.scheduler.pause(seconds)
+        else:
+            time.sleep(seconds)
+
+    def is_busy(self):
+        """True while the bot is still executing previously sent commands"""
+        return self.scheduler is not None and self.scheduler.is_busy()
+
+    def is_moving(self):
+        """True while commands are running or a non-zero velocity setpoint is being streamed"""
+        return self.is_busy() or self.last_velocity != (0, 0)
+
+    def time_remaining(self):
+        """Seconds until the queued commands finish (0 in blocking mode)"""
+        return self.scheduler.time_remaining() if self.scheduler is not None else 0.0
+
+    @property
+    def busy_until(self):
+        """time.monotonic() deadline of the last queued command"""
+        return self.scheduler.busy_until if self.scheduler is not None else 0.0
+
+    def cancel_commands(self):
+        """Drop queued commands and stop waiting on the running one"""
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+
+    def save_calibration(self):
+        """Persist the fitted motion models and print them"""
+        if self.calibrator is not None and self.calibrator.path:
+            self.calibrator.save()
+            print(self.calibrator.report())
+
+    def stop(self):
+        """Preempt everything and send STOP immediately"""
+        self.cancel_commands()
+        return self._write_command("STOP", 1000)
+
     def __del__(self):
         """Cleanup on destruction"""
         self.running = False
+        if getattr(self, "scheduler", None) is not None:
+            self.scheduler.stop()
         if self.receive_thread and self.receive_thread.is_alive():
             self.receive_thread.join(timeout=1)
         if self.socket:
@@ -228,8 +471,32 @@ class BotController:
 
 
     def control_movement2(self, target_ball, bot_center, goal_post_center, bot_orientation_angle, ball_proximity_threshold, t_forward):
-        ball_center = (round((target_ball[0] + target_ball[2]) / 2),
-                       round((target_ball[1] + target_ball[3]) / 2))
+        if self.is_busy():
+            if not Config.PREEMPT_COMMANDS:
+                return  # Bot is still executing the previous decision
+            self.preempt_next = True
+            if self.calibrator is not None:
+                self.calibrator.discard()  # The running move gets cut short
+        elif self.calibrator is not None:
+            self.calibrator.finish(bot_center, bot_orientation_angle)
+
+        steps = self.plan_movement2(target_ball, bot_center, goal_post_center, bot_orientation_angle,
+                                    ball_proximity_threshold, t_forward)
+        if self.calibrator is not None and len(steps) == 1:
+            command, duration = steps[0]
+            expected_end = time.monotonic() + self.time_remaining() + self.estimate_steps_time(steps)
+            self.calibrator.begin(command, duration, bot_center, bot_orientation_angle, expected_end)
+        self.execute_steps(steps)
+
+    def ball_center(self, target_ball):
+        """Center of the ball box: whole pixels, or fractional field cm in metric mode"""
+        x, y = (target_ball[0] + target_ball[2]) / 2, (target_ball[1] + target_ball[3]) / 2
+        return (float(x), float(y)) if self.metric else (round(x), round(y))
+
+    def plan_movement2(self, target_ball, bot_center, goal_post_center, bot_orientation_angle, ball_proximity_threshold, t_forward):
+        """Decide the next moves as (command, duration_ms) steps; ("WAIT", ms) is a pause"""
+        steps = []
+        ball_center = self.ball_center(target_ball)
 
         ball_vector = (ball_center[0] - bot_center[0],
                        ball_center[1] - bot_center[1])
@@ -249,27 +516,29 @@ class BotController:
 
         if self.trap_start_time is None :
             if relative_ball_angle - 1.5 < -Config.BALL_ANGLE_THRESHOLD:
-                duration = calculate_duration_for_rotation_left(relative_ball_angle)
-                print(f"\nAligning: LEFT ➔ Adjusting bot towards the ball 👾 -->️ ⚽️ Angle: {relative_ball_angle} for {duration} milliseconds \n")
-                self.send_command("LEFT",duration)
+                duration = calculate_duration_for_rotation_left(relative_ball_angle, self.calibrator)
+                telemetry.event("decision", "Aligning: LEFT ➔ Adjusting bot towards the ball 👾 -->️ ⚽️ Angle: {angle} for {duration} milliseconds",
+                                action="LEFT", target="ball", angle=relative_ball_angle, duration=duration)
+                steps.append(("LEFT", duration))
     
             elif relative_ball_angle + 2 > Config.BALL_ANGLE_THRESHOLD:
 
-                duration = calculate_duration_for_rotation_right(relative_ball_angle)
-                print(f"\nAligning: RIGHT ➔ Aligning bot towards the ball 👾 -->️ ⚽️ Angle: {relative_ball_angle} for {duration} milliseconds \n")
-                self.send_command("RIGHT", duration)                  
+                duration = calculate_duration_for_rotation_right(relative_ball_angle, self.calibrator)
+                telemetry.event("decision", "Aligning: RIGHT ➔ Aligning bot towards the ball 👾 -->️ ⚽️ Angle: {angle} for {duration} milliseconds",
+                                action="RIGHT", target="ball", angle=relative_ball_angle, duration=duration)
+                steps.append(("RIGHT", duration))                  
             else:
                 if distance_to_ball > ball_proximity_threshold:
-                    print(f"\nbot Status: Far from the ball ({distance_to_ball:.2f} units) ➔ Moving towards the ball.\n")
-                    duration = calculate_duration_for_forward(distance_to_ball)
-                    self.send_command("FORWARD", duration)
-                    print("Action: **FORWARD** ➔ Approaching the ball\n")
+                    duration = calculate_duration_for_forward(distance_to_ball, self.calibrator, self.forward_ms_per_unit)
+                    steps.append(("FORWARD", duration))
+                    telemetry.event("decision", "Action: **FORWARD** ➔ Approaching the ball ({distance:.2f} units away) for {duration} milliseconds",
+                                    action="FORWARD", distance=distance_to_ball, duration=duration)
                 else:
-                    print(f"\nStatus: Bot is near the ball ({distance_to_ball:.2f} units) \n")
-                    print("**Action:** TRAP ➔ Holding the ball in position\n")
-                    duration = calculate_duration_for_forward(distance_to_ball)
-                    self.send_command("FTRAP", duration + t_forward) #Trap the ball in position
-                    self.trap_start_time = time.time()
+                    duration = calculate_duration_for_forward(distance_to_ball, self.calibrator, self.forward_ms_per_unit)
+                    steps.append(("FTRAP", duration + t_forward)) #Trap the ball in position
+                    telemetry.event("decision", "**Action:** TRAP ➔ Holding the ball in position ({distance:.2f} units away)",
+                                    action="FTRAP", distance=distance_to_ball, duration=duration + t_forward)
+                    self.trap_start_time = self.clock() + self.time_remaining() + self.estimate_steps_time(steps)
                         # Move backwards after trapping the ball to avoid issues caused by the ball being near the edges.
 
         else:
@@ -277,30 +546,82 @@ class BotController:
             goal_orientation_angle = MarkerDetector.calculate_angle(bot_center, goal_post_center)
             relative_goal_post_angle = goal_orientation_angle - bot_orientation_angle
             relative_goal_post_angle = (relative_goal_post_angle + 180) % 360 - 180  # Normalize angle
-            trap_duration = time.time() - self.trap_start_time
+            trap_duration = self.clock() - self.trap_start_time
             if trap_duration > Config.TRAP_DURATION:  # Check if the duration exceeds maximum trap duration
-                print("**Action:** RELEASE ➔ Holding time exceeded, releasing the ball briefly.\n")
-                self.send_command("RELEASE", 500)
-                time.sleep(Config.RELEASE_DURATION)  # Release ball for 1 second
-                self.send_command("TRAP", 500)
-                self.trap_start_time = time.time()  # Reset trap start time
+                telemetry.event("decision", "**Action:** RELEASE ➔ Holding time exceeded, releasing the ball briefly.",
+                                action="RELEASE", held=trap_duration)
+                steps.append(("RELEASE", 500))
+                steps.append(("WAIT", int(Config.RELEASE_DURATION * 1000)))  # Release ball for 1 second
+                steps.append(("TRAP", 500))
+                self.trap_start_time = self.clock() + self.time_remaining() + self.estimate_steps_time(steps)  # Reset trap start time
 
             if relative_goal_post_angle < -Config.GOAL_ANGLE_THRESHOLD:
-                duration = calculate_duration_for_rotation_left(relative_goal_post_angle)
-                print(
-                    f"**Action:** LEFT ➔ Adjusting towards goal post alignment ⭕️ Angle: {relative_goal_post_angle} for {duration} milliseconds \n")
-                self.send_command("LEFT", duration)
+                duration = calculate_duration_for_rotation_left(relative_goal_post_angle, self.calibrator)
+                telemetry.event("decision", "**Action:** LEFT ➔ Adjusting towards goal post alignment ⭕️ Angle: {angle} for {duration} milliseconds",
+                                action="LEFT", target="goal", angle=relative_goal_post_angle, duration=duration)
+                steps.append(("LEFT", duration))
 
             elif relative_goal_post_angle > Config.GOAL_ANGLE_THRESHOLD:
-                duration = calculate_duration_for_rotation_right(relative_goal_post_angle)
-                print(
-                    f"**Action:** RIGHT ➔ Adjusting towards goal post alignment ⭕️ Angle: {relative_goal_post_angle} for {duration} milliseconds\n")
-                self.send_command("RIGHT", duration)
+                duration = calculate_duration_for_rotation_right(relative_goal_post_angle, self.calibrator)
+                telemetry.event("decision", "**Action:** RIGHT ➔ Adjusting towards goal post alignment ⭕️ Angle: {angle} for {duration} milliseconds",
+                                action="RIGHT", target="goal", angle=relative_goal_post_angle, duration=duration)
+                steps.append(("RIGHT", duration))
             else:
-                self.send_command("RELEASE", 500)
-                print(f"**Action:** KICK ➔ Goal post within range! Taking the shot! ⚽️ {relative_goal_post_angle}\n")
-                self.send_command("FKICK", 700)
+                steps.append(("RELEASE", 500))
+                telemetry.event("decision", "**Action:** KICK ➔ Goal post within range! Taking the shot! ⚽️ {angle}",
+                                action="FKICK", angle=relative_goal_post_angle)
+                steps.append(("FKICK", 700))
                 self.trap_start_time = None
+        return steps
+
+    def control_velocity(self, target_ball, bot_center, goal_post_center, bot_orientation_angle, ball_proximity_threshold, t_forward):
+        """Closed-loop alternative to control_movement2: one PID setpoint per frame, discrete steps only to trap and kick"""
+        if self.is_busy():
+            return  # FTRAP / RELEASE / KICK sequence still running
+
+        ball_center = self.ball_center(target_ball)
+        distance_to_ball = np.hypot(ball_center[0] - bot_center[0], ball_center[1] - bot_center[1])
+        relative_ball_angle = MarkerDetector.calculate_angle(bot_center, ball_center) - bot_orientation_angle
+        relative_ball_angle = (relative_ball_angle + 180) % 360 - 180  # Normalize angle
+        now = time.monotonic()
+
+        if self.trap_start_time is None:
+            if distance_to_ball > ball_proximity_threshold or abs(relative_ball_angle) > Config.BALL_ANGLE_THRESHOLD:
+                turn = self.turn_pid.update(relative_ball_angle, now)
+                # Drive forward only once roughly facing the ball
+                heading_scale = max(0.0, 1 - abs(relative_ball_angle) / Config.ALIGN_SLOWDOWN_ANGLE)
+                speed = self.distance_pid.update(max(0.0, distance_to_ball - ball_proximity_threshold), now)
+                self.send_velocity(max(0.0, speed) * heading_scale, turn)  # Never back away from the ball
+                return
+
+            telemetry.event("decision", "**Action:** TRAP ➔ Holding the ball in position ({distance:.2f} units away)",
+                            action="FTRAP", distance=distance_to_ball)
+            self.stop_velocity()
+            steps = [("FTRAP", calculate_duration_for_forward(distance_to_ball, self.calibrator, self.forward_ms_per_unit) + t_forward)]
+            self.trap_start_time = self.clock() + self.time_remaining() + self.estimate_steps_time(steps)
+            self.execute_steps(steps)
+            return
+
+        relative_goal_post_angle = MarkerDetector.calculate_angle(bot_center, goal_post_center) - bot_orientation_angle
+        relative_goal_post_angle = (relative_goal_post_angle + 180) % 360 - 180  # Normalize angle
+        if self.clock() - self.trap_start_time > Config.TRAP_DURATION:
+            telemetry.event("decision", "**Action:** RELEASE ➔ Holding time exceeded, releasing the ball briefly.",
+                            action="RELEASE")
+            self.stop_velocity()
+            steps = [("RELEASE", 500), ("WAIT", int(Config.RELEASE_DURATION * 1000)), ("TRAP", 500)]
+            self.trap_start_time = self.clock() + self.time_remaining() + self.estimate_steps_time(steps)
+            self.execute_steps(steps)
+            return
+
+        if abs(relative_goal_post_angle) > Config.GOAL_ANGLE_THRESHOLD:
+            self.send_velocity(0, self.turn_pid.update(relative_goal_post_angle, now))
+            return
+
+        telemetry.event("decision", "**Action:** KICK ➔ Goal post within range! Taking the shot! ⚽️ {angle}",
+                        action="FKICK", angle=relative_goal_post_angle)
+        self.stop_velocity()
+        self.execute_steps([("RELEASE", 500), ("FKICK", 700)])
+        self.trap_start_time = None
 
     # def defence_movement(self, bot_center, goal_post_center, bot_orientation_angle):
     #     ball_wrt_goal_vector= (goal_post_center[0] - bot_center[0],
@@ -0,0 +1,79 @@
+# bot_fleet.py
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from bot_controller import BotController
+from telemetry import telemetry
+
+
+def configured_bots():
+    """Config.BOTS as a list of {"marker_id", "ip", "port"} dicts; the single-bot settings when empty"""
+    if not Config.BOTS:
+        return [{"marker_id": Config.BOT_MARKER_ID, "ip": Config.NODEMCU_IP, "port": 8080}]
+    return [{"port": 8080, **bot} for bot in Config.BOTS]
+
+
+def calibration_file_for(marker_id):
+    """Per-bot motion calibration file next to Config.CALIBRATION_FILE"""
+    root, ext = os.path.splitext(Config.CALIBRATION_FILE)
+    return f"{root}_{marker_id}{ext}"
+
+
+class BotFleet:
+    """Several BotControllers driven from the same FrameDetections record.
+
+    Every bot gets a single-worker executor for its decisions, so a bot that is
+    still deciding (or, with ASYNC_COMMANDS off, still running a blocking move)
+    skips the frame instead of holding up the other bots or the vision loop.
+    """
+
+    def __init__(self, controllers):
+        self.controllers = controllers  # Marker ID -> BotController
+        self.executors = {marker_id: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"bot{marker_id}")
+                          for marker_id in controllers}
+        self.pending = {}
+        self.skipped = {marker_id: 0 for marker_id in controllers}
+
+    @classmethod
+    def connect(cls, bots, metric=False):
+        """Connect to all NodeMCUs at once"""
+        with ThreadPoolExecutor(max_workers=len(bots), thread_name_prefix="connect") as pool:
+            futures = {bot["marker_id"]: pool.submit(BotController, bot["ip"], bot["port"],
+                                                     calibration_file_for(bot["marker_id"]), metric)
+                       for bot in bots}
+            return cls({marker_id: future.result() for marker_id, future in futures.items()})
+
+    def dispatch(self, marker_id, fn, *args):
+        """Run fn(controller, *args) on the bot's worker unless its previous decision is still running"""
+        future = self.pending.get(marker_id)
+        if future is not None and not future.done():
+            self.skipped[marker_id] += 1
+            telemetry.count("skipped_decisions")
+            return False
+        if future is not None and future.exception() is not None:
+            exc = future.exception()
+            print(f"❌ Bot {marker_id} decision failed:")
+            traceback.print_exception(type(exc), exc, exc.__traceback__)
+        self.pending[marker_id] = self.executors[marker_id].submit(fn, self.controllers[marker_id], *args)
+        return True
+
+    def is_moving(self):
+        return any(controller.is_moving() for controller in self.controllers.values())
+
+    @property
+    def first_command_at(self):
+        times = [c.first_command_at for c in self.controllers.values() if c.first_command_at is not None]
+        return min(times) if times else None
+
+    def stop(self):
+        # Drop queued decisions on every bot first, then let running ones finish:
+        # one still running could otherwise send its sequence after STOP
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
+        for marker_id, controller in self.controllers.items():
+            print(f"🛑 Sending STOP command to bot {marker_id}...")
+            controller.stop()
+            controller.save_calibration()
@@ -0,0 +1,47 @@
+# box_utils.py
+import numpy as np
+
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    ix1, iy1 = max(box_a[0], box_b[0]), max(box_a[1], box_b[1])
+    ix2, iy2 = min(box_a[2], box_b[2]), min(box_a[3], box_b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+    area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """(N, M) IoU between two arrays of boxes whose first four columns are x1, y1, x2, y2"""
+    a = np.asarray(boxes_a, dtype=np.float64)[:, None, :4]
+    b = np.asarray(boxes_b, dtype=np.float64)[None, :, :4]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.where(union > 0, union, 1), 0.0)
+
+
+def box_centers(boxes):
+    """(N, 2) centers of an array of boxes"""
+    boxes = np.asarray(boxes)
+    return np.stack(((boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2), axis=1)
+
+
+def fuse_boxes(box_arrays, iou_threshold=0.3):
+    """Concatenate detections from overlapping views and drop lower-confidence duplicates of the same class"""
+    box_arrays = [b for b in box_arrays if len(b)]
+    if not box_arrays:
+        return np.empty((0, 6), dtype=np.float32)
+    boxes = np.concatenate(box_arrays)
+    boxes = boxes[np.argsort(-boxes[:, 4], kind="stable")]
+    duplicate = (iou_matrix(boxes, boxes) > iou_threshold) & (boxes[:, None, 5] == boxes[None, :, 5])
+    keep = np.ones(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if keep[i]:
+            keep[i + 1:] &= ~duplicate[i, i + 1:]
+    return boxes[keep]
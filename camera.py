@@ -1,34 +1,192 @@
 # camera.py
-import cv2
+import time
 import queue
 import threading
+import multiprocessing as mp
+from config import Config
+from frame_ring import SharedFrameRing, capture_to_ring
+from recorder import open_video_source, is_live_source, reopen_video_source
+from telemetry import telemetry
 
 class CameraManager:
-    def __init__(self, video_url):
-        self.video_url = video_url
-        self.frame_queue = queue.Queue(maxsize=1)
+    def __init__(self, video_url, use_process=False, ring_slots=4, replay_realtime=True):
+        self.video_url = video_url  # Camera URL/index, or 'replay:<path prefix>' for a recording
+        self.replay_realtime = replay_realtime
+        self.lossless = False  # Taken from the source once opened: fast replay hands over every frame, in order
+        self.frame_queue = queue.Queue(maxsize=1)  # (frame, seq, capture timestamp)
         self.is_running = True
+        self.stopped = threading.Event()
+        self.frame_wanted = threading.Event()  # Set by get_frame: the next grabbed frame gets decoded
+        self.frame_wanted.set()
+
+        # Ingestion counters (thread mode)
+        self.frames_grabbed = 0
+        self.frames_decoded = 0
+        self.frames_dropped = 0  # Grabbed while nobody was waiting, never decoded
+        self.read_failures = 0
+        self.decode_failures = 0
+        self.reconnects = 0
+
+        # Multi-process capture: decode runs in its own process and writes into a shared-memory ring
+        self.use_process = use_process
+        self.ring_slots = ring_slots
+        self.ring = None
+        self.capture_process = None
+        self.last_seq = -1
+        self.last_timestamp = 0.0
+        self.first_frame = threading.Event()
 
     def start_capture(self):
+        if self.use_process:
+            self._start_capture_process()
+            return
         self.capture_thread = threading.Thread(target=self._capture_frames)
         self.capture_thread.start()
 
+    def _start_capture_process(self, timeout=30):
+        ctx = mp.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        self.stop_event = ctx.Event()
+        self.new_frame = ctx.Event()
+        self.ring_lock = ctx.Lock()  # Guards slot selection against the slot get_frame has pinned
+        self.capture_process = ctx.Process(target=capture_to_ring, daemon=True,
+                                           args=(self.video_url, self.replay_realtime, self.ring_slots,
+                                                 self.ring_lock, child_conn, self.stop_event, self.new_frame))
+        self.capture_process.start()
+        waited = 0.0
+        while not parent_conn.poll(0.5):
+            waited += 0.5
+            if not self.capture_process.is_alive() or waited >= timeout:
+                raise RuntimeError(f"Capture process did not report a frame from {self.video_url}")
+        info = parent_conn.recv()
+        if info is None:
+            raise RuntimeError(f"Could not open video stream {self.video_url}")
+        name, shape = info
+        self.ring = SharedFrameRing.attach(name, shape, self.ring_slots, self.ring_lock)
+        self.first_frame.set()
+
+    def _open(self, live):
+        if not live:
+            cap = open_video_source(self.video_url, self.replay_realtime)
+            return cap if cap.isOpened() else None
+        return reopen_video_source(self.video_url, self.replay_realtime, self.stopped,
+                                   Config.CAMERA_RECONNECT_DELAY, Config.CAMERA_RECONNECT_MAX_DELAY)
+
     def _capture_frames(self):
-        cap = cv2.VideoCapture(self.video_url)
-        while self.is_running and cap.isOpened():
-            ret, frame = cap.read()
+        """Grab every frame to keep the driver buffer empty, decode only the ones get_frame is waiting for"""
+        live = is_live_source(self.video_url)
+        cap = self._open(live)
+        self.lossless = getattr(cap, "lossless", False)
+        # Lossless replay is stamped with the recorded capture times so runs repeat exactly
+        recorded = cap.recorded_timestamp if self.lossless else None
+        failures = 0
+        backoff = Config.CAMERA_RECONNECT_DELAY  # Grows while reopened streams keep failing at once
+        while cap is not None and self.is_running:
+            if not cap.grab():
+                self.read_failures += 1
+                failures += 1
+                if not live:
+                    break  # End of the recording
+                if failures >= Config.CAMERA_MAX_READ_FAILURES:
+                    print(f"⚠️ Camera stream {self.video_url} lost, reconnecting...")
+                    cap.release()
+                    self.reconnects += 1
+                    telemetry.count("camera_reconnects")
+                    self.stopped.wait(backoff)
+                    backoff = min(backoff * 2, Config.CAMERA_RECONNECT_MAX_DELAY)
+                    cap = self._open(live)
+                    failures = 0
+                continue
+            failures = 0
+            backoff = Config.CAMERA_RECONNECT_DELAY
+            timestamp = recorded and recorded() or time.time()
+            seq = self.frames_grabbed
+            self.frames_grabbed += 1
+
+            if not self.lossless and not self.frame_wanted.is_set():
+                self.frames_dropped += 1
+                telemetry.count("dropped_frames")
+                continue
+            ret, frame = cap.retrieve()
             if not ret:
-                break
+                self.decode_failures += 1
+                telemetry.count("decode_failures")
+                continue
+            self.frames_decoded += 1
+            self.frame_wanted.clear()
+
+            while self.is_running:
+                try:
+                    self.frame_queue.put((frame, seq, timestamp), timeout=0.1)
+                    self.first_frame.set()
+                    break
+                except queue.Full:
+                    if self.lossless:
+                        continue  # Deterministic replay waits for the consumer
+                    try:
+                        self.frame_queue.get_nowait()  # Only the startup frame can still be queued
+                    except queue.Empty:
+                        pass
 
-            if self.frame_queue.full():
-                _ = self.frame_queue.get()
-            self.frame_queue.put(frame)
+        if cap is not None:
+            cap.release()
 
-        cap.release()
+    def wait_for_first_frame(self, timeout=None):
+        """Block until the stream has delivered a frame; False on timeout"""
+        return self.first_frame.wait(timeout)
 
     def get_frame(self):
-        return self.frame_queue.get()
+        """Newest frame, or None once the stream has ended; last_seq/last_timestamp describe it"""
+        if self.ring is None:
+            if not self.lossless:
+                try:
+                    self.frame_queue.get_nowait()  # Decoded before we asked (e.g. the startup frame), already old
+                except queue.Empty:
+                    pass
+            self.frame_wanted.set()
+            try:
+                while self.is_running:
+                    try:
+                        frame, self.last_seq, self.last_timestamp = self.frame_queue.get(timeout=0.1)
+                        return frame
+                    except queue.Empty:
+                        if not self.capture_thread.is_alive() and self.frame_queue.empty():
+                            return None
+                return None
+            finally:
+                self.frame_wanted.clear()  # Nothing is decoded again until the next call
+
+        # Map the newest slot without copying; it stays pinned (never overwritten) until the next call,
+        # so detection and drawing can work on it in place. Wait for the writer if we have already seen it
+        while self.is_running:
+            frame, seq, timestamp = self.ring.latest()
+            if frame is not None and seq != self.last_seq:
+                if self.last_seq >= 0 and seq > self.last_seq + 1:
+                    telemetry.count("dropped_frames", seq - self.last_seq - 1)  # Overwritten before we got to them
+                self.last_seq = seq
+                self.last_timestamp = timestamp
+                return frame
+            if not self.capture_process.is_alive():
+                return None
+            self.new_frame.wait(0.1)
+            self.new_frame.clear()
+        return None
+
+    def report(self):
+        """Ingestion counters (thread mode)"""
+        return (f"📷 Camera: grabbed {self.frames_grabbed} | decoded {self.frames_decoded} | "
+                f"dropped undecoded {self.frames_dropped} | read failures {self.read_failures} | "
+                f"decode failures {self.decode_failures} | reconnects {self.reconnects}")
 
     def stop(self):
         self.is_running = False
+        self.stopped.set()
+        if self.capture_process is not None:
+            self.stop_event.set()
+            self.capture_process.join(timeout=2)
+            if self.capture_process.is_alive():
+                self.capture_process.terminate()
+            if self.ring is not None:
+                self.ring.close()
+            return
         self.capture_thread.join()
@@ -0,0 +1,103 @@
+# command_scheduler.py
+import time
+import threading
+from collections import deque
+
+
+class CommandScheduler:
+    """Sends timed bot commands from a background thread so the vision loop never blocks.
+
+    Each queued step is ``(command, duration_ms, settle_s)``. The sender thread
+    writes the command through ``send_fn`` and then waits ``duration_ms`` plus the
+    settle time before the next step, exactly like the old blocking ``send_command``.
+    A step with ``command=None`` is a pure pause. A command may also be a tuple
+    of ``(command, duration_ms)`` steps sent as one packet; if ``send_fn``
+    returns a threading.Event the thread waits for it (the firmware's done ack,
+    up to ``ack_timeout`` past the expected duration) instead of the timer.
+    """
+
+    def __init__(self, send_fn, settle_time=0.4, ack_timeout=1.0):
+        self.send_fn = send_fn
+        self.settle_time = settle_time
+        self.ack_timeout = ack_timeout
+        self.steps = deque()
+        self.current_command = None
+        self.busy_until = 0.0  # time.monotonic() deadline of the last queued step
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.interrupt = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, command, duration=0, settle=None, preempt=False):
+        """Queue a command; with preempt=True everything pending or running is dropped first"""
+        settle = self.settle_time if settle is None else settle
+        with self.lock:
+            if preempt:
+                self._cancel_locked()
+            now = time.monotonic()
+            self.busy_until = max(self.busy_until, now) + (duration or 0) / 1000 + settle
+            self.steps.append((command, duration, settle))
+        self.wakeup.set()
+
+    def pause(self, seconds):
+        """Queue an idle gap between two commands"""
+        self.submit(None, 0, seconds)
+
+    def cancel(self):
+        """Drop queued steps and cut the wait of the running step short"""
+        with self.lock:
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        self.steps.clear()
+        self.busy_until = time.monotonic()
+        if self.current_command is not None:
+            self.interrupt.set()
+
+    def is_busy(self):
+        """True while a command is running or queued"""
+        return self.current_command is not None or bool(self.steps) or time.monotonic() < self.busy_until
+
+    def time_remaining(self):
+        """Seconds until the bot finishes everything queued"""
+        return max(0.0, self.busy_until - time.monotonic())
+
+    def _run(self):
+        while self.running:
+            with self.lock:
+                step = self.steps.popleft() if self.steps else None
+                if step is None:
+                    self.wakeup.clear()
+                else:
+                    self.interrupt.clear()
+                    command = step[0]
+                    self.current_command = command[0][0] if isinstance(command, tuple) else command or "PAUSE"
+            if step is None:
+                self.wakeup.wait(0.1)
+                continue
+
+            command, duration, settle = step
+            done = self.send_fn(command, duration) if command is not None else None
+            if isinstance(done, threading.Event):
+                # Acked sequence: wait for the firmware to report it finished
+                deadline = time.monotonic() + (duration or 0) / 1000 + self.ack_timeout
+                while not done.is_set() and not self.interrupt.is_set() and time.monotonic() < deadline:
+                    done.wait(0.01)
+                self.interrupt.wait(settle)
+            else:
+                # Interruptible wait so a newer decision can take over mid-move
+                self.interrupt.wait((duration or 0) / 1000 + settle)
+            with self.lock:
+                self.current_command = None
+                if not self.steps:
+                    # Acks can finish a sequence earlier than its estimated deadline
+                    self.busy_until = min(self.busy_until, time.monotonic())
+
+    def stop(self):
+        self.running = False
+        self.cancel()
+        self.wakeup.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=1)
@@ -2,11 +2,102 @@ class Config:
     NODEMCU_IP = "192.168.0.100"  #INSTANTA2 IP
     VIDEO_URL = "http://192.168.0.101:8080/video"
     # VIDEO_URL = 0
+    # VIDEO_URL = "replay:recordings/match1"  # Recording made with recorder.py
     BOT_MARKER_ID = 600
     GOAL_POST_MARKER_ID = 360
+    GOAL_POST_TRACKING = True  # Locate the goal post from GOAL_POST_MARKER_ID instead of a mouse click
+    GOAL_RECHECK_INTERVAL = 30  # With ARUCO_ROI_TRACKING, search the full frame every N frames to re-see the goal
+    GOAL_SMOOTHING = 0.2  # Exponential smoothing factor for the goal post position
+    GOAL_MOVE_THRESHOLD = 40  # Pixels a sighting may differ before it counts as the goal (camera) having moved
+    GOAL_MOVE_FRAMES = 3  # Consecutive such sightings before the position jumps to the new one
     BALL_PROXIMITY_THRESHOLD = 45
     YOLO_MODEL_PATH = "yolo_models/v1/best.pt"
+    ONNX_MODEL_PATH = "yolo_models/v1/best.onnx"  # Exported with export_model.py for the CPU backends
     BALL_ANGLE_THRESHOLD = 10 # Offset for bot-ball align angle (-5 degree to 5 degree)
     GOAL_ANGLE_THRESHOLD = 10 # Offset for bot-goalpost align angle (-5 degree to 5 degree)
     TRAP_DURATION = 7  # Maximum number of seconds the bot is allowed to hold the ball
-    RELEASE_DURATION = 1 # Number of seconds the bot releases the ball after the holding time exceeds 4spython3
\ No newline at end of file
+    RELEASE_DURATION = 1 # Number of seconds the bot releases the ball after the holding time exceeds 4spython3
+    ASYNC_COMMANDS = True  # Send commands from a background thread so the vision loop keeps running
+    PREEMPT_COMMANDS = False  # Let a newer decision replace the command the bot is still executing
+    COMMAND_SETTLE_TIME = 0.4  # Seconds to wait after a command's duration before the next one
+    BATCH_COMMANDS = True  # Send each decision as one acked multi-step packet (needs the batch firmware)
+    BATCH_SETTLE_TIME = 0.1  # Settle after an acked sequence; the done ack replaces most of the guess
+    ACK_TIMEOUT = 1.0  # Seconds past a sequence's expected duration to wait for its done ack
+    PARALLEL_DETECTION = True  # Run YOLO and ArUco detection on the same frame concurrently
+    TIMING_REPORT_INTERVAL = 100  # Frames between detection timing reports (0 disables)
+    TELEMETRY_FILE = None  # JSONL file for structured events (frame timings, decisions, commands, RTT); None disables
+    TELEMETRY_ECHO = True  # Print decisions and commands from the telemetry thread instead of the control path
+    TELEMETRY_RING_SIZE = 4096  # Preallocated event slots; events beyond a full ring are dropped and counted
+    TELEMETRY_FLUSH_INTERVAL = 0.5  # Seconds between background flushes
+    METRICS_PORT = 0  # Serve live counters as JSON on http://127.0.0.1:<port>/metrics (0 disables)
+    COURT_LOCK_FRAMES = 15  # Consecutive consistent court detections before the bounds are locked
+    COURT_LOCK_IOU = 0.9  # Minimum IoU between detections for them to count as consistent
+    COURT_SMOOTHING = 0.2  # Exponential smoothing factor for the court bounds
+    COURT_REVALIDATE_INTERVAL = 300  # Frames between full-frame court re-checks once locked (0 disables)
+    COURT_CROP = True  # Run YOLO only on the locked court region
+    COURT_CROP_PADDING = 20  # Pixels of margin around the court when cropping
+    KEYFRAME_INTERVAL = 1  # Run YOLO every N frames and track balls with optical flow in between (1 disables)
+    KEYFRAME_MIN_TRACK_RATIO = 0.6  # Force a keyframe when fewer than this share of balls are still tracked
+    MOTION_GATE = False  # Reuse the last detections while the court is static and the bot is idle
+    MOTION_GATE_SCALE = 0.25  # Downscale factor of the grayscale frame used for change detection
+    MOTION_PIXEL_THRESHOLD = 15  # Grey levels a pixel must change by to count as motion
+    MOTION_AREA_THRESHOLD = 0.0005  # Share of court pixels that must change (~a moving ball) to trigger detection
+    MOTION_MAX_SKIP = 30  # Detect at least every N frames even on a static scene
+    BALL_TRACKING = True  # Track balls across frames with persistent IDs
+    TRACK_MAX_DISTANCE = 60  # Max centroid jump in pixels for a ball to keep its track
+    TRACK_MAX_AGE = 5  # Frames a track may go unmatched before it is dropped
+    TARGET_SWITCH_MARGIN = 0.2  # Another ball must be this much closer (fraction) to take over the target
+    TARGET_SWITCH_FRAMES = 3  # ...for this many consecutive frames
+    ARUCO_TRACKED_IDS = [BOT_MARKER_ID, GOAL_POST_MARKER_ID]  # Only these marker IDs are decoded
+    ARUCO_ROI_TRACKING = True  # Search around the last bot pose before falling back to the full frame
+    ARUCO_ROI_PADDING = 60  # Pixels added around the last bot corners for the ROI search
+    ARUCO_ROI_SCALE = 1.0  # Downscale factor for the ROI search (< 1 detects smaller, then refines corners)
+    CAPTURE_PROCESS = False  # Decode the camera stream in a separate process feeding a shared-memory ring
+    FRAME_RING_SLOTS = 4  # Frames in the shared-memory ring
+    REPLAY_REALTIME = True  # Replay recordings at recorded speed; False plays every frame as fast as possible
+    DISPLAY_MODE = "window"  # "window" draws every frame, "headless" draws nothing, "preview" draws on a side thread
+    PREVIEW_FPS = 10  # Frame rate cap for the preview thread
+    GOAL_POST_POSITION = None  # Fixed (x, y) of the goal post; None tracks its marker (or asks for a click when tracking is off)
+    BALL_REFERENCE = None  # 'g' (goal post) or 'b' (bot) for the nearest-ball search; None asks at startup
+    DETECTOR_BACKEND = "ultralytics"  # "ultralytics", "onnxruntime" or "openvino"
+    DETECTOR_IMGSZ = 640  # Fixed square inference size (must match the exported model)
+    DETECTOR_THREADS = 0  # CPU threads for inference (0 = runtime default)
+    DETECTOR_WARMUP_RUNS = 2  # Dummy inferences at startup so the first real frame is not slow
+    CONCURRENT_STARTUP = True  # Load the model, open the camera and connect to the NodeMCU at the same time
+    CAMERA_OPEN_TIMEOUT = 10  # Seconds to wait for the first camera frame at startup
+    CAMERA_MAX_READ_FAILURES = 5  # Consecutive failed grabs before a live stream is reopened
+    CAMERA_RECONNECT_DELAY = 0.5  # First reconnect backoff in seconds, doubled per failed attempt
+    CAMERA_RECONNECT_MAX_DELAY = 8.0  # Backoff ceiling in seconds
+    MAX_FRAME_AGE = 0.5  # Seconds from capture after which a frame's detections are too old to act on (0 disables)
+    CONTROL_MODE = "duration"  # "duration": open-loop timed moves, "velocity": PID setpoints streamed every frame
+    VELOCITY_WATCHDOG_MS = 300  # Firmware stops the motors if no setpoint arrives within this time
+    VELOCITY_KEEPALIVE = 0.1  # Seconds between resends of an unchanged setpoint
+    TURN_PID = (1.5, 0.2, 0.08)  # Turn rate (% PWM) per degree of heading error: kp, ki, kd
+    DISTANCE_PID = (0.5, 0.0, 0.05)  # Forward speed (% PWM) per pixel beyond the proximity threshold
+    MAX_TURN_RATE = 60  # % PWM
+    MAX_SPEED = 70  # % PWM
+    MIN_MOTOR_OUTPUT = 25  # % PWM below which the motors stall
+    VELOCITY_ANGLE_TOLERANCE = 3  # Degrees of heading error treated as aligned while streaming
+    ALIGN_SLOWDOWN_ANGLE = 45  # Degrees of heading error at which forward speed fades to zero
+    AUTO_CALIBRATION = True  # Refit the LEFT/RIGHT/FORWARD duration models from marker poses before/after each move
+    CALIBRATION_FILE = "calibration/motion.json"  # Last fitted models, loaded at startup
+    CALIBRATION_FORGETTING = 0.95  # Weight kept by older samples per new one (lower adapts faster)
+    CALIBRATION_PRIOR_WEIGHT = 3  # Pseudo-samples of the hand-tuned constants that anchor the fit
+    CALIBRATION_MAX_DELAY = 2.0  # Seconds after a move's end within which the settled pose is trusted
+    # Lens + field calibration written by field_geometry.py; control then works in cm on the court
+    FIELD_CALIBRATION_FILE = None  # e.g. "calibration/field.json"; None keeps pixel control
+    FIELD_LUT_STEP = 4  # Pixel spacing of the precomputed pixel -> field lookup table
+    UNDISTORT_FRAMES = False  # Also remap whole frames (for display); detections are mapped either way
+    BALL_PROXIMITY_CM = 12  # Bot front to ball center distance that triggers the trap
+    TRAP_EXTRA_MS = 90  # Extra FTRAP time beyond the distance to the ball
+    FORWARD_MS_PER_CM = 25  # Starting FORWARD rate in field units, refined by AUTO_CALIBRATION
+    # Multi-bot mode: one entry per bot, e.g. {"marker_id": 600, "ip": "192.168.0.100", "port": 8080}.
+    # Empty runs the single bot from BOT_MARKER_ID / NODEMCU_IP.
+    BOTS = []
+    # Multi-camera mode: one entry per stream with its image -> field homography, either
+    # {"url": ..., "homography": [[...], [...], [...]]} or {"url": ..., "image_points": [4+ [x, y]], "field_points": [...]}.
+    # Field points are in FIELD_CANVAS_SIZE units; GOAL_POST_POSITION is then given in the same frame.
+    CAMERAS = []
+    MULTI_CAMERA_MODE = "workers"  # "workers": decode + detect per camera process; "batched": one batched YOLO call here
+    FIELD_CANVAS_SIZE = (1280, 720)  # Shared top-down field frame the cameras are mapped into
+    CAMERA_FUSION_IOU = 0.3  # Same-class boxes from overlapping cameras are merged above this IoU
@@ -0,0 +1,161 @@
+# detection_pipeline.py
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from telemetry import telemetry
+
+
+class FrameDetections:
+    """
+    Everything detected in one frame, built once by DetectionPipeline and
+    shared by ball selection, control and drawing.
+
+    boxes holds x1, y1, x2, y2, conf, class_id (+ track ID) rows; markers are
+    kept as returned by cv2.aruco with ids flattened to a 1-D array. Times are
+    time.time() seconds, stage timings are milliseconds. bot_center/bot_angle
+    are the first bot's pose; bot_poses and assignments hold every bot's pose
+    and ball by marker ID in multi-bot mode.
+    """
+    __slots__ = ("frame_id", "timestamp", "detected_at", "boxes", "court_bounds", "restricted_zone",
+                 "corners", "ids", "bot_center", "bot_angle", "bot_poses", "target_ball", "target_ball_id",
+                 "assignments", "yolo_ms", "aruco_ms", "total_ms", "reused")
+
+    def __init__(self, frame_id, timestamp, boxes, court_bounds, restricted_zone, corners, ids):
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.detected_at = time.time()
+        self.boxes = boxes
+        self.court_bounds = court_bounds
+        self.restricted_zone = restricted_zone
+        self.corners = corners
+        self.ids = None if ids is None else ids.reshape(-1)
+        self.bot_center = None
+        self.bot_angle = None
+        self.bot_poses = {}
+        self.target_ball = None
+        self.target_ball_id = None
+        self.assignments = {}
+        self.yolo_ms = self.aruco_ms = self.total_ms = 0.0
+        self.reused = False  # True when the motion gate skipped detection and these came from an earlier frame
+
+    def reuse(self, frame_id, timestamp):
+        """Copy of these detections for a later frame in which nothing moved"""
+        detections = FrameDetections(frame_id, timestamp, self.boxes, self.court_bounds, self.restricted_zone,
+                                     self.corners, self.ids)
+        detections.bot_center, detections.bot_angle = self.bot_center, self.bot_angle
+        detections.bot_poses = dict(self.bot_poses)
+        detections.reused = True
+        return detections
+
+    @property
+    def balls(self):
+        return self.boxes[self.boxes[:, 5] == 1]
+
+    def marker_corners(self, marker_id):
+        """Corners of the first marker with this ID, or None"""
+        if self.ids is None:
+            return None
+        matches = np.flatnonzero(self.ids == marker_id)
+        return self.corners[matches[0]] if len(matches) else None
+
+
+def fill_bot_poses(detections, marker_detector, bot_marker_ids):
+    """Set bot_poses for every visible bot and bot_center/bot_angle for the first one"""
+    for marker_id in bot_marker_ids:
+        bot_corners = detections.marker_corners(marker_id)
+        if bot_corners is not None:
+            detections.bot_poses[marker_id] = marker_detector.process_bot_marker(bot_corners)
+    if bot_marker_ids and bot_marker_ids[0] in detections.bot_poses:
+        detections.bot_center, detections.bot_angle = detections.bot_poses[bot_marker_ids[0]]
+
+
+class DetectionPipeline:
+    """Runs BallDetector and MarkerDetector on the same frame concurrently.
+
+    Both cv2.aruco and the YOLO forward pass release the GIL for most of their
+    work, so two threads overlap them. With parallel=False the stages run back
+    to back, which is useful for comparing the timing report.
+    """
+
+    def __init__(self, ball_detector, marker_detector, bot_marker_id, parallel=True, report_interval=100,
+                 motion_gate=None):
+        self.ball_detector = ball_detector
+        self.marker_detector = marker_detector
+        # One marker ID or a list of them (multi-bot); the first is the primary bot
+        self.bot_marker_ids = [int(m) for m in np.atleast_1d(bot_marker_id)]
+        self.bot_marker_id = self.bot_marker_ids[0]
+        self.parallel = parallel
+        self.report_interval = report_interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aruco") if parallel else None
+        self.motion_gate = motion_gate  # Optional MotionGate: static frames reuse the last detections
+        self.last_detections = None
+        self.frame_id = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.stats_frames = 0
+        self.stats_yolo_ms = 0.0
+        self.stats_aruco_ms = 0.0
+        self.stats_total_ms = 0.0
+
+    def _timed_markers(self, frame):
+        start = time.perf_counter()
+        corners, ids, rejected = self.marker_detector.detect_markers(frame)
+        return corners, ids, rejected, (time.perf_counter() - start) * 1000
+
+    def process(self, frame, timestamp=None):
+        """Detect balls and markers on a frame and return a FrameDetections record"""
+        if self.motion_gate is not None and \
+                not self.motion_gate.should_detect(frame, self.ball_detector.court_model.bounds):
+            self.frame_id += 1
+            telemetry.frame(self.frame_id)
+            return self.last_detections.reuse(self.frame_id, timestamp or time.time())
+
+        start = time.perf_counter()
+        if self.executor is not None:
+            # ArUco on the worker thread while YOLO runs on this one
+            aruco_future = self.executor.submit(self._timed_markers, frame)
+            boxes = self.ball_detector.detect_boxes(frame)
+            yolo_ms = (time.perf_counter() - start) * 1000
+            corners, ids, rejected, aruco_ms = aruco_future.result()
+        else:
+            boxes = self.ball_detector.detect_boxes(frame)
+            yolo_ms = (time.perf_counter() - start) * 1000
+            corners, ids, rejected, aruco_ms = self._timed_markers(frame)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        self.frame_id += 1
+        self._record(yolo_ms, aruco_ms, total_ms)
+        telemetry.frame(self.frame_id, yolo_ms=yolo_ms, aruco_ms=aruco_ms, total_ms=total_ms)
+        court = self.ball_detector.court_model
+        detections = FrameDetections(self.frame_id, timestamp or time.time(), boxes,
+                                     court.bounds, court.restricted_zone, corners, ids)
+        detections.yolo_ms, detections.aruco_ms, detections.total_ms = yolo_ms, aruco_ms, total_ms
+
+        fill_bot_poses(detections, self.marker_detector, self.bot_marker_ids)
+        self.last_detections = detections
+        return detections
+
+    def _record(self, yolo_ms, aruco_ms, total_ms):
+        self.stats_frames += 1
+        self.stats_yolo_ms += yolo_ms
+        self.stats_aruco_ms += aruco_ms
+        self.stats_total_ms += total_ms
+        if self.report_interval and self.stats_frames >= self.report_interval:
+            print(self.timing_report())
+            self._reset_stats()
+
+    def timing_report(self):
+        """Average stage timings since the last report and the wall-clock saving"""
+        n = max(self.stats_frames, 1)
+        yolo_ms = self.stats_yolo_ms / n
+        aruco_ms = self.stats_aruco_ms / n
+        total_ms = self.stats_total_ms / n
+        saved_ms = yolo_ms + aruco_ms - total_ms
+        mode = "parallel" if self.parallel else "sequential"
+        return (f"⏱️ Detection ({mode}, {self.stats_frames} frames): YOLO {yolo_ms:.1f} ms | "
+                f"ArUco {aruco_ms:.1f} ms | wall {total_ms:.1f} ms | saved {saved_ms:.1f} ms/frame")
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
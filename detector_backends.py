@@ -0,0 +1,164 @@
+# detector_backends.py
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+
+
+def empty_boxes():
+    return np.empty((0, 6), dtype=np.float32)
+
+
+class UltralyticsBackend:
+    """The original PyTorch path through ultralytics.YOLO"""
+
+    def __init__(self, model_path, imgsz=640, threads=0):
+        from ultralytics import YOLO  # Heavy import (torch), only paid when this backend is used
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+
+    @staticmethod
+    def results_to_boxes(yolo_results):
+        """Convert YOLO results to an (N, 6) array of x1, y1, x2, y2, conf, class_id"""
+        data = yolo_results[0].boxes.data
+        if data is None or len(data) == 0:
+            return empty_boxes()
+        return data.cpu().numpy()
+
+    def infer(self, image):
+        return self.results_to_boxes(self.model(image, imgsz=self.imgsz))
+
+    def infer_batch(self, images):
+        """One forward pass over several images; a list of (N, 6) arrays"""
+        return [self.results_to_boxes([result]) for result in self.model(list(images), imgsz=self.imgsz)]
+
+
+def letterbox_blob(imgsz):
+    """Preallocated (1, 3, imgsz, imgsz) float32 model input"""
+    return np.full((1, 3, imgsz, imgsz), 114 / 255, dtype=np.float32)
+
+
+def letterbox(image, blob):
+    """Letterbox a BGR image into ``blob`` in place; returns (scale, pad_x, pad_y) to map boxes back"""
+    imgsz = blob.shape[-1]
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_w, new_h = round(width * scale), round(height * scale)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    # Reuse the preallocated input: grey padding, RGB planes, 0-1 range
+    blob.fill(114 / 255)
+    blob[0, :, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = \
+        resized[:, :, ::-1].transpose(2, 0, 1) * np.float32(1 / 255)
+    return scale, pad_x, pad_y
+
+
+class _ExportedYoloBackend(ABC):
+    """Shared pre/post-processing for an exported YOLOv8-style model with a fixed square input.
+
+    The image is letterboxed to ``imgsz``, the (1, 4 + classes, N) output is
+    filtered by confidence, class-wise NMS is applied with OpenCV and boxes are
+    mapped back to image pixels in the BallDetector (N, 6) layout.
+    """
+
+    def __init__(self, imgsz=640, conf=0.25, iou=0.7):
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.blob = letterbox_blob(imgsz)
+
+    def _postprocess(self, output, scale, pad_x, pad_y, image_shape):
+        predictions = np.squeeze(output, axis=0)
+        if predictions.shape[0] < predictions.shape[1]:
+            predictions = predictions.T  # (N, 4 + classes)
+        scores = predictions[:, 4:]
+        class_ids = np.argmax(scores, axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+        keep = confidences >= self.conf
+        if not np.any(keep):
+            return empty_boxes()
+        xywh, confidences, class_ids = predictions[keep, :4], confidences[keep], class_ids[keep]
+
+        x1y1 = xywh[:, :2] - xywh[:, 2:4] / 2
+        # Offset boxes by class so one NMS call never suppresses across classes
+        offsets = class_ids[:, None] * (self.imgsz + 1)
+        nms_boxes = np.column_stack((x1y1 + offsets, xywh[:, 2:4]))
+        indices = cv2.dnn.NMSBoxes(nms_boxes.tolist(), confidences.tolist(), self.conf, self.iou)
+        indices = np.array(indices, dtype=np.int64).reshape(-1)
+
+        boxes = np.empty((len(indices), 6), dtype=np.float32)
+        boxes[:, 0:2] = (x1y1[indices] - (pad_x, pad_y)) / scale
+        boxes[:, 2:4] = boxes[:, 0:2] + xywh[indices, 2:4] / scale
+        boxes[:, 4] = confidences[indices]
+        boxes[:, 5] = class_ids[indices]
+        height, width = image_shape[:2]
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, width)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, height)
+        return boxes
+
+    @abstractmethod
+    def _run(self, blob):
+        """Raw model output for a preprocessed (1, 3, imgsz, imgsz) blob"""
+
+    def infer(self, image):
+        scale, pad_x, pad_y = letterbox(image, self.blob)
+        return self._postprocess(self._run(self.blob), scale, pad_x, pad_y, image.shape)
+
+    def infer_batch(self, images):
+        # Exported with a fixed batch of 1, so images go through one at a time
+        return [self.infer(image) for image in images]
+
+
+class OnnxRuntimeBackend(_ExportedYoloBackend):
+    """ONNX (optionally INT8-quantized) model on the ONNX Runtime CPU provider"""
+
+    def __init__(self, model_path, imgsz=640, threads=0, conf=0.25, iou=0.7):
+        super().__init__(imgsz, conf, iou)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoBackend(_ExportedYoloBackend):
+    """ONNX or OpenVINO IR model compiled for the CPU plugin"""
+
+    def __init__(self, model_path, imgsz=640, threads=0, conf=0.25, iou=0.7):
+        super().__init__(imgsz, conf, iou)
+        import openvino as ov
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        self.model = ov.Core().compile_model(model_path, "CPU", config)
+        self.request = self.model.create_infer_request()
+
+    def _run(self, blob):
+        self.request.infer({0: blob})
+        return self.request.get_output_tensor(0).data
+
+
+BACKENDS = {
+    "ultralytics": UltralyticsBackend,
+    "onnxruntime": OnnxRuntimeBackend,
+    "openvino": OpenVinoBackend,
+}
+
+
+def create_backend(name, model_path, imgsz=640, threads=0, warmup_runs=2):
+    """Build a detector backend by name and run a few warm-up inferences"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend '{name}', choose one of {sorted(BACKENDS)}")
+    backend = BACKENDS[name](model_path, imgsz=imgsz, threads=threads)
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(warmup_runs):
+        backend.infer(dummy)
+    return backend
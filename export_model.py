@@ -0,0 +1,88 @@
+# export_model.py
+"""
+Export the YOLO model to ONNX for the onnxruntime/openvino backends.
+
+    python export_model.py                                   # best.pt -> best.onnx
+    python export_model.py --int8 --calibration replay:recordings/match1
+
+The exported model has a fixed square input of Config.DETECTOR_IMGSZ. With
+--int8 a statically quantized copy (<name>_int8.onnx) is written as well,
+calibrated on frames from a recording (see recorder.py) or an image folder.
+"""
+import os
+import glob
+import argparse
+import cv2
+from config import Config
+
+
+def export_onnx(model_path, imgsz, opset=12):
+    from ultralytics import YOLO
+    # dynamic=False keeps the input fixed at imgsz, simplify folds constants for the CPU runtimes
+    return YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True, opset=opset)
+
+
+def calibration_frames(source, limit):
+    """Frames from a 'replay:<prefix>' recording, a video file or a folder of images"""
+    if os.path.isdir(source):
+        for path in sorted(glob.glob(os.path.join(source, "*.jpg")) + glob.glob(os.path.join(source, "*.png")))[:limit]:
+            yield cv2.imread(path)
+        return
+    from recorder import open_video_source
+    cap = open_video_source(source, replay_realtime=False)
+    count = 0
+    while count < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+        count += 1
+    cap.release()
+
+
+def quantize_int8(onnx_path, calibration_source, imgsz, limit=100):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from detector_backends import letterbox, letterbox_blob
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.blob = letterbox_blob(imgsz)
+            self.frames = calibration_frames(calibration_source, limit)
+            self.input_name = input_name
+
+        def get_next(self):
+            frame = next(self.frames, None)
+            if frame is None:
+                return None
+            letterbox(frame, self.blob)
+            return {self.input_name: self.blob.copy()}
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    output_path = os.path.splitext(onnx_path)[0] + "_int8.onnx"
+    quantize_static(onnx_path, output_path, FrameReader(input_name), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=Config.YOLO_MODEL_PATH)
+    parser.add_argument("--imgsz", type=int, default=Config.DETECTOR_IMGSZ)
+    parser.add_argument("--int8", action="store_true", help="Also write a statically quantized INT8 model")
+    parser.add_argument("--calibration", default=None,
+                        help="Calibration frames: 'replay:<prefix>', a video file or an image folder")
+    parser.add_argument("--calibration-frames", type=int, default=100)
+    args = parser.parse_args()
+
+    onnx_path = export_onnx(args.model, args.imgsz)
+    print(f"✅ Exported {onnx_path}")
+    if args.int8:
+        if not args.calibration:
+            parser.error("--int8 needs --calibration frames")
+        int8_path = quantize_int8(onnx_path, args.calibration, args.imgsz, args.calibration_frames)
+        print(f"✅ Quantized {int8_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# field_geometry.py
+import os
+import json
+import argparse
+import cv2
+import numpy as np
+
+
+class FieldMapping:
+    """Image pixels <-> shared top-down field coordinates through a 3x3 homography.
+
+    Only detections are mapped (box corners, marker corners, points), never whole
+    frames, so the cost is a few cv2.perspectiveTransform calls per frame.
+    """
+
+    def __init__(self, homography):
+        self.homography = np.asarray(homography, dtype=np.float64).reshape(3, 3)
+        self.inverse = np.linalg.inv(self.homography)
+
+    @classmethod
+    def from_points(cls, image_points, field_points):
+        """Fit the homography from 4+ matching image/field points (e.g. the court corners)"""
+        homography, _ = cv2.findHomography(np.asarray(image_points, dtype=np.float32),
+                                           np.asarray(field_points, dtype=np.float32))
+        if homography is None:
+            raise ValueError("Could not fit a homography to the given points")
+        return cls(homography)
+
+    @classmethod
+    def from_config(cls, camera):
+        """Build from a Config.CAMERAS entry with 'calibration' (FieldGeometry file), 'homography' or point pairs"""
+        if "calibration" in camera:
+            return FieldGeometry.load(camera["calibration"])
+        if "homography" in camera:
+            return cls(camera["homography"])
+        return cls.from_points(camera["image_points"], camera["field_points"])
+
+    @staticmethod
+    def _transform(points, matrix):
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        if len(points) == 0:
+            return np.empty((0, 2), dtype=np.float32)
+        return cv2.perspectiveTransform(points, matrix).reshape(-1, 2)
+
+    def to_field(self, points):
+        """(N, 2) image points -> (N, 2) field points"""
+        return self._transform(points, self.homography)
+
+    def to_image(self, points):
+        """(N, 2) field points -> (N, 2) image points"""
+        return self._transform(points, self.inverse)
+
+    def boxes_to_field(self, boxes):
+        """Map (N, 6+) x1, y1, x2, y2, ... boxes to the field: bounds of the four mapped corners, other columns kept"""
+        if len(boxes) == 0:
+            return boxes.copy()
+        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        corners = np.stack([np.column_stack(c) for c in ((x1, y1), (x2, y1), (x2, y2), (x1, y2))], axis=1)
+        mapped = self.to_field(corners.reshape(-1, 2)).reshape(-1, 4, 2)
+        field_boxes = boxes.astype(np.float32, copy=True)
+        field_boxes[:, 0:2] = mapped.min(axis=1)
+        field_boxes[:, 2:4] = mapped.max(axis=1)
+        return field_boxes
+
+    def corners_to_field(self, corners):
+        """Map cv2.aruco marker corners (tuple of (1, 4, 2) arrays) to the field"""
+        return tuple(self.to_field(c).reshape(1, 4, 2) for c in corners)
+
+
+class FieldGeometry(FieldMapping):
+    """Lens undistortion plus a homography to metric field coordinates (cm), precomputed at startup.
+
+    ``homography`` maps undistorted pixels to the field. A lookup table of
+    field coordinates sampled every ``lut_step`` pixels over the raw image is
+    built once, so ``to_field`` on detections is a bilinear table lookup
+    instead of undistorting and projecting every point. Whole frames are only
+    remapped by ``undistort_frame``, through cv2.remap maps built once as well.
+    """
+
+    def __init__(self, camera_matrix, dist_coeffs, homography, image_size, field_size=None, lut_step=4):
+        super().__init__(homography)
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).reshape(-1)
+        self.image_size = tuple(int(v) for v in image_size)  # (width, height)
+        self.field_size = field_size
+        self.lut_step = lut_step
+        self.frames_undistorted = False
+        self.undistort_maps = None
+        self._build_lut()
+
+    def _build_lut(self):
+        width, height = self.image_size
+        xs = np.arange(0, width + self.lut_step, self.lut_step, dtype=np.float32)
+        ys = np.arange(0, height + self.lut_step, self.lut_step, dtype=np.float32)
+        grid = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+        self.lut = self.to_field_exact(grid).reshape(len(ys), len(xs), 2)
+
+    def undistort_points(self, points):
+        """Raw pixels -> undistorted pixels"""
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        if len(points) == 0:
+            return np.empty((0, 2), dtype=np.float32)
+        return cv2.undistortPoints(points, self.camera_matrix, self.dist_coeffs,
+                                   P=self.camera_matrix).reshape(-1, 2)
+
+    def to_field_exact(self, points):
+        """Raw pixels -> field, undistorting every point"""
+        return self._transform(self.undistort_points(points), self.homography)
+
+    def to_field(self, points):
+        """(N, 2) pixels -> (N, 2) field coordinates through the precomputed table"""
+        if self.frames_undistorted:
+            return self._transform(points, self.homography)  # Detections already come from undistorted frames
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        if len(points) == 0:
+            return np.empty((0, 2), dtype=np.float32)
+        # cv2.remap samples the table bilinearly at the (scaled) detection positions
+        return cv2.remap(self.lut, points / self.lut_step, None, cv2.INTER_LINEAR,
+                         borderMode=cv2.BORDER_REPLICATE).reshape(-1, 2)
+
+    def to_image(self, points):
+        """(N, 2) field coordinates -> raw (distorted) pixels"""
+        undistorted = self._transform(points, self.inverse)
+        if self.frames_undistorted or len(undistorted) == 0:
+            return undistorted
+        fx, fy = self.camera_matrix[0, 0], self.camera_matrix[1, 1]
+        cx, cy = self.camera_matrix[0, 2], self.camera_matrix[1, 2]
+        normalized = np.column_stack(((undistorted[:, 0] - cx) / fx, (undistorted[:, 1] - cy) / fy,
+                                      np.ones(len(undistorted))))
+        projected, _ = cv2.projectPoints(normalized, np.zeros(3), np.zeros(3), self.camera_matrix, self.dist_coeffs)
+        return projected.reshape(-1, 2).astype(np.float32)
+
+    def enable_frame_undistortion(self):
+        """Build the cv2.remap maps once; detections then come from undistorted frames"""
+        if self.undistort_maps is None:
+            self.undistort_maps = cv2.initUndistortRectifyMap(self.camera_matrix, self.dist_coeffs, None,
+                                                              self.camera_matrix, self.image_size, cv2.CV_16SC2)
+        self.frames_undistorted = True
+
+    def undistort_frame(self, frame):
+        return cv2.remap(frame, *self.undistort_maps, interpolation=cv2.INTER_LINEAR)
+
+    def to_dict(self):
+        return {"camera_matrix": self.camera_matrix.tolist(), "dist_coeffs": self.dist_coeffs.tolist(),
+                "homography": self.homography.tolist(), "image_size": list(self.image_size),
+                "field_size": list(self.field_size) if self.field_size else None}
+
+    @classmethod
+    def load(cls, path, lut_step=4):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["camera_matrix"], data["dist_coeffs"], data["homography"], data["image_size"],
+                   data.get("field_size"), lut_step)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def calibrate_intrinsics(image_paths, board_size, square_size):
+    """Camera matrix and distortion from chessboard images; returns (matrix, dist, image_size, rms)"""
+    columns, rows = board_size
+    object_points = np.zeros((columns * rows, 3), np.float32)
+    object_points[:, :2] = np.mgrid[0:columns, 0:rows].T.reshape(-1, 2) * square_size
+    criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    all_object, all_image, image_size = [], [], None
+    for path in image_paths:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            continue
+        image_size = gray.shape[::-1]
+        found, corners = cv2.findChessboardCorners(gray, board_size)
+        if not found:
+            print(f"⚠️ No chessboard in {path}")
+            continue
+        all_object.append(object_points)
+        all_image.append(cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria))
+    if len(all_image) < 3:
+        raise ValueError(f"Need at least 3 chessboard views, found {len(all_image)}")
+    rms, matrix, dist, _, _ = cv2.calibrateCamera(all_object, all_image, image_size, None, None)
+    return matrix, dist, image_size, rms
+
+
+def pick_points(frame, count, window_name="Field calibration"):
+    """Let the user click ``count`` points on a frame"""
+    points = []
+
+    def on_click(event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN and len(points) < count:
+            points.append((x, y))
+            cv2.circle(frame, (x, y), 6, (0, 0, 255), -1)
+            cv2.putText(frame, str(len(points)), (x + 8, y - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+    cv2.namedWindow(window_name)
+    cv2.setMouseCallback(window_name, on_click)
+    while len(points) < count:
+        cv2.imshow(window_name, frame)
+        if cv2.waitKey(20) & 0xFF == ord('q'):
+            break
+    cv2.destroyWindow(window_name)
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute lens undistortion and the field homography once")
+    parser.add_argument("--output", default="calibration/field.json")
+    parser.add_argument("--chessboard", nargs="*", default=None, help="Chessboard images for lens calibration")
+    parser.add_argument("--board", default="9x6", help="Inner chessboard corners, columns x rows")
+    parser.add_argument("--square", type=float, default=2.5, help="Chessboard square size (cm)")
+    parser.add_argument("--source", default="0", help="Camera, video or 'replay:<prefix>' to grab the field frame")
+    parser.add_argument("--field-size", default="240x180", help="Court width x height (cm)")
+    args = parser.parse_args()
+
+    from recorder import open_video_source
+    cap = open_video_source(int(args.source) if args.source.isdigit() else args.source, False)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        parser.error(f"Could not read a frame from {args.source}")
+    image_size = (frame.shape[1], frame.shape[0])
+
+    if args.chessboard:
+        board = tuple(int(v) for v in args.board.split("x"))
+        matrix, dist, board_size, rms = calibrate_intrinsics(args.chessboard, board, args.square)
+        if tuple(board_size) != image_size:
+            parser.error(f"Chessboard images are {board_size}, the camera delivers {image_size}")
+        print(f"✅ Lens calibrated, reprojection error {rms:.3f} px")
+    else:
+        # No lens model: identity intrinsics, the homography alone does the mapping
+        matrix = np.array([[1000, 0, image_size[0] / 2], [0, 1000, image_size[1] / 2], [0, 0, 1]], dtype=np.float64)
+        dist = np.zeros(5)
+        print("⚠️ No --chessboard images, skipping lens undistortion")
+
+    width, height = (float(v) for v in args.field_size.split("x"))
+    geometry = FieldGeometry(matrix, dist, np.eye(3), image_size, (width, height))
+    geometry.enable_frame_undistortion()
+    view = geometry.undistort_frame(frame)
+    print("🖱️ Click the court corners: top-left, top-right, bottom-right, bottom-left")
+    image_points = pick_points(view, 4)
+    if len(image_points) < 4:
+        parser.error("Calibration cancelled")
+    field_points = [(0, 0), (width, 0), (width, height), (0, height)]
+    homography, _ = cv2.findHomography(np.float32(image_points), np.float32(field_points))
+    FieldGeometry(matrix, dist, homography, image_size, (width, height)).save(args.output)
+    print(f"✅ Field calibration written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# frame_ring.py
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+from config import Config
+from recorder import open_video_source, is_live_source, reopen_video_source
+
+
+class SharedFrameRing:
+    """Ring of preallocated frames in shared memory, written by one process and read by another.
+
+    Layout: ``slots + 3`` int64 values (per-slot sequence numbers, then the
+    newest published sequence, the slot holding it and the slot pinned by the
+    reader), ``slots`` float64 capture timestamps, then the frames. The writer
+    marks a slot with -1 while filling it and publishes the new sequence
+    number afterwards. ``latest`` returns a view straight into shared memory
+    and pins its slot until the next ``latest`` call; the writer never picks
+    the pinned slot, so the view stays intact however long the reader works
+    on it. Choosing and pinning slots happens under ``lock``.
+    """
+
+    def __init__(self, shm, shape, slots, owner, lock):
+        if slots < 2:
+            raise ValueError("SharedFrameRing needs at least 2 slots")
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = owner
+        self.lock = lock
+        header = 8 * (slots + 3)
+        frames_offset = (header + 8 * slots + 63) // 64 * 64
+        self.seqs = np.ndarray((slots + 3,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.stamps = np.ndarray((slots,), dtype=np.float64, buffer=shm.buf, offset=header)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=frames_offset)
+
+    @staticmethod
+    def _size(shape, slots):
+        header = (8 * (slots + 3) + 8 * slots + 63) // 64 * 64
+        return header + slots * int(np.prod(shape))
+
+    @classmethod
+    def create(cls, shape, slots, lock):
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(shape, slots))
+        ring = cls(shm, shape, slots, True, lock)
+        ring.seqs[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name, shape, slots, lock):
+        # Capture processes are spawned from the reader, so both share one resource tracker
+        # and the creator's unlink() also clears this registration
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, slots, False, lock)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, frame, timestamp):
+        """Copy a frame into the next slot that is not pinned by the reader and publish it"""
+        newest, pinned = self.slots + 1, self.slots + 2
+        with self.lock:
+            seq = int(self.seqs[self.slots]) + 1
+            slot = (int(self.seqs[newest]) + 1) % self.slots
+            if slot == self.seqs[pinned]:
+                slot = (slot + 1) % self.slots
+            self.seqs[slot] = -1
+        self.frames[slot] = frame
+        self.stamps[slot] = timestamp
+        with self.lock:
+            self.seqs[slot] = seq
+            self.seqs[self.slots] = seq
+            self.seqs[newest] = slot
+        return seq
+
+    def latest(self):
+        """(frame view, seq, timestamp) of the newest complete slot, pinned until the next call, or (None, -1, 0.0)"""
+        with self.lock:
+            seq = int(self.seqs[self.slots])
+            if seq < 0:
+                return None, -1, 0.0
+            slot = int(self.seqs[self.slots + 1])
+            if int(self.seqs[slot]) != seq:
+                return None, -1, 0.0  # Only possible with 2 slots: the writer is refilling the newest one
+            self.seqs[self.slots + 2] = slot
+        return self.frames[slot], seq, float(self.stamps[slot])
+
+    def consumed(self):
+        """True once the reader has taken the newest frame (or nothing was written yet)"""
+        with self.lock:
+            return self.seqs[self.slots] < 0 or self.seqs[self.slots + 2] == self.seqs[self.slots + 1]
+
+    def close(self):
+        # Drop the numpy views first, the buffer cannot be released while they exist
+        self.seqs = self.stamps = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A reader still holds a frame view; the mapping goes away with it
+        if self.owner:
+            self.shm.unlink()
+
+
+def capture_to_ring(video_url, replay_realtime, slots, lock, conn, stop_event, new_frame):
+    """Capture process entry point: decode the stream into a SharedFrameRing, reopening live streams that fail"""
+    live = is_live_source(video_url)
+    cap = open_video_source(video_url, replay_realtime)
+    ret, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ret:
+        conn.send(None)
+        cap.release()
+        return
+
+    # Fast replay: every frame is handed over, in order, stamped with its recorded capture time
+    lossless = getattr(cap, "lossless", False)
+    recorded = cap.recorded_timestamp if lossless else None
+    ring = SharedFrameRing.create(frame.shape, slots, lock)
+    conn.send((ring.name, frame.shape))
+    try:
+        ring.write(frame, recorded and recorded() or time.time())
+        new_frame.set()
+        failures = 0
+        backoff = Config.CAMERA_RECONNECT_DELAY
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                failures += 1
+                if not live:
+                    break
+                if failures >= Config.CAMERA_MAX_READ_FAILURES:
+                    print(f"⚠️ Camera stream {video_url} lost, reconnecting...")
+                    cap.release()
+                    stop_event.wait(backoff)
+                    backoff = min(backoff * 2, Config.CAMERA_RECONNECT_MAX_DELAY)
+                    cap = reopen_video_source(video_url, replay_realtime, stop_event,
+                                              Config.CAMERA_RECONNECT_DELAY, Config.CAMERA_RECONNECT_MAX_DELAY)
+                    if cap is None:
+                        return
+                    failures = 0
+                continue
+            failures = 0
+            backoff = Config.CAMERA_RECONNECT_DELAY
+            if frame.shape != ring.shape:
+                frame = cv2.resize(frame, (ring.shape[1], ring.shape[0]))  # Stream came back at another resolution
+            while lossless and not ring.consumed() and not stop_event.is_set():
+                stop_event.wait(0.001)  # Wait for the reader instead of overwriting an unread frame
+            ring.write(frame, recorded and recorded() or time.time())
+            new_frame.set()
+    finally:
+        if cap is not None:
+            cap.release()
+        ring.close()
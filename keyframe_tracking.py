@@ -0,0 +1,133 @@
+# keyframe_tracking.py
+import time
+import cv2
+import numpy as np
+from box_utils import iou_matrix
+
+
+class KeyframePropagator:
+    """Carries YOLO ball boxes forward between keyframes with pyramidal Lucas-Kanade flow.
+
+    YOLO runs on a keyframe every ``interval`` frames, or earlier when fewer than
+    ``min_track_ratio`` of the keyframe's balls are still being tracked. On the
+    frames in between, a small grid of points inside each ball box is tracked and
+    the box is shifted by the median displacement. Non-ball boxes (the court) are
+    passed through unchanged, so the output keeps the (N, 6) box layout.
+    """
+
+    GRID = np.array([(gx, gy) for gy in (0.3, 0.5, 0.7) for gx in (0.3, 0.5, 0.7)], dtype=np.float32)
+
+    def __init__(self, interval=5, min_track_ratio=0.6, min_points=3, report_interval=50):
+        self.interval = interval
+        self.min_track_ratio = min_track_ratio
+        self.min_points = min_points
+        self.report_interval = report_interval
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self.prev_gray = None
+        self.boxes = None
+        self.keyframe_ball_count = 0
+        self.frames_since_keyframe = 0
+        self.track_ratio = 1.0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.stats_keyframes = 0
+        self.stats_forced = 0
+        self.stats_keyframe_ms = 0.0
+        self.stats_propagated = 0
+        self.stats_propagate_ms = 0.0
+        self.stats_iou_sum = 0.0
+        self.stats_iou_count = 0
+        self.stats_recall_sum = 0.0
+
+    def needs_keyframe(self):
+        """True when the next frame should run the full detector"""
+        if self.boxes is None:
+            return True
+        return self.frames_since_keyframe + 1 >= self.interval or self.track_ratio < self.min_track_ratio
+
+    def _flow(self, gray, boxes):
+        """Shift ball boxes from prev_gray to gray; returns the boxes that are still tracked"""
+        ball_rows = np.flatnonzero(boxes[:, 5] == 1)
+        if len(ball_rows) == 0:
+            return boxes
+        balls = boxes[ball_rows]
+        size = balls[:, 2:4] - balls[:, 0:2]
+        points = (balls[:, None, 0:2] + size[:, None, :] * self.GRID[None, :, :]).reshape(-1, 1, 2)
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points.astype(np.float32),
+                                                         None, **self.lk_params)
+
+        grid = len(self.GRID)
+        ok = status.reshape(-1, grid).astype(bool)
+        motion = (new_points - points).reshape(-1, grid, 2)
+        kept = ok.sum(axis=1) >= self.min_points
+        # Median over the successfully tracked points of each box
+        motion[~ok] = np.nan
+        shift = np.nanmedian(np.where(kept[:, None, None], motion, 0.0), axis=1)
+
+        moved = boxes.copy()
+        moved[ball_rows, 0:2] += shift
+        moved[ball_rows, 2:4] += shift
+        lost = ball_rows[~kept]
+        return np.delete(moved, lost, axis=0)
+
+    def keyframe(self, gray, boxes, detect_ms):
+        """Store fresh detector output; measures drift of the propagated boxes against it"""
+        forced = self.boxes is not None and self.frames_since_keyframe + 1 < self.interval
+        if self.boxes is not None and self.prev_gray is not None and self.keyframe_ball_count:
+            propagated = self._flow(gray, self.boxes)
+            self._score(propagated, boxes)
+
+        self.prev_gray = gray
+        self.boxes = boxes
+        self.keyframe_ball_count = int(np.count_nonzero(boxes[:, 5] == 1))
+        self.frames_since_keyframe = 0
+        self.track_ratio = 1.0
+        self.stats_keyframes += 1
+        self.stats_forced += int(forced)
+        self.stats_keyframe_ms += detect_ms
+        self._maybe_report()
+        return boxes
+
+    def propagate(self, gray):
+        """Boxes for a non-keyframe, carried forward from the previous frame"""
+        start = time.perf_counter()
+        self.boxes = self._flow(gray, self.boxes)
+        self.prev_gray = gray
+        self.frames_since_keyframe += 1
+        if self.keyframe_ball_count:
+            self.track_ratio = np.count_nonzero(self.boxes[:, 5] == 1) / self.keyframe_ball_count
+        self.stats_propagated += 1
+        self.stats_propagate_ms += (time.perf_counter() - start) * 1000
+        self._maybe_report()
+        return self.boxes
+
+    def _score(self, propagated, detected):
+        prop_balls = propagated[propagated[:, 5] == 1]
+        det_balls = detected[detected[:, 5] == 1]
+        if len(det_balls) == 0:
+            return
+        if len(prop_balls) == 0:
+            self.stats_iou_count += 1
+            return
+        best = iou_matrix(det_balls, prop_balls).max(axis=1)
+        self.stats_iou_sum += float(best.mean())
+        self.stats_recall_sum += float(np.mean(best >= 0.5))
+        self.stats_iou_count += 1
+
+    def _maybe_report(self):
+        if self.report_interval and self.stats_keyframes + self.stats_propagated >= self.report_interval:
+            print(self.report())
+            self._reset_stats()
+
+    def report(self):
+        """Latency of keyframes vs propagated frames and drift of the propagated boxes"""
+        keyframe_ms = self.stats_keyframe_ms / max(self.stats_keyframes, 1)
+        propagate_ms = self.stats_propagate_ms / max(self.stats_propagated, 1)
+        frames = self.stats_keyframes + self.stats_propagated
+        average_ms = (self.stats_keyframe_ms + self.stats_propagate_ms) / max(frames, 1)
+        scored = max(self.stats_iou_count, 1)
+        return (f"🎞️ Keyframes {self.stats_keyframes}/{frames} ({self.stats_forced} forced) | "
+                f"YOLO {keyframe_ms:.1f} ms | flow {propagate_ms:.1f} ms | avg {average_ms:.1f} ms/frame | "
+                f"drift IoU {self.stats_iou_sum / scored:.2f} | recall@0.5 {self.stats_recall_sum / scored:.2f}")
@@ -1,41 +1,187 @@
 # main.py
+import time
+STARTUP_TIME = time.perf_counter()  # Reference point for the startup timing report
+
 import cv2
 import signal
 import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 from camera import CameraManager
-from marker_detection import MarkerDetector
+from marker_detection import MarkerDetector, GoalPostTracker
 from ball_detection import BallDetector
 from bot_controller import BotController
+from bot_fleet import BotFleet, configured_bots
 from visualization import Visualizer
+from detection_pipeline import DetectionPipeline
+from preview import PreviewRenderer
+from multi_camera import MultiCameraPipeline
+from motion_gate import MotionGate
+from field_geometry import FieldGeometry
+from recorder import REPLAY_PREFIX
+from telemetry import telemetry
+
+WINDOW_NAME = "Bot Control System"
 
 
 class BotControlSystem:
-    def __init__(self):
-        self.camera = CameraManager(Config.VIDEO_URL)
-        self.marker_detector = MarkerDetector()
-        self.ball_detector = BallDetector(Config.YOLO_MODEL_PATH)
-        self.bot_controller = BotController(Config.NODEMCU_IP)
+    def __init__(self, display_mode=Config.DISPLAY_MODE):
+        self.display_mode = display_mode  # "window", "headless" or "preview"
+        telemetry.start(Config.TELEMETRY_FILE, Config.TELEMETRY_ECHO, Config.METRICS_PORT,
+                        Config.TELEMETRY_FLUSH_INTERVAL)
+        self.startup_timings = {}
+        self.first_command_reported = False
+        self.bots = configured_bots()
+        self.bot_marker_ids = [bot["marker_id"] for bot in self.bots]
+        tracked_ids = list(dict.fromkeys(Config.ARUCO_TRACKED_IDS + self.bot_marker_ids))
+        if Config.CAMERAS:
+            # Fused field view: the pipeline is both the frame source and the detector
+            self.camera = MultiCameraPipeline(Config.CAMERAS, self.bot_marker_ids, tracked_ids,
+                                              Config.MULTI_CAMERA_MODE, self._model_path(),
+                                              canvas_size=Config.FIELD_CANVAS_SIZE,
+                                              fusion_iou=Config.CAMERA_FUSION_IOU,
+                                              replay_realtime=Config.REPLAY_REALTIME,
+                                              ring_slots=Config.FRAME_RING_SLOTS,
+                                              report_interval=Config.TIMING_REPORT_INTERVAL,
+                                              max_age=Config.MAX_FRAME_AGE)
+        else:
+            self.camera = CameraManager(Config.VIDEO_URL, Config.CAPTURE_PROCESS, Config.FRAME_RING_SLOTS,
+                                        Config.REPLAY_REALTIME)
+        # A fixed GOAL_POST_POSITION (or --goal) wins over tracking the goal post marker
+        self.goal_tracker = GoalPostTracker(Config.GOAL_POST_MARKER_ID, Config.GOAL_SMOOTHING,
+                                            Config.GOAL_MOVE_THRESHOLD, Config.GOAL_MOVE_FRAMES) \
+            if Config.GOAL_POST_TRACKING and Config.GOAL_POST_POSITION is None else None
+        self.marker_detector = MarkerDetector(tracked_ids, self.bot_marker_ids,
+                                              Config.ARUCO_ROI_TRACKING, Config.ARUCO_ROI_PADDING,
+                                              Config.ARUCO_ROI_SCALE, Config.TIMING_REPORT_INTERVAL,
+                                              Config.GOAL_RECHECK_INTERVAL if self.goal_tracker else 0)
         self.visualizer = Visualizer()
-        self.goal_post_center = None
+        self.field = self._load_field_geometry()
+        self.field_goal = (None, None)  # (goal_post_center, its field position), mapped once per goal
+        # Fast (lossless) replay processes every frame however long ago it was decoded
+        fast_replay = str(Config.VIDEO_URL).startswith(REPLAY_PREFIX) and not Config.REPLAY_REALTIME
+        self.max_frame_age = 0 if fast_replay else Config.MAX_FRAME_AGE
+        self.stale_frames = 0
+
+        # Model load + warm-up, camera open and NodeMCU connect are independent and mostly
+        # wait on I/O or native code, so they run side by side
+        workers = 3 if Config.CONCURRENT_STARTUP else 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="startup") as pool:
+            model = pool.submit(self._timed, "model load + warm-up", self._load_ball_detector)
+            if len(self.bots) > 1:
+                controller = pool.submit(self._timed, "NodeMCU connect", BotFleet.connect, self.bots,
+                                         self.field is not None)
+            else:
+                controller = pool.submit(self._timed, "NodeMCU connect", BotController,
+                                         self.bots[0]["ip"], self.bots[0]["port"], Config.CALIBRATION_FILE,
+                                         self.field is not None)
+            camera = pool.submit(self._timed, "camera first frame", self._open_camera)
+            self.ball_detector = model.result()
+            controller = controller.result()
+            camera.result()
+        # Multi-bot: every bot's decision goes to its own controller through the fleet
+        self.bot_fleet = controller if isinstance(controller, BotFleet) else None
+        self.bot_controller = next(iter(self.bot_fleet.controllers.values())) if self.bot_fleet else controller
+        self.startup_timings["ready"] = time.perf_counter() - STARTUP_TIME
+        if isinstance(self.camera, MultiCameraPipeline):
+            self.camera.attach(self.ball_detector)
+            self.detection_pipeline = self.camera
+        else:
+            motion_gate = MotionGate(Config.MOTION_GATE_SCALE, Config.MOTION_PIXEL_THRESHOLD,
+                                     Config.MOTION_AREA_THRESHOLD, Config.MOTION_MAX_SKIP,
+                                     (self.bot_fleet or self.bot_controller).is_moving,
+                                     Config.TIMING_REPORT_INTERVAL) if Config.MOTION_GATE else None
+            self.detection_pipeline = DetectionPipeline(self.ball_detector, self.marker_detector,
+                                                        self.bot_marker_ids, Config.PARALLEL_DETECTION,
+                                                        Config.TIMING_REPORT_INTERVAL, motion_gate)
+        self.goal_post_center = Config.GOAL_POST_POSITION
         self.target_ball = None
-        self.reference_for_shortest_ball = None
+        self.target_ball_id = None
+        self.reference_for_shortest_ball = Config.BALL_REFERENCE
+        self.preview = PreviewRenderer(self.draw_overlays, WINDOW_NAME, Config.PREVIEW_FPS) \
+            if display_mode == "preview" else None
+
+    def _timed(self, name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.startup_timings[name] = time.perf_counter() - start
+        return result
+
+    @staticmethod
+    def _model_path():
+        return Config.ONNX_MODEL_PATH if Config.DETECTOR_BACKEND != "ultralytics" else Config.YOLO_MODEL_PATH
+
+    def _load_ball_detector(self):
+        if Config.CAMERAS and Config.MULTI_CAMERA_MODE == "workers":
+            return BallDetector(None)  # The camera workers load their own models
+        return BallDetector(self._model_path())
+
+    @staticmethod
+    def _load_field_geometry():
+        """Lens + field calibration with its lookup tables built once, or None for pixel control"""
+        if not Config.FIELD_CALIBRATION_FILE or Config.CAMERAS:
+            return None  # Fused multi-camera detections are already in field coordinates
+        field = FieldGeometry.load(Config.FIELD_CALIBRATION_FILE, Config.FIELD_LUT_STEP)
+        if Config.UNDISTORT_FRAMES:
+            field.enable_frame_undistortion()
+        print(f"📐 Field calibration loaded from {Config.FIELD_CALIBRATION_FILE}, controlling in cm")
+        return field
+
+    def _open_camera(self):
+        self.camera.start_capture()
+        if not self.camera.wait_for_first_frame(Config.CAMERA_OPEN_TIMEOUT):
+            source = [camera["url"] for camera in Config.CAMERAS] if Config.CAMERAS else Config.VIDEO_URL
+            print(f"⚠️ No frame from {source} after {Config.CAMERA_OPEN_TIMEOUT} s, continuing...")
+
+    def print_startup_report(self):
+        """Phase durations and time since process start"""
+        mode = "concurrent" if Config.CONCURRENT_STARTUP else "sequential"
+        print(f"\n⏱️ Startup ({mode}):")
+        for name, seconds in self.startup_timings.items():
+            print(f"   {name:<22} {seconds:6.2f} s")
+        print()
+
+    def _check_first_command(self):
+        first_command_at = (self.bot_fleet or self.bot_controller).first_command_at
+        if first_command_at is not None and not self.first_command_reported:
+            self.first_command_reported = True
+            self.startup_timings["first command"] = first_command_at - STARTUP_TIME
+            print(f"⏱️ Time to first command: {self.startup_timings['first command']:.2f} s since start")
 
     def cleanup_and_exit(self):
         """Helper function to clean up resources and exit"""
         print("\n📝 Cleaning up resources...")
         
+        rtt = self.bot_controller.round_trip_stats()
+        if rtt is not None:
+            print(f"📶 NodeMCU round trip: last {rtt[0]:.1f} ms | mean {rtt[1]:.1f} ms | max {rtt[2]:.1f} ms")
+
         # Stop the bot
-        print("🛑 Sending STOP command to NodeMCU...")
-        self.bot_controller.send_command("STOP")
+        if self.bot_fleet is not None:
+            self.bot_fleet.stop()
+        else:
+            print("🛑 Sending STOP command to NodeMCU...")
+            self.bot_controller.stop()
+            self.bot_controller.save_calibration()
         
         # Stop the camera
         print("📷 Stopping camera capture...")
         self.camera.stop()
+        if isinstance(self.camera, CameraManager) and self.camera.ring is None:
+            print(self.camera.report())
+        if self.stale_frames:
+            print(f"⏳ Skipped control on {self.stale_frames} stale frames (older than {self.max_frame_age} s)")
         
+        self.detection_pipeline.stop()
+        telemetry.stop()
+
         # Close OpenCV windows
-        print("🪟 Closing display windows...")
-        cv2.destroyAllWindows()
+        if self.preview is not None:
+            self.preview.stop()
+        if self.display_mode != "headless":
+            print("🪟 Closing display windows...")
+            cv2.destroyAllWindows()
         
         print("✅ Cleanup complete. System terminated safely.")
         sys.exit(0)
@@ -45,13 +191,6 @@ class BotControlSystem:
         if event == cv2.EVENT_LBUTTONDOWN:
             self.goal_post_center = (x, y)
             print(f"🎯 Goal post marked at: {self.goal_post_center}")
-            # Draw a marker on the frame
-            frame = self.camera.get_frame()
-            if frame is not None:
-                cv2.circle(frame, (x, y), 10, (0, 0, 255), -1)
-                cv2.putText(frame, "Goal Post", (x + 15, y), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-                cv2.imshow("Bot Control System", frame)
 
     def signal_handler(self, sig, frame):
         """Signal handler for graceful shutdown"""
@@ -60,56 +199,123 @@ class BotControlSystem:
 
     def initialize_system(self):
         """Initialize the system components and setup"""
-        cv2.namedWindow("Bot Control System")
-        cv2.setMouseCallback("Bot Control System", self.set_goal_post)
         signal.signal(signal.SIGINT, self.signal_handler)
-        self.camera.start_capture()
-        
-        # Show initial frame and wait for goal post selection
-        print("🖱️ Please click on the frame to mark the goal post center...")
-        while self.goal_post_center is None:
+        if self.display_mode == "window":
+            cv2.namedWindow(WINDOW_NAME)
+            if self.goal_post_center is None and self.goal_tracker is None:
+                cv2.setMouseCallback(WINDOW_NAME, self.set_goal_post)
+        elif self.goal_post_center is None and self.goal_tracker is None:
+            print("❌ No display to click on: set Config.GOAL_POST_POSITION, pass --goal X,Y or enable GOAL_POST_TRACKING")
+            sys.exit(1)
+
+        if self.goal_tracker is not None:
+            # Unattended start: the goal post is picked up from its marker as frames come in
+            print(f"🥅 Tracking the goal post from ArUco marker {Config.GOAL_POST_MARKER_ID}")
+        elif self.goal_post_center is None:
+            print("🖱️ Please click on the frame to mark the goal post center...")
+        while self.goal_post_center is None and self.goal_tracker is None:
             frame = self.camera.get_frame()
             if frame is not None:
+                if self.field is not None and self.field.frames_undistorted:
+                    frame = self.field.undistort_frame(frame)  # Click in the same pixels detections use
                 cv2.putText(frame, "Click to mark goal post center", (50, 50), 
                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.imshow("Bot Control System", frame)
+                cv2.imshow(WINDOW_NAME, frame)
                 cv2.waitKey(1)
+        if self.goal_post_center is not None:
+            print(f"🎯 Goal post at: {self.goal_post_center}")
         
-        self.reference_for_shortest_ball = input(
-            "🔍 Choose the reference point for finding the nearest ball: Type 'G' if near the 🥅 goal post, type any other value if near the 🤖 bot and then press Enter: ").lower()
+        if self.reference_for_shortest_ball is None:
+            if self.display_mode == "window":
+                self.reference_for_shortest_ball = input(
+                    "🔍 Choose the reference point for finding the nearest ball: Type 'G' if near the 🥅 goal post, type any other value if near the 🤖 bot and then press Enter: ").lower()
+            else:
+                self.reference_for_shortest_ball = 'g'
+                print("🔍 No ball reference configured, using the 🥅 goal post")
+
+        if self.preview is not None:
+            self.preview.start()
 
     def process_frame(self, frame):
         """Process each frame for ball and marker detection"""
-        yolo_results = self.ball_detector.detect(frame)
-        corners, ids, _ = self.marker_detector.detect_markers(frame)
-        bot_center = None
-        bot_orientation_angle = None
+        # The fused pipeline stamps its own detections with the oldest camera's capture time
+        timestamp = None if self.detection_pipeline is self.camera else self.camera.last_timestamp or None
+        detections = self.detection_pipeline.process(frame, timestamp)
+        if self.goal_tracker is not None:
+            self.goal_post_center = self.goal_tracker.update(detections)
 
-        if ids is not None:
-            self.visualizer.highlight_aruco(frame, ids, corners, Config.BOT_MARKER_ID)
+        age = time.time() - detections.timestamp
+        if self.max_frame_age and age > self.max_frame_age:
+            # Acting on where things were half a second ago does more harm than skipping a frame
+            self.stale_frames += 1
+            telemetry.count("stale_frames")
+            telemetry.event("stale_frame", "⏳ Skipping control, frame is {age_ms:.0f} ms old",
+                            age_ms=age * 1000)
+        elif self.bot_fleet is not None:
+            self.control_fleet(detections)
+        elif detections.ids is not None:
+            if (self.reference_for_shortest_ball == 'b' or self.goal_post_center is None) \
+                    and detections.bot_center is not None:
+                reference_point = detections.bot_center
+            else:
+                reference_point = self.goal_post_center
+            if reference_point is not None:
+                self.ball_detector.select_target(reference_point, detections)
 
-            if Config.BOT_MARKER_ID in ids:
-                bot_index = list(ids.flatten()).index(Config.BOT_MARKER_ID)
-                bot_corners = corners[bot_index]
-                bot_center, bot_orientation_angle = self.marker_detector.process_bot_marker(bot_corners)
+            if detections.target_ball:
+                self.adjust_ball_threshold_and_control_bot(detections)
+        self.target_ball, self.target_ball_id = detections.target_ball, detections.target_ball_id
 
-            if self.reference_for_shortest_ball == 'b' and bot_center is not None:
-                self.target_ball = self.ball_detector.find_closest_ball_from_bot(bot_center, yolo_results)
-            else:
-                self.target_ball = self.ball_detector.find_closest_ball_from_goal_post(self.goal_post_center, yolo_results)
+        if self.display_mode == "headless":
+            return
+        if self.preview is not None:
+            self.preview.submit(frame, detections)
+        else:
+            self.draw_overlays(frame, detections)
+            cv2.imshow(WINDOW_NAME, frame)
 
-            if self.target_ball:
-                self.adjust_ball_threshold_and_control_bot(bot_center, bot_orientation_angle)
+    def control_fleet(self, detections):
+        """Multi-bot mode: assign each visible bot its own ball and dispatch the decisions"""
+        references = {marker_id: pose[0] for marker_id, pose in detections.bot_poses.items()}
+        self.ball_detector.assign_targets(references, detections)
+        if self.goal_post_center is None:
+            return
+        control = BotController.control_velocity if Config.CONTROL_MODE == "velocity" \
+            else BotController.control_movement2
+        for marker_id, (ball, _) in detections.assignments.items():
+            ball_threshold, t_forward = self.movement_thresholds(ball)
+            ball, bot_center, bot_angle, goal = self.control_inputs(detections, marker_id, ball)
+            self.bot_fleet.dispatch(marker_id, control, ball, bot_center, goal,
+                                    bot_angle, ball_threshold, t_forward)
 
-        self.visualizer.draw_ball_boxes(frame, yolo_results, self.target_ball)
+    def draw_overlays(self, frame, detections):
+        """Draw markers, ball boxes and reference circles for one frame's detections"""
+        self.visualizer.draw_detections(frame, detections, self.bot_marker_ids)
+        self.visualizer.draw_goal_post(frame, self.goal_post_center)
         self.draw_reference_circles(frame)
-        cv2.imshow("Bot Control System", frame)
 
-    def adjust_ball_threshold_and_control_bot(self, bot_center, bot_orientation_angle):
-        """Adjust ball threshold and control bot movement"""
+    def control_inputs(self, detections, marker_id, ball):
+        """Ball box, bot pose and goal post in control units: field cm when calibrated, otherwise pixels"""
+        bot_center, bot_angle = detections.bot_poses[marker_id]
+        if self.field is None:
+            return ball, bot_center, bot_angle, self.goal_post_center
+        x1, y1, x2, y2 = ball[:4]
+        (x, y), = self.field.to_field([((x1 + x2) / 2, (y1 + y2) / 2)])
+        # The heading changes under the perspective too, so the pose is recomputed from the mapped corners.
+        # A whole cm is several degrees at trap range, so field coordinates stay fractional
+        bot_center, bot_angle = self.marker_detector.process_bot_marker(
+            self.field.to_field(detections.marker_corners(marker_id)).reshape(1, 4, 2), exact=True)
+        if self.field_goal[0] != self.goal_post_center:
+            self.field_goal = (self.goal_post_center, tuple(self.field.to_field([self.goal_post_center])[0]))
+        return (x, y, x, y), bot_center, bot_angle, self.field_goal[1]
+
+    def movement_thresholds(self, target_ball):
+        """Ball proximity threshold and extra trap time, loosened for balls far from the field center"""
+        if self.field is not None:
+            return Config.BALL_PROXIMITY_CM, Config.TRAP_EXTRA_MS  # Distances are undistorted, no fudge needed
         fixed_point = (640, 360)
         fixed_distance = 250
-        x1, y1, x2, y2 = self.target_ball
+        x1, y1, x2, y2 = target_ball
         targ_ball_center = ((x1 + x2) // 2, (y1 + y2) // 2)
         target_centre_distance = ((targ_ball_center[0] - fixed_point[0])**2 + 
                                 (targ_ball_center[1] - fixed_point[1])**2)**0.5
@@ -119,11 +325,17 @@ class BotControlSystem:
         if target_centre_distance > fixed_distance:
             ball_threshold -= 10
             t_forward += 60
-        
-        if self.goal_post_center and bot_center and self.target_ball:
-            self.bot_controller.control_movement2(self.target_ball, bot_center,
-                                            self.goal_post_center, bot_orientation_angle,
-                                            ball_threshold, t_forward)
+        return ball_threshold, t_forward
+
+    def adjust_ball_threshold_and_control_bot(self, detections):
+        """Adjust ball threshold and control bot movement"""
+        ball_threshold, t_forward = self.movement_thresholds(detections.target_ball)
+        if self.goal_post_center and detections.bot_center and detections.target_ball:
+            control = self.bot_controller.control_velocity if Config.CONTROL_MODE == "velocity" \
+                else self.bot_controller.control_movement2
+            ball, bot_center, bot_angle, goal = self.control_inputs(detections, self.bot_marker_ids[0],
+                                                                    detections.target_ball)
+            control(ball, bot_center, goal, bot_angle, ball_threshold, t_forward)
 
     def draw_reference_circles(self, frame):
         """Draw reference circles on the frame"""
@@ -136,8 +348,18 @@ class BotControlSystem:
         try:
             while True:
                 frame = self.camera.get_frame()
+                if frame is None:
+                    print("📷 Video stream ended")
+                    break
+                if self.field is not None and self.field.frames_undistorted:
+                    frame = self.field.undistort_frame(frame)
                 self.process_frame(frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if not self.first_command_reported:
+                    self._check_first_command()
+                if self.display_mode == "window":
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+                elif self.preview is not None and self.preview.quit_requested:
                     break
         except KeyboardInterrupt:
             print("\n\n🛑 Received Ctrl+C! Shutting down gracefully...")
@@ -145,11 +367,33 @@ class BotControlSystem:
             self.cleanup_and_exit()
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Football bot control system")
+    parser.add_argument("--display", choices=["window", "headless", "preview"], default=Config.DISPLAY_MODE,
+                        help="window: draw and show every frame; headless: no drawing; "
+                             "preview: draw copies on a separate thread at --preview-fps")
+    parser.add_argument("--goal", default=None, help="Goal post center as X,Y (skips the mouse click)")
+    parser.add_argument("--reference", choices=["g", "b"], default=None,
+                        help="Find the nearest ball from the goal post (g) or the bot (b)")
+    parser.add_argument("--preview-fps", type=float, default=None)
+    args = parser.parse_args()
+
+    if args.goal:
+        Config.GOAL_POST_POSITION = tuple(int(v) for v in args.goal.split(","))
+    if args.reference:
+        Config.BALL_REFERENCE = args.reference
+    if args.preview_fps is not None:
+        Config.PREVIEW_FPS = args.preview_fps
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
     print("\n⚙️  Powering up all systems...\n")
     print("🔥 Ignition sequence started... Engine is now running smoothly.\n")
     print("✅ Engine Status: ONLINE")
     print("Ready for operation. Let's go!\n")
-    bot_control_system = BotControlSystem()
+    bot_control_system = BotControlSystem(args.display)
+    bot_control_system.print_startup_report()
     bot_control_system.initialize_system()
     bot_control_system.run()
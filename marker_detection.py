@@ -1,15 +1,146 @@
 # marker_detection.py
+import time
 import cv2
 import numpy as np
 import math
 
 class MarkerDetector:
-    def __init__(self):
-        self.aruco_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_5X5_1000)
+    def __init__(self, tracked_ids=None, bot_marker_id=None, roi_tracking=False,
+                 roi_padding=60, roi_scale=1.0, report_interval=0, recheck_interval=0):
+        base_dict = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_5X5_1000)
         self.aruco_params = cv2.aruco.DetectorParameters()
+        self.id_map = None
+        if tracked_ids:
+            # Dictionary holding only the markers we use: fewer codes to match and no stray IDs.
+            # Detected IDs are indices into it and get mapped back through id_map.
+            self.id_map = np.array(tracked_ids, dtype=np.int32)
+            self.aruco_dict = cv2.aruco.Dictionary(base_dict.bytesList[self.id_map],
+                                                   base_dict.markerSize, base_dict.maxCorrectionBits)
+        else:
+            self.aruco_dict = base_dict
+
+        # ROI tracking around the last pose of each bot (one marker ID or a list in multi-bot mode)
+        self.bot_marker_ids = [] if bot_marker_id is None else [int(m) for m in np.atleast_1d(bot_marker_id)]
+        self.bot_marker_id = self.bot_marker_ids[0] if self.bot_marker_ids else None
+        self.roi_tracking = roi_tracking and bool(self.bot_marker_ids)
+        self.roi_padding = roi_padding
+        self.roi_scale = roi_scale
+        self.report_interval = report_interval
+        # Full-frame search every N ROI frames so non-bot markers (the goal post) are still seen
+        self.recheck_interval = recheck_interval
+        self.roi_streak = 0
+        self.last_bot_corners = {}  # Marker ID -> corners of its last sighting
+        self.subpix_criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.01)
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.stats_calls = 0
+        self.stats_roi_attempts = 0
+        self.stats_roi_hits = 0
+        self.stats_roi_ms = 0.0
+        self.stats_full = 0
+        self.stats_full_ms = 0.0
+
+    def _detect(self, image):
+        corners, ids, rejected = cv2.aruco.detectMarkers(image, self.aruco_dict, parameters=self.aruco_params)
+        if ids is not None and self.id_map is not None:
+            ids = self.id_map[ids.reshape(-1)].reshape(-1, 1)
+        return corners, ids, rejected
 
     def detect_markers(self, frame):
-        return cv2.aruco.detectMarkers(frame, self.aruco_dict, parameters=self.aruco_params)
+        """Returns (corners, ids, rejected) like cv2.aruco.detectMarkers, searching near the bot first"""
+        self.stats_calls += 1
+        recheck_due = bool(self.recheck_interval) and self.roi_streak >= self.recheck_interval
+        if self.roi_tracking and len(self.last_bot_corners) == len(self.bot_marker_ids) and not recheck_due:
+            start = time.perf_counter()
+            result = self._detect_in_rois(frame)
+            self.stats_roi_attempts += 1
+            self.stats_roi_ms += (time.perf_counter() - start) * 1000
+            if result is not None:
+                self.stats_roi_hits += 1
+                self.roi_streak += 1
+                self._maybe_report()
+                return result
+        self.roi_streak = 0
+
+        # Lost (or not tracking): search the whole frame
+        start = time.perf_counter()
+        corners, ids, rejected = self._detect(frame)
+        self.stats_full += 1
+        self.stats_full_ms += (time.perf_counter() - start) * 1000
+        self.last_bot_corners = self._find_bot_corners(corners, ids)
+        self._maybe_report()
+        return corners, ids, rejected
+
+    def _find_bot_corners(self, corners, ids, marker_ids=None):
+        """{marker ID: corners} for the bots among the detected markers"""
+        found = {}
+        if ids is None:
+            return found
+        ids = ids.reshape(-1)
+        for marker_id in self.bot_marker_ids if marker_ids is None else marker_ids:
+            matches = np.flatnonzero(ids == marker_id)
+            if len(matches):
+                found[marker_id] = corners[matches[0]]
+        return found
+
+    def _detect_in_rois(self, frame):
+        """Search around every bot's last pose; None (full-frame fallback) if any bot is lost"""
+        all_corners, rejected = [], []
+        for marker_id in self.bot_marker_ids:
+            result = self._detect_in_roi(frame, marker_id)
+            if result is None:
+                return None
+            all_corners.append(result[0])
+            rejected.extend(result[1])
+        ids = np.array(self.bot_marker_ids, dtype=np.int32).reshape(-1, 1)
+        return tuple(all_corners), ids, tuple(rejected)
+
+    def _detect_in_roi(self, frame, marker_id):
+        """Search a padded box around one bot's last corners; (corners, rejected) or None if not found there"""
+        height, width = frame.shape[:2]
+        points = self.last_bot_corners[marker_id].reshape(-1, 2)
+        x1, y1 = np.floor(points.min(axis=0) - self.roi_padding).astype(int)
+        x2, y2 = np.ceil(points.max(axis=0) + self.roi_padding).astype(int)
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+        if x2 <= x1 or y2 <= y1:
+            return None
+
+        roi = frame[y1:y2, x1:x2]
+        if roi.ndim == 3:
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        search = roi if self.roi_scale == 1.0 else cv2.resize(roi, None, fx=self.roi_scale, fy=self.roi_scale,
+                                                             interpolation=cv2.INTER_AREA)
+        corners, ids, rejected = self._detect(search)
+        bot_corners = self._find_bot_corners(corners, ids, [marker_id]).get(marker_id)
+        if bot_corners is None:
+            return None
+
+        bot_corners = bot_corners.astype(np.float32)
+        if self.roi_scale != 1.0:
+            # Corners found at reduced scale are refined on the full-resolution ROI
+            bot_corners = bot_corners / self.roi_scale
+            refined = cv2.cornerSubPix(roi, bot_corners.reshape(-1, 1, 2), (5, 5), (-1, -1), self.subpix_criteria)
+            bot_corners = refined.reshape(1, 4, 2)
+        bot_corners = bot_corners + np.array([x1, y1], dtype=np.float32)
+        self.last_bot_corners[marker_id] = bot_corners
+        return bot_corners, rejected
+
+    def _maybe_report(self):
+        if self.report_interval and self.stats_calls >= self.report_interval:
+            print(self.tracking_report())
+            self._reset_stats()
+
+    def tracking_report(self):
+        """ROI hit rate and the time saved against always searching the full frame"""
+        full_ms = self.stats_full_ms / max(self.stats_full, 1)
+        roi_ms = self.stats_roi_ms / max(self.stats_roi_attempts, 1)
+        hit_rate = self.stats_roi_hits / max(self.stats_calls, 1)
+        # Misses pay for the ROI attempt and the full-frame search
+        spent_ms = self.stats_roi_ms + self.stats_full_ms
+        saved_ms = self.stats_calls * full_ms - spent_ms if self.stats_full else 0.0
+        return (f"🎯 ArUco ROI hit rate {hit_rate:.0%} ({self.stats_calls} frames) | "
+                f"ROI {roi_ms:.2f} ms | full {full_ms:.2f} ms | saved ~{saved_ms / max(self.stats_calls, 1):.2f} ms/frame")
 
     @staticmethod
     def calculate_angle(pt1, pt2):
@@ -18,16 +149,17 @@ class MarkerDetector:
         return math.atan2(delta_y, delta_x) * 180 / np.pi
 
     @staticmethod
-    def get_bot_front_center(top_left, top_right):
-        return (round((top_left[0] + top_right[0]) / 2),
-                round((top_left[1] + top_right[1]) / 2))
+    def get_bot_front_center(top_left, top_right, exact=False):
+        x, y = (top_left[0] + top_right[0]) / 2, (top_left[1] + top_right[1]) / 2
+        return (float(x), float(y)) if exact else (round(x), round(y))
 
-    def process_bot_marker(self, corner):
+    def process_bot_marker(self, corner, exact=False):
+        """Front center and heading of a bot marker; ``exact`` keeps fractional coordinates (field cm)"""
         marker_corners = corner[0]
         bottom_left = marker_corners[3]
         bottom_right = marker_corners[2]
         top_right = marker_corners[1]
-        bot_front_center = self.get_bot_front_center(bottom_left, bottom_right)
+        bot_front_center = self.get_bot_front_center(bottom_left, bottom_right, exact)
         # orientation_angle = self.calculate_angle(bottom_left, bottom_right)
         orientation_angle = self.calculate_angle(top_right, bottom_right)
         return bot_front_center, orientation_angle
@@ -39,4 +171,44 @@ class MarkerDetector:
         top_right = marker_corners[1]
         # bottom_right = marker_corners[2]
         return (round((top_left[0] + top_right[0]) / 2),
-                round((top_left[1] + top_right[1]) / 2))
\ No newline at end of file
+                round((top_left[1] + top_right[1]) / 2))
+
+class GoalPostTracker:
+    """Goal post position from its ArUco marker, smoothed and cached between sightings.
+
+    The marker is decoded in the same detect_markers pass as the bots. With ROI
+    tracking it is only seen on the occasional full-frame search, so the last
+    position is kept in between. Small changes are smoothed out; a sighting
+    more than ``move_threshold`` away for ``move_frames`` sightings in a row
+    replaces the position outright (the camera was bumped).
+    """
+
+    def __init__(self, marker_id, smoothing=0.2, move_threshold=40, move_frames=3):
+        self.marker_id = marker_id
+        self.smoothing = smoothing
+        self.move_threshold = move_threshold
+        self.move_frames = move_frames
+        self.position = None
+        self.moved_count = 0
+        self._smoothed = None
+
+    def update(self, detections):
+        """Feed one frame's FrameDetections; returns the goal post position or None until first seen"""
+        corners = detections.marker_corners(self.marker_id)
+        if corners is None:
+            return self.position
+        seen = np.array(MarkerDetector.process_aruco_marker(corners), dtype=np.float64)
+        if self._smoothed is None:
+            self._smoothed = seen
+            print(f"🥅 Goal post marker {self.marker_id} found at {tuple(int(v) for v in seen)}")
+        elif np.hypot(*(seen - self._smoothed)) > self.move_threshold:
+            self.moved_count += 1
+            if self.moved_count < self.move_frames:
+                return self.position  # Could be a one-off misdetection
+            self._smoothed = seen
+            print(f"🥅 Goal post moved to {tuple(int(v) for v in seen)}")
+        else:
+            self._smoothed += self.smoothing * (seen - self._smoothed)
+        self.moved_count = 0
+        self.position = (round(self._smoothed[0]), round(self._smoothed[1]))
+        return self.position
@@ -0,0 +1,167 @@
+# motion_calibration.py
+import os
+import json
+import time
+import numpy as np
+
+# Hand-tuned starting points: milliseconds per degree (LEFT/RIGHT) or per pixel (FORWARD)
+DEFAULT_RATES = {"LEFT": 965 / 180, "RIGHT": 1110 / 180, "FORWARD": 5.8}
+# Typical move sizes the prior pseudo-samples are placed at
+PRIOR_UNITS = {"LEFT": (20, 90), "RIGHT": (20, 90), "FORWARD": (60, 300)}
+
+
+class RateModel:
+    """duration_ms = dead_ms + ms_per_unit * units, fitted by weighted least squares.
+
+    Observations are exponentially forgotten so the fit follows battery drain
+    and wheel wear. The hand-tuned rate enters as ``prior_weight`` pseudo-samples
+    (with zero dead time) and keeps the fit sane while data is scarce.
+    """
+
+    def __init__(self, default_rate, prior_units, prior_weight=3.0, forgetting=0.95):
+        self.default_rate = default_rate
+        self.prior_units = prior_units
+        self.prior_weight = prior_weight
+        self.forgetting = forgetting
+        self.sums = np.zeros(5)  # sum w, w*u, w*u^2, w*ms, w*u*ms
+        self.samples = 0
+        self.dead_ms = 0.0
+        self.ms_per_unit = default_rate
+
+    def add(self, units, duration_ms):
+        self.sums *= self.forgetting
+        self.sums += (1.0, units, units * units, duration_ms, units * duration_ms)
+        self.samples += 1
+        self._fit()
+
+    def _fit(self):
+        s_w, s_u, s_uu, s_m, s_um = self.sums
+        for units in self.prior_units:
+            ms = self.default_rate * units
+            weight = self.prior_weight / len(self.prior_units)
+            s_w, s_u, s_uu = s_w + weight, s_u + weight * units, s_uu + weight * units * units
+            s_m, s_um = s_m + weight * ms, s_um + weight * units * ms
+        det = s_w * s_uu - s_u * s_u
+        if det <= 1e-9:
+            return
+        ms_per_unit = (s_w * s_um - s_u * s_m) / det
+        dead_ms = (s_m - ms_per_unit * s_u) / s_w
+        if ms_per_unit <= 0:
+            return  # Degenerate data, keep the previous fit
+        if dead_ms < 0:
+            # No negative dead time: refit the rate through the origin
+            dead_ms, ms_per_unit = 0.0, s_um / s_uu
+        self.dead_ms, self.ms_per_unit = dead_ms, ms_per_unit
+
+    def duration(self, units):
+        return self.dead_ms + self.ms_per_unit * abs(units)
+
+    def to_dict(self):
+        return {"dead_ms": self.dead_ms, "ms_per_unit": self.ms_per_unit,
+                "samples": self.samples, "sums": self.sums.tolist()}
+
+    def load(self, data):
+        self.sums = np.array(data.get("sums", [0.0] * 5), dtype=float)
+        self.samples = int(data.get("samples", 0))
+        self.dead_ms = float(data.get("dead_ms", 0.0))
+        self.ms_per_unit = float(data.get("ms_per_unit", self.default_rate))
+
+
+class MotionCalibrator:
+    """Learns how far LEFT/RIGHT/FORWARD move per millisecond from the marker pose before and after each move.
+
+    ``begin(command, duration_ms, center, angle, expected_end)`` records a
+    single timed move; ``finish(center, angle)`` with the next settled pose
+    turns it into a sample. Moves that were preempted, observed too late, went
+    the wrong way or disagree wildly with the current fit are discarded.
+    Fits are persisted to ``path`` so a fresh start begins from the last values.
+    """
+
+    def __init__(self, path=None, prior_weight=3.0, forgetting=0.95, max_delay=2.0,
+                 outlier_ratio=2.5, save_every=5, rates=None):
+        self.path = path
+        self.max_delay = max_delay
+        self.outlier_ratio = outlier_ratio
+        self.save_every = save_every
+        # rates overrides starting rates, e.g. FORWARD in ms per cm for metric field coordinates;
+        # prior points keep the same durations so they stay typical moves in the new unit
+        rates = {**DEFAULT_RATES, **(rates or {})}
+        self.models = {command: RateModel(rate, tuple(u * DEFAULT_RATES[command] / rate for u in PRIOR_UNITS[command]),
+                                          prior_weight, forgetting)
+                       for command, rate in rates.items()}
+        self.pending = None
+        self.accepted = 0
+        self.rejected = 0
+        if path:
+            self.load()
+
+    def duration_for(self, command, units):
+        """Calibrated duration in milliseconds to move ``units`` degrees/pixels"""
+        return abs(int(self.models[command].duration(units)))
+
+    def begin(self, command, duration_ms, center, angle, expected_end):
+        self.pending = (command, duration_ms, center, angle, expected_end) if command in self.models else None
+
+    def discard(self):
+        self.pending = None
+
+    def finish(self, center, angle, now=None):
+        """Turn the pending move into a sample using the pose observed after it ended"""
+        if self.pending is None:
+            return
+        command, duration_ms, start_center, start_angle, expected_end = self.pending
+        self.pending = None
+        now = time.monotonic() if now is None else now
+        if now - expected_end > self.max_delay:
+            return  # Pose too old to be the result of this move alone
+
+        units = self.observed_units(command, start_center, start_angle, center, angle)
+        model = self.models[command]
+        predicted = model.duration(units) if units > 0 else 0
+        if units < (1.0 if command != "FORWARD" else 3.0) or \
+                (model.samples >= 3 and not 1 / self.outlier_ratio < duration_ms / predicted < self.outlier_ratio):
+            self.rejected += 1
+            return
+        model.add(units, duration_ms)
+        self.accepted += 1
+        if self.path and self.accepted % self.save_every == 0:
+            self.save()
+
+    @staticmethod
+    def observed_units(command, start_center, start_angle, end_center, end_angle):
+        """Degrees turned in the commanded direction, or pixels moved along the starting heading"""
+        if command == "FORWARD":
+            heading = np.radians(start_angle)
+            return (end_center[0] - start_center[0]) * np.cos(heading) + \
+                (end_center[1] - start_center[1]) * np.sin(heading)
+        turned = (end_angle - start_angle + 180) % 360 - 180
+        return -turned if command == "LEFT" else turned
+
+    def report(self):
+        fits = " | ".join(f"{command} {model.ms_per_unit:.2f} ms/{'unit' if command == 'FORWARD' else 'deg'}"
+                          f" + {model.dead_ms:.0f} ms ({model.samples})" for command, model in self.models.items())
+        return f"🧭 Motion calibration: {fits} | rejected {self.rejected}"
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            for command, model in self.models.items():
+                if command in data:
+                    model.load(data[command])
+            print(f"🧭 Loaded motion calibration from {self.path}")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable calibration file {self.path}: {e}")
+
+    def save(self):
+        data = {command: model.to_dict() for command, model in self.models.items()}
+        data["updated"] = time.time()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)  # Never leave a half-written file behind
@@ -0,0 +1,92 @@
+# motion_gate.py
+import cv2
+import numpy as np
+from telemetry import telemetry
+
+
+class MotionGate:
+    """Decides whether a frame needs fresh YOLO + ArUco detection or can reuse the last result.
+
+    The frame is shrunk by ``scale`` to grayscale and compared against the
+    frame of the last detection, inside the court bounds when they are known.
+    Detection runs when more than ``area_threshold`` of those pixels changed
+    by over ``pixel_threshold`` grey levels, while ``busy_fn()`` reports the
+    bot executing a command (and once right after it stops), and at least
+    every ``max_skip`` frames so slow drift cannot hide forever.
+    """
+
+    def __init__(self, scale=0.25, pixel_threshold=15, area_threshold=0.0005, max_skip=30,
+                 busy_fn=None, report_interval=100):
+        self.scale = scale
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.max_skip = max_skip
+        self.busy_fn = busy_fn
+        self.report_interval = report_interval
+        self.reference = None
+        self.skipped_in_row = 0
+        self.was_busy = False
+        self.changed_fraction = 0.0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.stats_frames = 0
+        self.stats_skipped = 0
+        self.stats_motion = 0
+        self.stats_busy = 0
+        self.stats_forced = 0
+
+    def _small_gray(self, frame, region):
+        if region is not None:
+            height, width = frame.shape[:2]
+            x1, y1, x2, y2 = region
+            x1, y1 = max(0, int(x1)), max(0, int(y1))
+            x2, y2 = min(width, int(np.ceil(x2))), min(height, int(np.ceil(y2)))
+            if x2 > x1 and y2 > y1:
+                frame = frame[y1:y2, x1:x2]
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def should_detect(self, frame, region=None):
+        """True when this frame must be detected; ``region`` is the court (x1, y1, x2, y2) or None"""
+        self.stats_frames += 1
+        gray = self._small_gray(frame, region)
+        busy = self.busy_fn is not None and self.busy_fn()
+        settled = self.was_busy and not busy  # One fresh look at where the move ended
+        self.was_busy = busy
+
+        reason = None
+        if self.reference is None or self.reference.shape != gray.shape:
+            reason = "forced"
+        elif busy or settled:
+            reason = "busy"
+        elif self.skipped_in_row + 1 >= self.max_skip:
+            reason = "forced"
+        else:
+            changed = cv2.absdiff(gray, self.reference) > self.pixel_threshold
+            self.changed_fraction = np.count_nonzero(changed) / changed.size
+            if self.changed_fraction > self.area_threshold:
+                reason = "motion"
+
+        if reason is None:
+            self.skipped_in_row += 1
+            self.stats_skipped += 1
+            telemetry.count("gated_frames")
+        else:
+            self.reference = gray
+            self.skipped_in_row = 0
+            self.stats_motion += reason == "motion"
+            self.stats_busy += reason == "busy"
+            self.stats_forced += reason == "forced"
+        self._maybe_report()
+        return reason is not None
+
+    def _maybe_report(self):
+        if self.report_interval and self.stats_frames >= self.report_interval:
+            print(self.report())
+            self._reset_stats()
+
+    def report(self):
+        detected = self.stats_frames - self.stats_skipped
+        return (f"💤 Motion gate: skipped {self.stats_skipped}/{self.stats_frames} frames | detected {detected} "
+                f"(motion {self.stats_motion}, bot busy {self.stats_busy}, forced {self.stats_forced})")
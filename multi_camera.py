@@ -0,0 +1,307 @@
+# multi_camera.py
+import os
+import time
+import queue
+import threading
+import multiprocessing as mp
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from config import Config
+from box_utils import fuse_boxes
+from camera import CameraManager
+from field_geometry import FieldMapping
+from marker_detection import MarkerDetector
+from ball_detection import BallDetector
+from detection_pipeline import FrameDetections, fill_bot_poses
+from recorder import REPLAY_PREFIX, open_video_source, is_live_source, reopen_video_source
+from telemetry import telemetry
+
+# One camera's detections, already mapped to field coordinates
+CameraResult = namedtuple("CameraResult", "index seq timestamp boxes corners ids yolo_ms aruco_ms")
+
+
+def fuse_markers(results):
+    """Marker corners/ids from all cameras; a marker seen twice keeps the first camera's corners"""
+    fused = {}
+    for result in results:
+        if result.ids is None:
+            continue
+        for corners, marker_id in zip(result.corners, result.ids.reshape(-1)):
+            fused.setdefault(int(marker_id), corners)
+    if not fused:
+        return (), None
+    return tuple(fused.values()), np.array(list(fused), dtype=np.int32).reshape(-1, 1)
+
+
+def camera_worker(index, camera, replay_realtime, model_path, backend, threads, tracked_ids, results, stop_event):
+    """Worker process entry point: decode one camera, detect, map to the field and publish the result"""
+    from detector_backends import create_backend
+    mapping = FieldMapping.from_config(camera)
+    detector = create_backend(backend, model_path, Config.DETECTOR_IMGSZ, threads, Config.DETECTOR_WARMUP_RUNS)
+    markers = MarkerDetector(tracked_ids)
+    live = is_live_source(camera["url"])
+    cap = open_video_source(camera["url"], replay_realtime)
+    seq = 0
+    failures = 0
+    backoff = Config.CAMERA_RECONNECT_DELAY
+    try:
+        while cap is not None and not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                failures += 1
+                if not live:
+                    break
+                if failures >= Config.CAMERA_MAX_READ_FAILURES:
+                    cap.release()
+                    stop_event.wait(backoff)
+                    backoff = min(backoff * 2, Config.CAMERA_RECONNECT_MAX_DELAY)
+                    cap = reopen_video_source(camera["url"], replay_realtime, stop_event,
+                                              Config.CAMERA_RECONNECT_DELAY, Config.CAMERA_RECONNECT_MAX_DELAY)
+                    failures = 0
+                continue
+            failures = 0
+            backoff = Config.CAMERA_RECONNECT_DELAY
+            timestamp = time.time()
+            start = time.perf_counter()
+            boxes = detector.infer(frame)
+            yolo_ms = (time.perf_counter() - start) * 1000
+            corners, ids, _ = markers.detect_markers(frame)
+            aruco_ms = (time.perf_counter() - start) * 1000 - yolo_ms
+            result = CameraResult(index, seq, timestamp, mapping.boxes_to_field(boxes),
+                                  mapping.corners_to_field(corners), ids, yolo_ms, aruco_ms)
+            # One-slot queue per camera: replace an unread older result, the main process only wants the newest
+            while not stop_event.is_set():
+                try:
+                    results.put_nowait(result)
+                    break
+                except queue.Full:
+                    try:
+                        results.get_nowait()
+                    except queue.Empty:
+                        pass
+            seq += 1
+    finally:
+        if cap is not None:
+            cap.release()
+
+
+class MultiCameraPipeline:
+    """Several cameras fused into one top-down field view.
+
+    Stands in for both CameraManager and DetectionPipeline in main.py:
+    ``get_frame`` waits for fresh detections and returns a blank field canvas to
+    draw on, ``process`` fuses the newest detections of every camera into one
+    FrameDetections record in field coordinates.
+
+    mode "workers": every camera is decoded and detected (YOLO + ArUco) in its
+    own process and only the mapped detections come back.
+    mode "batched": every camera is decoded into a shared-memory ring by a
+    capture process; this process runs one batched YOLO call over the newest
+    frames and ArUco per camera on a thread pool.
+    """
+
+    def __init__(self, cameras, bot_marker_ids, tracked_ids, mode="workers", model_path=None, backend=None,
+                 canvas_size=(1280, 720), fusion_iou=0.3, replay_realtime=True, ring_slots=4, report_interval=100,
+                 max_age=0.5):
+        if mode not in ("workers", "batched"):
+            raise ValueError(f"Unknown multi-camera mode '{mode}', choose 'workers' or 'batched'")
+        self.cameras = cameras
+        self.mappings = [FieldMapping.from_config(camera) for camera in cameras]
+        self.bot_marker_ids = list(bot_marker_ids)
+        self.tracked_ids = tracked_ids
+        self.mode = mode
+        self.model_path = model_path
+        self.backend = backend or Config.DETECTOR_BACKEND
+        self.canvas_size = canvas_size
+        self.fusion_iou = fusion_iou
+        # Fast replay carries recorded capture times, which say nothing about how stale a result is
+        self.fast_replay = not replay_realtime and all(str(camera["url"]).startswith(REPLAY_PREFIX)
+                                                       for camera in cameras)
+        # Seconds after which a camera's last result is left out of the fusion (0 keeps all)
+        self.max_age = 0 if self.fast_replay else max_age
+        self.replay_realtime = replay_realtime
+        self.ring_slots = ring_slots
+        self.report_interval = report_interval
+
+        self.canvas = self._field_canvas()
+        self.court_bounds = (0, 0, canvas_size[0], canvas_size[1])
+        self.restricted_zone = BallDetector._get_restricted_zone(self.court_bounds)
+        self.pose_helper = MarkerDetector(tracked_ids)
+        self.ball_detector = None
+        self.latest = [None] * len(cameras)
+        self.new_result = threading.Event()
+        self.first_frame = threading.Event()
+        self.is_running = True
+        self.last_timestamp = 0.0
+        self.frame_id = 0
+        self.processes = []
+        self.managers = []
+        self.executor = None
+        self._reset_stats()
+
+    def _field_canvas(self):
+        width, height = self.canvas_size
+        canvas = np.full((height, width, 3), (40, 90, 40), dtype=np.uint8)
+        cv2.rectangle(canvas, (0, 0), (width - 1, height - 1), (255, 255, 255), 2)
+        cv2.line(canvas, (width // 2, 0), (width // 2, height - 1), (255, 255, 255), 1)
+        return canvas
+
+    def _reset_stats(self):
+        self.stats_frames = 0
+        self.stats_yolo_ms = 0.0
+        self.stats_aruco_ms = 0.0
+        self.stats_fuse_ms = 0.0
+        self.stats_age_ms = 0.0
+
+    def attach(self, ball_detector):
+        """Use this BallDetector's tracker (and, in batched mode, its model)"""
+        self.ball_detector = ball_detector
+
+    def start_capture(self):
+        if self.mode == "workers":
+            self._start_workers()
+        else:
+            self._start_capture_processes()
+
+    def _start_workers(self):
+        ctx = mp.get_context("spawn")
+        self.results = [ctx.Queue(maxsize=1) for _ in self.cameras]
+        self.stop_event = ctx.Event()
+        # Split the cores between the workers unless a thread count is configured
+        threads = Config.DETECTOR_THREADS or max(1, (os.cpu_count() or 1) // len(self.cameras))
+        for index, camera in enumerate(self.cameras):
+            process = ctx.Process(target=camera_worker, daemon=True,
+                                  args=(index, camera, self.replay_realtime, self.model_path, self.backend,
+                                        threads, self.tracked_ids, self.results[index], self.stop_event))
+            process.start()
+            self.processes.append(process)
+        self.collectors = [threading.Thread(target=self._collect, args=(index,), daemon=True)
+                           for index in range(len(self.cameras))]
+        for collector in self.collectors:
+            collector.start()
+
+    def _collect(self, index):
+        """Keep the newest result of one worker"""
+        while self.is_running:
+            try:
+                result = self.results[index].get(timeout=0.1)
+            except queue.Empty:
+                if not self.processes[index].is_alive():
+                    break
+                continue
+            self.latest[result.index] = result
+            self.first_frame.set()
+            self.new_result.set()
+        self.new_result.set()
+
+    def _start_capture_processes(self):
+        self.managers = [CameraManager(camera["url"], True, self.ring_slots, self.replay_realtime)
+                         for camera in self.cameras]
+        self.executor = ThreadPoolExecutor(max_workers=len(self.cameras), thread_name_prefix="aruco")
+        # Open all streams at once, each waits for its first frame
+        list(self.executor.map(lambda manager: manager.start_capture(), self.managers))
+        self.markers = [MarkerDetector(self.tracked_ids) for _ in self.cameras]
+        self.first_frame.set()
+
+    def wait_for_first_frame(self, timeout=None):
+        """Block until any camera has delivered; False on timeout"""
+        return self.first_frame.wait(timeout)
+
+    def get_frame(self):
+        """Wait for fresh detections (workers) or frames (batched); returns the field canvas to draw on"""
+        if self.mode == "workers":
+            while self.is_running and not self.new_result.wait(0.1):
+                pass
+            self.new_result.clear()
+            if not any(process.is_alive() for process in self.processes):
+                return None  # Every stream has ended
+        else:
+            self.frames = [manager.get_frame() for manager in self.managers]
+            if any(frame is None for frame in self.frames):
+                return None
+        return self.canvas.copy()
+
+    def _detect_batched(self):
+        start = time.perf_counter()
+        aruco = [self.executor.submit(self._timed_markers, i, frame) for i, frame in enumerate(self.frames)]
+        box_arrays = self.ball_detector.backend.infer_batch(self.frames)
+        yolo_ms = (time.perf_counter() - start) * 1000
+        results = []
+        for i, (boxes, future) in enumerate(zip(box_arrays, aruco)):
+            corners, ids, aruco_ms = future.result()
+            manager, mapping = self.managers[i], self.mappings[i]
+            results.append(CameraResult(i, manager.last_seq, manager.last_timestamp, mapping.boxes_to_field(boxes),
+                                        mapping.corners_to_field(corners), ids, yolo_ms, aruco_ms))
+        return results
+
+    def _timed_markers(self, index, frame):
+        start = time.perf_counter()
+        corners, ids, _ = self.markers[index].detect_markers(frame)
+        return corners, ids, (time.perf_counter() - start) * 1000
+
+    def process(self, frame, timestamp=None):
+        """Fuse the newest detections of all cameras into one FrameDetections record (frame is only the canvas)"""
+        if self.mode == "batched":
+            results = self._detect_batched()
+        else:
+            results = [result for result in self.latest if result is not None]
+        if self.max_age:
+            # A camera that ended or is reconnecting must not keep contributing ghost balls and poses;
+            # with no fresh camera at all the stale results stay so main.py sees the frame as stale
+            now = time.time()
+            results = [result for result in results if now - result.timestamp <= self.max_age] or results
+
+        start = time.perf_counter()
+        boxes = fuse_boxes([result.boxes for result in results], self.fusion_iou)
+        if self.ball_detector is not None and self.ball_detector.tracker is not None:
+            boxes = self.ball_detector.tracker.update(boxes)
+        corners, ids = fuse_markers(results)
+        fuse_ms = (time.perf_counter() - start) * 1000
+
+        self.frame_id += 1
+        captured = min((result.timestamp for result in results), default=time.time())
+        self.last_timestamp = captured
+        detections = FrameDetections(self.frame_id, timestamp or captured, boxes, self.court_bounds,
+                                     self.restricted_zone, corners, ids)
+        # Cameras run side by side, so the slowest one bounds the stage time
+        detections.yolo_ms = max((result.yolo_ms for result in results), default=0.0)
+        detections.aruco_ms = max((result.aruco_ms for result in results), default=0.0)
+        detections.total_ms = 0.0 if self.fast_replay else (time.time() - captured) * 1000
+        fill_bot_poses(detections, self.pose_helper, self.bot_marker_ids)
+        self._record(detections, fuse_ms)
+        telemetry.frame(self.frame_id, yolo_ms=detections.yolo_ms, aruco_ms=detections.aruco_ms,
+                        fuse_ms=fuse_ms, total_ms=detections.total_ms)
+        return detections
+
+    def _record(self, detections, fuse_ms):
+        self.stats_frames += 1
+        self.stats_yolo_ms += detections.yolo_ms
+        self.stats_aruco_ms += detections.aruco_ms
+        self.stats_fuse_ms += fuse_ms
+        self.stats_age_ms += detections.total_ms
+        if self.report_interval and self.stats_frames >= self.report_interval:
+            print(self.timing_report())
+            self._reset_stats()
+
+    def timing_report(self):
+        n = max(self.stats_frames, 1)
+        return (f"⏱️ Multi-camera ({self.mode}, {len(self.cameras)} cameras, {self.stats_frames} frames): "
+                f"YOLO {self.stats_yolo_ms / n:.1f} ms | ArUco {self.stats_aruco_ms / n:.1f} ms | "
+                f"fuse {self.stats_fuse_ms / n:.2f} ms | capture-to-fused {self.stats_age_ms / n:.1f} ms")
+
+    def stop(self):
+        if not self.is_running:
+            return  # Shared between the camera and pipeline roles, so stop() runs twice
+        self.is_running = False
+        if self.processes:
+            self.stop_event.set()
+            for process in self.processes:
+                process.join(timeout=2)
+                if process.is_alive():
+                    process.terminate()
+        for manager in self.managers:
+            manager.stop()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,159 @@
+# nodemcu_stub.py
+import json
+import time
+import socket
+import argparse
+import threading
+
+
+class NodeMCUStub:
+    """Local TCP stand-in for the NodeMCU: accepts 'COMMAND:duration' lines and logs them.
+
+    Each received command is appended to ``commands`` as a dict and, when a
+    log path is given, written as one JSON line. Replies mirror the command
+    back as 'OK:COMMAND:duration' so BotController's receive loop has data, or
+    'ERR:COMMAND' for a command the firmware could not parse.
+    Batched 'B<seq>|CMD:ms|CMD:ms' packets are acked like the firmware does:
+    'R<seq>' on receipt, 'A<seq>:<step>' as each step ends, 'D<seq>' when done.
+    As on the firmware, every new line (another packet, STOP, VEL or a single
+    command) cancels the running sequence, which then gets no further acks.
+    With realtime=False the step acks are sent immediately. 'VEL:<speed>:<turn>:<ms>'
+    setpoints are logged with their values and, like on the firmware, not answered.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, log_path=None, verbose=True, realtime=True):
+        self.host = host
+        self.port = port
+        self.log_path = log_path
+        self.verbose = verbose
+        self.realtime = realtime
+        self.commands = []
+        self.lock = threading.Lock()
+        self.server = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((self.host, self.port))
+        self.port = self.server.getsockname()[1]  # Resolve port 0 to the one the OS picked
+        self.server.listen()
+        self.server.settimeout(0.5)
+        self.running = True
+        self.thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self.thread.start()
+        print(f"🤖 NodeMCU stand-in listening on {self.host}:{self.port}")
+        return self
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, address = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn, address), daemon=True).start()
+
+    def _serve(self, conn, address):
+        conn.settimeout(0.5)
+        buffer = ""
+        cancel_running = threading.Event()  # Cancels the sequence currently playing on this connection
+        with conn:
+            while self.running:
+                try:
+                    data = conn.recv(1024)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not data:
+                    break
+                buffer += data.decode()
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    cancel_running.set()
+                    if line.startswith("B"):
+                        cancel_running = threading.Event()
+                        threading.Thread(target=self._run_sequence, args=(conn, line, cancel_running),
+                                         daemon=True).start()
+                    else:
+                        reply = self.handle_line(line)
+                        if reply:
+                            conn.sendall(reply.encode())
+
+    def handle_line(self, line):
+        """Log one protocol line and return the reply to send back"""
+        if line.startswith("VEL:"):
+            speed, turn, watchdog = (line.split(":") + ["0", "0", "0"])[1:4]
+            self._log({"time": time.time(), "command": "VEL", "duration": int(watchdog),
+                       "speed": int(speed), "turn": int(turn)})
+            return None
+        command, _, duration = line.partition(":")
+        if not command or len(command) >= 10:
+            return f"ERR:{command}\n"  # Does not fit the firmware's step buffer
+        entry = {"time": time.time(), "command": command,
+                 "duration": int(duration) if duration.isdigit() else None}
+        self._log(entry)
+        return f"OK:{line}\n"
+
+    def _run_sequence(self, conn, line, cancelled):
+        """Play a batched packet step by step, acking like the firmware, until a newer line cancels it"""
+        header, *steps = line.split("|")
+        seq = header[1:]
+        try:
+            conn.sendall(f"R{seq}\n".encode())
+            for index, step in enumerate(steps):
+                command, _, duration = step.partition(":")
+                duration = int(duration) if duration.isdigit() else 0
+                self._log({"time": time.time(), "command": command, "duration": duration, "sequence": int(seq)})
+                if self.realtime:
+                    cancelled.wait(duration / 1000)
+                if cancelled.is_set():
+                    return
+                conn.sendall(f"A{seq}:{index}\n".encode())
+            conn.sendall(f"D{seq}\n".encode())
+        except OSError:
+            pass  # Connection closed mid-sequence
+
+    def _log(self, entry):
+        with self.lock:
+            self.commands.append(entry)
+            if self.log_path:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+        if self.verbose:
+            print(f"📥 {entry['command']} {entry['duration'] if entry['duration'] is not None else ''}")
+
+    def stop(self):
+        self.running = False
+        if self.server:
+            self.server.close()
+        if self.thread:
+            self.thread.join(timeout=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local NodeMCU stand-in speaking the COMMAND:duration protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--log", default=None, help="Append received commands to this JSONL file")
+    parser.add_argument("--instant", action="store_true", help="Ack batched steps without waiting their duration")
+    args = parser.parse_args()
+
+    stub = NodeMCUStub(args.host, args.port, args.log, realtime=not args.instant).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# pid_controller.py
+import time
+
+
+class PID:
+    """Textbook PID with output clamping, integral anti-windup and a stall deadband.
+
+    ``update(error)`` returns the control output. Errors within ``tolerance``
+    give 0; any other output is raised to at least ``min_output`` so the motors
+    actually move. State is reset when updates stop for ``reset_after`` seconds,
+    so a stale derivative never kicks in when control resumes.
+    """
+
+    def __init__(self, kp, ki=0.0, kd=0.0, output_limit=100, min_output=0, tolerance=0.0, reset_after=0.5):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_limit = output_limit
+        self.min_output = min_output
+        self.tolerance = tolerance
+        self.reset_after = reset_after
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_error = None
+        self.last_time = None
+
+    def update(self, error, now=None):
+        now = time.monotonic() if now is None else now
+        if self.last_time is None or now - self.last_time > self.reset_after:
+            self.reset()
+        dt = now - self.last_time if self.last_time is not None else 0.0
+
+        derivative = 0.0
+        if dt > 0:
+            derivative = (error - self.last_error) / dt
+            self.integral += error * dt
+            if self.ki:
+                # Anti-windup: the integral term alone can never saturate the output
+                limit = self.output_limit / self.ki
+                self.integral = max(-limit, min(limit, self.integral))
+        self.last_error = error
+        self.last_time = now
+
+        if abs(error) <= self.tolerance:
+            return 0.0
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        output = max(-self.output_limit, min(self.output_limit, output))
+        if 0 < abs(output) < self.min_output:
+            output = self.min_output if output > 0 else -self.min_output
+        return output
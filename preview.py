@@ -0,0 +1,62 @@
+# preview.py
+import time
+import threading
+import cv2
+
+
+class PreviewRenderer:
+    """Draws and shows frames on its own thread at a capped rate, so drawing never delays control.
+
+    ``submit`` only copies a frame when the next preview is due, and the
+    caller never waits on the renderer; frames arriving in between are skipped.
+    ``draw_fn(frame, snapshot)`` does the actual drawing on the copy.
+    """
+
+    def __init__(self, draw_fn, window_name, max_fps=10):
+        self.draw_fn = draw_fn
+        self.window_name = window_name
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.next_due = 0.0
+        self.pending = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.quit_requested = False
+        self.running = False
+        self.thread = None
+        self.rendered = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, frame, snapshot):
+        """Hand over a frame and the detections to draw on it, if a preview is due"""
+        now = time.monotonic()
+        if now < self.next_due:
+            return
+        self.next_due = now + self.interval
+        with self.lock:
+            self.pending = (frame.copy(), snapshot)
+        self.ready.set()
+
+    def _run(self):
+        cv2.namedWindow(self.window_name)
+        while self.running:
+            if self.ready.wait(0.1):
+                self.ready.clear()
+                with self.lock:
+                    item, self.pending = self.pending, None
+                if item is not None:
+                    frame, snapshot = item
+                    self.draw_fn(frame, snapshot)
+                    cv2.imshow(self.window_name, frame)
+                    self.rendered += 1
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.quit_requested = True
+        cv2.destroyWindow(self.window_name)
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1)
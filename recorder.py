@@ -0,0 +1,163 @@
+# recorder.py
+import os
+import csv
+import time
+import argparse
+import cv2
+
+REPLAY_PREFIX = "replay:"
+
+
+class FrameRecorder:
+    """Saves a camera stream as an MJPEG .avi plus a CSV of per-frame capture timestamps"""
+
+    def __init__(self, path_prefix, fps=30):
+        self.path_prefix = path_prefix
+        self.fps = fps
+        self.writer = None
+        self.frame_count = 0
+        directory = os.path.dirname(path_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.timestamps_file = open(f"{path_prefix}_timestamps.csv", "w", newline="")
+        self.timestamps = csv.writer(self.timestamps_file)
+        self.timestamps.writerow(["frame", "timestamp"])
+
+    def write(self, frame, timestamp=None):
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            self.writer = cv2.VideoWriter(f"{self.path_prefix}.avi", cv2.VideoWriter_fourcc(*"MJPG"),
+                                          self.fps, (width, height))
+        self.writer.write(frame)
+        self.timestamps.writerow([self.frame_count, f"{timestamp or time.time():.6f}"])
+        self.frame_count += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+        self.timestamps_file.close()
+
+
+class ReplaySource:
+    """cv2.VideoCapture stand-in that plays back a FrameRecorder recording.
+
+    With realtime=True frames are released on the recorded timeline; otherwise
+    they are returned as fast as the caller reads them, and ``lossless`` tells
+    CameraManager to hand over every one, waiting for the consumer, stamped
+    with ``recorded_timestamp()``, so replay runs are deterministic.
+    """
+
+    def __init__(self, path_prefix, realtime=True):
+        self.cap = cv2.VideoCapture(f"{path_prefix}.avi")
+        self.realtime = realtime
+        self.lossless = not realtime
+        self.timestamps = []
+        timestamps_path = f"{path_prefix}_timestamps.csv"
+        if os.path.exists(timestamps_path):
+            with open(timestamps_path, newline="") as f:
+                self.timestamps = [float(row["timestamp"]) for row in csv.DictReader(f)]
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.frame_interval = 1.0 / fps
+        self.index = 0
+        self.start_time = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _frame_offset(self, index):
+        if index < len(self.timestamps):
+            return self.timestamps[index] - self.timestamps[0]
+        return index * self.frame_interval
+
+    def _pace(self):
+        if not self.realtime:
+            return
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        delay = self.start_time + self._frame_offset(self.index) - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def grab(self):
+        self._pace()
+        ok = self.cap.grab()
+        if ok:
+            self.index += 1
+        return ok
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def recorded_timestamp(self):
+        """Original capture time of the last frame read"""
+        index = self.index - 1
+        return self.timestamps[index] if 0 <= index < len(self.timestamps) else None
+
+    def release(self):
+        self.cap.release()
+
+
+def open_video_source(video_url, replay_realtime=True):
+    """cv2.VideoCapture for a camera URL, or a ReplaySource for 'replay:<path prefix>'"""
+    if isinstance(video_url, str) and video_url.startswith(REPLAY_PREFIX):
+        return ReplaySource(video_url[len(REPLAY_PREFIX):], replay_realtime)
+    return cv2.VideoCapture(video_url)
+
+
+def is_live_source(video_url):
+    """Camera index or stream URL, as opposed to a recording or video file that simply ends"""
+    return isinstance(video_url, int) or "://" in str(video_url)
+
+
+def reopen_video_source(video_url, replay_realtime, stop_event, delay=0.5, max_delay=8.0):
+    """Open a video source, retrying with exponential backoff; None if stop_event is set first"""
+    while not stop_event.is_set():
+        cap = open_video_source(video_url, replay_realtime)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        print(f"⚠️ Could not open {video_url}, retrying in {delay:.1f} s...")
+        stop_event.wait(delay)
+        delay = min(delay * 2, max_delay)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the camera stream with per-frame timestamps")
+    parser.add_argument("--url", default=None, help="Video URL (defaults to Config.VIDEO_URL)")
+    parser.add_argument("--out", required=True, help="Output path prefix, e.g. recordings/match1")
+    parser.add_argument("--seconds", type=float, default=0, help="Stop after this many seconds (0 = until Ctrl+C)")
+    parser.add_argument("--fps", type=float, default=30, help="Frame rate stored in the video header")
+    args = parser.parse_args()
+
+    if args.url is None:
+        from config import Config
+        args.url = Config.VIDEO_URL
+
+    cap = cv2.VideoCapture(args.url)
+    recorder = FrameRecorder(args.out, args.fps)
+    start = time.time()
+    print(f"🎥 Recording {args.url} to {args.out}.avi (Ctrl+C to stop)...")
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            recorder.write(frame, time.time())
+            if args.seconds and time.time() - start >= args.seconds:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        recorder.close()
+    print(f"✅ Saved {recorder.frame_count} frames in {time.time() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# telemetry.py
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import Config
+
+
+def _json_default(value):
+    return value.item() if hasattr(value, "item") else str(value)  # numpy scalars
+
+
+class Telemetry:
+    """Structured events in a preallocated ring, written out by a background thread.
+
+    ``event(kind, template, **fields)`` only stores a tuple in the next ring
+    slot; formatting, JSON encoding and all I/O happen on the writer thread,
+    which appends JSON lines to ``path`` and, with ``echo``, prints
+    ``template.format(**fields)`` for events that have a template. When the
+    ring is full new events are dropped and counted rather than blocking the
+    caller. With no file, no echo and no metrics port every call returns on
+    its first line.
+    """
+
+    def __init__(self, ring_size=4096):
+        self.ring = [None] * ring_size
+        self.ring_size = ring_size
+        self.head = 0  # Events written
+        self.tail = 0  # Events flushed
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.echo = False
+        self.file = None
+        self.frame_id = 0
+        self.counters = {"frames": 0, "dropped_frames": 0, "commands": 0, "skipped_decisions": 0,
+                         "dropped_events": 0}
+        self.gauges = {}
+        self.rates = {"fps": 0.0, "commands_per_s": 0.0}
+        self.started_at = time.time()
+        self.thread = None
+        self.server = None
+        self.running = False
+
+    def start(self, path=None, echo=True, metrics_port=0, flush_interval=0.5):
+        """Enable the sinks that are configured and start the writer (and metrics server)"""
+        self.echo = echo
+        self.flush_interval = flush_interval
+        if path:
+            self.file = open(path, "a", buffering=1 << 16)
+        if metrics_port:
+            self._start_metrics_server(metrics_port)
+        self.enabled = bool(self.file or echo or self.server)
+        if self.enabled:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+            self.thread.start()
+
+    def event(self, kind, template=None, **fields):
+        """Record one event; ``template`` is the console text, formatted later with ``fields``"""
+        if not self.enabled:
+            return
+        with self.lock:
+            if self.head - self.tail >= self.ring_size:
+                self.counters["dropped_events"] += 1
+                return
+            self.ring[self.head % self.ring_size] = (time.time(), self.frame_id, kind, template, fields)
+            self.head += 1
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def frame(self, frame_id, **timings):
+        """One processed frame: advances the frame id stamped on later events and logs stage timings"""
+        if not self.enabled:
+            return
+        self.frame_id = frame_id
+        self.counters["frames"] += 1
+        self.gauges.update(timings)
+        if self.file is not None:
+            self.event("frame", **timings)
+
+    def _drain(self):
+        with self.lock:
+            head, tail = self.head, self.tail
+            events = [self.ring[i % self.ring_size] for i in range(tail, head)]
+            self.tail = head
+        return events
+
+    def _run(self):
+        last_rate_at, last_frames, last_commands = time.monotonic(), 0, 0
+        while self.running:
+            time.sleep(self.flush_interval)
+            self._flush()
+            now = time.monotonic()
+            if now - last_rate_at >= 1.0:
+                frames, commands = self.counters["frames"], self.counters["commands"]
+                self.rates = {"fps": (frames - last_frames) / (now - last_rate_at),
+                              "commands_per_s": (commands - last_commands) / (now - last_rate_at)}
+                last_rate_at, last_frames, last_commands = now, frames, commands
+
+    def _flush(self):
+        events = self._drain()
+        if not events:
+            return
+        if self.file is not None:
+            self.file.write("".join(
+                json.dumps({"t": round(t, 4), "frame": frame_id, "kind": kind, **fields},
+                           default=_json_default) + "\n"
+                for t, frame_id, kind, _, fields in events))
+        if self.echo:
+            lines = [template.format(**fields) for _, _, _, template, fields in events if template]
+            if lines:
+                sys.stdout.write("\n".join(lines) + "\n")
+                sys.stdout.flush()
+
+    def metrics(self):
+        """Counters, per-second rates and the latest stage timings"""
+        return {"uptime_s": round(time.time() - self.started_at, 1), "frame_id": self.frame_id,
+                **self.counters, **{k: round(v, 2) for k, v in self.rates.items()},
+                **{k: round(v, 2) for k, v in self.gauges.items()}}
+
+    def _start_metrics_server(self, port):
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(telemetry.metrics(), default=_json_default).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True).start()
+        print(f"📊 Metrics at http://127.0.0.1:{port}/metrics")
+
+    def stop(self):
+        """Flush what is left and close the sinks"""
+        if not self.enabled:
+            return
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2 * self.flush_interval + 1)
+        self._flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.enabled = False
+
+
+# Process-wide instance; disabled until main.py starts it
+telemetry = Telemetry(Config.TELEMETRY_RING_SIZE)
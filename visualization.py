@@ -1,25 +1,53 @@
 # visualization.py
 import cv2
+import numpy as np
 
 class Visualizer:
     @staticmethod
     def highlight_aruco(frame, ids, corners, bot_marker_id):
         if ids is not None:
+            bot_marker_ids = np.atleast_1d(bot_marker_id)  # One ID or a list in multi-bot mode
             for i, id in enumerate(ids):
-                if id == bot_marker_id:
+                if id[0] in bot_marker_ids:
                     cv2.putText(frame, f"Bot ID: {id[0]}", 
                               (int(corners[i][0][0][0]), int(corners[i][0][0][1]) - 10),
                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
                 cv2.aruco.drawDetectedMarkers(frame, corners)
 
     @staticmethod
-    def draw_ball_boxes(frame, results, target_ball):
-        if results[0].boxes.data is not None and len(results[0].boxes.data) > 0:
-            for box in results[0].boxes.data.cpu().numpy():
-                x1, y1, x2, y2, conf, class_id = box
+    def draw_ball_boxes(frame, boxes, target_ball, target_id=None):
+        if boxes is not None and len(boxes) > 0:
+            tracked = boxes.shape[1] > 6
+            for box in boxes:
+                x1, y1, x2, y2, conf, class_id = box[:6]
                 cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), 
                             (255, 0, 0), 2)
+                if tracked and box[6] >= 0:
+                    cv2.putText(frame, f"#{int(box[6])}", (int(x1), int(y1) - 5),
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1)
 
-                if target_ball is not None and (int(x1), int(y1), int(x2), int(y2)) == target_ball:
+                if target_id is not None and tracked:
+                    is_target = int(box[6]) == target_id
+                else:
+                    is_target = target_ball is not None and (int(x1), int(y1), int(x2), int(y2)) == target_ball
+                if is_target:
                     cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), 
                                 (0, 0, 255), 2)
+
+    @staticmethod
+    def draw_goal_post(frame, goal_post_center):
+        if goal_post_center is not None:
+            x, y = int(goal_post_center[0]), int(goal_post_center[1])
+            cv2.circle(frame, (x, y), 10, (0, 0, 255), -1)
+            cv2.putText(frame, "Goal Post", (x + 15, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+
+    @staticmethod
+    def draw_detections(frame, detections, bot_marker_id):
+        """Draw one frame's FrameDetections record: markers, ball boxes and the target"""
+        if detections.ids is not None:
+            Visualizer.highlight_aruco(frame, detections.ids.reshape(-1, 1), detections.corners, bot_marker_id)
+        Visualizer.draw_ball_boxes(frame, detections.boxes, detections.target_ball, detections.target_ball_id)
+        for marker_id, (ball, _) in detections.assignments.items():
+            x1, y1, x2, y2 = ball
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+            cv2.putText(frame, f"Bot {marker_id}", (x1, y2 + 14), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 255), 1)